@@ -37,7 +37,10 @@ def analyze_document():
             file.save(file_path)
             try:
                 analyzer = DocumentAnalyzer()
-                result = analyzer.analyze_document(file_path)
+                # 勾選「以 CrossRef 驗證參考文獻」時才連線查詢
+                verify = request.form.get('verify_references', '').lower() in ('1', 'true', 'on', 'yes')
+                # 使用者通常接著查詢參考文獻：在背景先把 metadata 查進快取
+                result = analyzer.analyze_document(file_path, verify_references=verify, prefetch=True)
                 os.remove(file_path)
                 return jsonify(result)
             except Exception as e:
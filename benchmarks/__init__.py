@@ -0,0 +1 @@
+# Benchmarks for APA Citation Checker
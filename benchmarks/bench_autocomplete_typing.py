@@ -0,0 +1,151 @@
+"""
+自動補全打字模擬 benchmark：每次輸入都送出 vs debounce，伺服器端有無序號取消
+
+模擬使用者以 key-interval 秒一個字元輸入查詢字串、每打完一個詞停頓 word-pause 秒，
+依下列四種方式送出 /api/suggest_doi（Flask test client，每個請求一個執行緒），
+統計打完整個查詢時 CrossRef（本機 stub）收到的請求數：
+- immediate:      每個字元都送出（舊的前端行為），伺服器完整處理每個請求
+- immediate+seq:  每個字元都送出，帶 client / seq，較舊的請求在驗證前放棄
+- debounce:       停止輸入 debounce 秒後才送出
+- debounce+seq:   debounce 加上序號取消（目前 index.html 的行為）
+
+stub 的搜尋結果依查詢字串產生不同的 DOI，驗證請求不會因快取而互相抵銷；
+自動補全前綴索引停用，只量測送出與取消策略本身的效果。
+
+使用方式（從專案根目錄）：
+    python benchmarks/bench_autocomplete_typing.py --query "exercise and cognition"
+"""
+import argparse
+import hashlib
+import os
+import sys
+import threading
+import time
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+from routes import citation
+from services import crossref_service, http_client
+from services.prefix_index import PrefixIndex
+from services.metadata_cache import metadata_cache
+from services.request_sequence import suggest_sequencer
+from benchmarks.crossref_stub import CrossrefStub, stub_work
+
+
+def _keystrokes(text, key_interval, word_pause):
+    """回傳 [(時間, 目前輸入內容)]，每打完一個詞多停頓 word_pause 秒"""
+    events = []
+    t = 0.0
+    for i, ch in enumerate(text):
+        t += key_interval
+        events.append((t, text[:i + 1]))
+        if ch == " ":
+            t += word_pause
+    return events
+
+
+def _debounced(events, debounce):
+    """debounce：下一個字元在 debounce 秒內出現就不送出"""
+    fired = []
+    for i, (t, value) in enumerate(events):
+        next_t = events[i + 1][0] if i + 1 < len(events) else None
+        if next_t is None or next_t - t >= debounce:
+            fired.append((t + debounce, value))
+    return fired
+
+
+def _search_items(params):
+    query = params.get("query.bibliographic") or params.get("query") or ""
+    slug = hashlib.md5(query.encode("utf-8")).hexdigest()[:8]
+    rows = int(params.get("rows", "5"))
+    return [stub_work(f"10.5555/{slug}.{i}", i) for i in range(rows)]
+
+
+def _run(app, schedule, with_seq, client_id):
+    statuses = []
+    lock = threading.Lock()
+
+    def send(seq, value):
+        url = f"/api/suggest_doi?prefix={quote(value)}"
+        if with_seq:
+            url += f"&client={client_id}&seq={seq}"
+        resp = app.test_client().get(url)
+        with lock:
+            statuses.append((seq, resp.status_code, time.perf_counter()))
+
+    threads = []
+    start = time.perf_counter()
+    for seq, (t, value) in enumerate(schedule, 1):
+        delay = start + t - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        thread = threading.Thread(target=send, args=(seq, value))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    last_sent = start + schedule[-1][0]
+    final = max(at for seq, _, at in statuses if seq == len(schedule))
+    superseded = sum(1 for _, status, _ in statuses if status == 409)
+    return superseded, (final - last_sent) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="自動補全送出 / 取消策略的 upstream 請求數 benchmark")
+    parser.add_argument('--query', default="exercise and cognition")
+    parser.add_argument('--key-interval', type=float, default=0.12)
+    parser.add_argument('--word-pause', type=float, default=0.5)
+    parser.add_argument('--debounce', type=float, default=0.4)
+    parser.add_argument('--search-delay', type=float, default=0.8)
+    parser.add_argument('--verify-delay', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    events = _keystrokes(args.query, args.key_interval, args.word_pause)
+    debounced = _debounced(events, args.debounce)
+    modes = (("immediate", events, False), ("immediate+seq", events, True),
+             ("debounce", debounced, False), ("debounce+seq", debounced, True))
+
+    def delay(path):
+        return args.verify_delay if path.startswith('/works/') else args.search_delay
+
+    app = Flask(__name__)
+    app.register_blueprint(citation.bp)
+
+    original_url = http_client.CROSSREF_API_URL
+    original_db = metadata_cache.db_path
+    original_index = crossref_service.suggest_index
+    metadata_cache.db_path = ''
+    crossref_service.suggest_index = PrefixIndex(path='', max_entries=0)
+    rows = []
+    try:
+        with CrossrefStub(delay=delay, search=_search_items) as stub:
+            http_client.CROSSREF_API_URL = stub.url
+            for name, schedule, with_seq in modes:
+                metadata_cache.clear()
+                suggest_sequencer.reset()
+                stub.reset_stats()
+                superseded, final_ms = _run(app, schedule, with_seq, f"bench-{name}")
+                rows.append((name, len(schedule), stub.request_count, superseded, final_ms))
+    finally:
+        http_client.CROSSREF_API_URL = original_url
+        metadata_cache.clear()
+        metadata_cache.db_path = original_db
+        crossref_service.suggest_index = original_index
+        suggest_sequencer.reset()
+
+    print("=" * 80)
+    print(f"輸入 {args.query!r}（{len(events)} 個字元，每字 {args.key_interval}s，詞間停頓 "
+          f"{args.word_pause}s，debounce {args.debounce}s）")
+    print("=" * 80)
+    print(f"  {'模式':<15}{'送出請求':>8}{'upstream 請求':>14}{'放棄':>6}{'最後結果延遲':>14}")
+    for name, sent, upstream, superseded, final_ms in rows:
+        print(f"  {name:<17}{sent:>8}{upstream:>14}{superseded:>8}{final_ms:>12.0f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+CrossRef 連線池 benchmark
+
+對本機 stub server 連續發出 DOI 查詢，比較：
+- 每次呼叫 requests.get（每次重新建立 TCP 連線）
+- 透過 services.http_client 的共用 session（keep-alive + connection pool）
+
+注意：stub 使用明文 HTTP，因此只量到 TCP handshake 的節省；
+對 api.crossref.org 的實際呼叫還會省下 TLS handshake，差距會更大。
+
+使用方式（從專案根目錄）：
+    python benchmarks/bench_crossref_session.py --calls 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import http_client
+from services.crossref_service import fetch_metadata_from_doi
+from benchmarks.crossref_stub import CrossrefStub
+
+
+def _time_calls(fn, calls):
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _summary(samples):
+    ordered = sorted(samples)
+    return {
+        'mean_ms': statistics.mean(samples) * 1000,
+        'median_ms': statistics.median(samples) * 1000,
+        'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="比較共用 session 與每次 requests.get 的單次呼叫延遲")
+    parser.add_argument('--calls', type=int, default=300)
+    args = parser.parse_args(argv)
+
+    with CrossrefStub() as stub:
+        http_client.CROSSREF_API_URL = stub.url
+        http_client.reset_session()
+
+        def plain_get(i):
+            res = requests.get(f"{stub.url}/works/10.5555/plain.{i}", timeout=10)
+            res.json()
+
+        stub.reset_stats()
+        plain = _time_calls(plain_get, args.calls)
+        plain_connections = stub.connection_count
+
+        def pooled_get(i):
+            fetch_metadata_from_doi(f"10.5555/pooled.{i}")
+
+        stub.reset_stats()
+        pooled = _time_calls(pooled_get, args.calls)
+        pooled_connections = stub.connection_count
+
+    print("=" * 70)
+    print(f"CrossRef 單次呼叫延遲（{args.calls} 次，本機 stub）")
+    print("=" * 70)
+    for name, samples, conns in (("requests.get", plain, plain_connections),
+                                 ("pooled session", pooled, pooled_connections)):
+        s = _summary(samples)
+        print(f"  {name:<16} mean {s['mean_ms']:7.3f} ms  median {s['median_ms']:7.3f} ms  "
+              f"p99 {s['p99_ms']:7.3f} ms  新連線 {conns}")
+    speedup = statistics.mean(plain) / statistics.mean(pooled)
+    print(f"\n  平均每次呼叫加速 {speedup:.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
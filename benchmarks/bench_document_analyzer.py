@@ -0,0 +1,170 @@
+"""
+DocumentAnalyzer 各階段效能 benchmark
+
+以合成論文量測每個分析階段的耗時與整體峰值記憶體，並與儲存的 baseline 比對。
+任何階段超過 baseline * (1 + threshold) 即視為效能退化，程式以 exit code 1 結束。
+
+使用方式（從專案根目錄）：
+    python benchmarks/bench_document_analyzer.py                    # 跑預設情境並比對 baseline
+    python benchmarks/bench_document_analyzer.py --update-baseline  # 重新記錄 baseline
+    python benchmarks/bench_document_analyzer.py --scenario large --threshold 0.5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.document_analyzer import DocumentAnalyzer
+from benchmarks.manuscript_generator import generate_manuscript
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# 預設情境：(段落數, 每段引用密度, 參考文獻數, 多重引用比例, 格式錯誤比例)
+SCENARIOS = {
+    'small': dict(paragraphs=50, citation_density=1.0, references=30,
+                  multi_citation_ratio=0.1, malformed_ratio=0.05),
+    'medium': dict(paragraphs=300, citation_density=1.5, references=150,
+                   multi_citation_ratio=0.2, malformed_ratio=0.05),
+    'large': dict(paragraphs=1500, citation_density=2.0, references=500,
+                  multi_citation_ratio=0.25, malformed_ratio=0.05),
+}
+
+
+def run_stages(analyzer, file_path):
+    """依照 analyze_document 的順序逐一執行各階段，回傳 {階段: 秒數}"""
+    timings = {}
+
+    def timed(name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[name] = time.perf_counter() - start
+        return result
+
+    doc_text = timed('extract_text', analyzer._extract_text_from_docx, file_path)
+    main_text, references_section = timed('separate_sections', analyzer._separate_text_and_references, doc_text)
+    reference_items = timed('parse_references', analyzer._parse_reference_section, references_section)
+    reference_dict = timed('generate_formats', analyzer._generate_citation_formats, reference_items)
+    found_citations = timed('find_citations', analyzer._find_citations_in_text, main_text, reference_dict)
+    timed('check_formats', analyzer._check_citation_formats, found_citations, reference_dict)
+    timed('check_missing', analyzer._check_missing_references, found_citations, reference_dict)
+    timed('check_ambiguous', analyzer._check_ambiguous_citations, found_citations, reference_dict)
+    timed('mark_cited', analyzer._mark_cited_references, found_citations, reference_dict)
+    timings['total'] = sum(timings.values())
+    return timings
+
+
+def measure_peak_memory(file_path):
+    """以 tracemalloc 量測完整 analyze_document 的峰值記憶體（bytes）"""
+    analyzer = DocumentAnalyzer()
+    tracemalloc.start()
+    try:
+        analyzer.analyze_document(file_path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def benchmark_scenario(name, params, repeat=3, seed=42):
+    fd, path = tempfile.mkstemp(suffix='.docx')
+    os.close(fd)
+    try:
+        stats = generate_manuscript(path, seed=seed, **params)
+        analyzer = DocumentAnalyzer()
+        runs = [run_stages(analyzer, path) for _ in range(repeat)]
+        # 每個階段取中位數，降低單次抖動的影響
+        stages = {stage: statistics.median(r[stage] for r in runs) for stage in runs[0]}
+        peak = measure_peak_memory(path)
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+    return {'params': params, 'document': stats, 'stages': stages, 'peak_memory_bytes': peak}
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """回傳退化清單：[(情境, 指標, baseline 值, 目前值)]"""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base.get('params') != current['params']:
+            print(f"⚠️ 情境 {name} 的參數與 baseline 不同，略過比對")
+            continue
+        for stage, seconds in current['stages'].items():
+            base_seconds = base['stages'].get(stage)
+            if base_seconds is None:
+                continue
+            # 極短的階段容易受計時誤差影響，給 1ms 的絕對容忍度
+            if seconds > base_seconds * (1 + threshold) and seconds - base_seconds > 0.001:
+                regressions.append((name, stage, base_seconds, seconds))
+        base_peak = base.get('peak_memory_bytes')
+        if base_peak and current['peak_memory_bytes'] > base_peak * (1 + threshold):
+            regressions.append((name, 'peak_memory_bytes', base_peak, current['peak_memory_bytes']))
+    return regressions
+
+
+def print_report(results):
+    for name, result in results.items():
+        doc = result['document']
+        print("\n" + "=" * 70)
+        print(f"情境: {name}  (段落 {doc['paragraphs']}, 引用 {doc['citations']}, "
+              f"參考文獻 {doc['references']}, 檔案 {doc['bytes'] / 1024:.0f} KB)")
+        print("=" * 70)
+        for stage, seconds in result['stages'].items():
+            print(f"  {stage:<20} {seconds * 1000:>10.2f} ms")
+        print(f"  {'peak_memory':<20} {result['peak_memory_bytes'] / 1024 / 1024:>10.2f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DocumentAnalyzer 各階段效能 benchmark")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="要執行的情境（可重複指定，預設 small + medium）")
+    parser.add_argument('--repeat', type=int, default=3, help="每個情境重複次數（取中位數）")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline JSON 路徑")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="允許的退化比例，例如 0.25 表示慢 25%% 以內仍算通過")
+    parser.add_argument('--update-baseline', action='store_true', help="將本次結果寫入 baseline")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    names = args.scenario or ['small', 'medium']
+    results = {name: benchmark_scenario(name, SCENARIOS[name], args.repeat, args.seed) for name in names}
+    print_report(results)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ baseline 已更新: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠️ 找不到 baseline ({args.baseline})，請先以 --update-baseline 建立")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(results, baseline, args.threshold)
+    print("\n" + "=" * 70)
+    if regressions:
+        print(f"❌ 發現 {len(regressions)} 項效能退化（threshold {args.threshold:.0%}）:")
+        for name, metric, base, current in regressions:
+            print(f"  - [{name}] {metric}: {base:.4g} → {current:.4g}")
+        return 1
+    print(f"✅ 沒有超過 threshold {args.threshold:.0%} 的效能退化")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+DOI Bloom filter benchmark
+
+以 N 個合成 DOI 建立不同誤判率的 filter，報告檔案大小（memory-mapped，常駐記憶體
+只有實際讀到的 page）、建立時間、實測誤判率與查詢延遲，並比較打錯的 DOI 在
+fetch_metadata_from_doi 中被 filter 擋下 vs 送到 CrossRef（本機 stub）的延遲。
+
+使用方式（從專案根目錄）：
+    python benchmarks/bench_doi_bloom.py --dois 1000000 --fp-rates 0.01 0.001 0.0001
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import crossref_service, http_client
+from services.doi_bloom import DoiBloomFilter, build_bloom, doi_bloom
+from services.prefix_index import PrefixIndex
+from services.metadata_cache import metadata_cache
+from benchmarks.crossref_stub import CrossrefStub
+
+
+def _per_call_us(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def _mistyped_latency(dois, stub_delay):
+    """打錯的 DOI 經過 fetch_metadata_from_doi 的延遲（ms）"""
+    samples = []
+    for doi in dois:
+        metadata_cache.clear()
+        start = time.perf_counter()
+        try:
+            crossref_service.fetch_metadata_from_doi(doi)
+        except ValueError:
+            pass
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DOI Bloom filter 大小、誤判率與延遲 benchmark")
+    parser.add_argument('--dois', type=int, default=1000000)
+    parser.add_argument('--fp-rates', type=float, nargs='+', default=[0.01, 0.001, 0.0001])
+    parser.add_argument('--probes', type=int, default=100000)
+    parser.add_argument('--stub-delay', type=float, default=0.05,
+                        help="模擬 CrossRef 回應 404 所需時間（秒）")
+    args = parser.parse_args(argv)
+
+    known = [f"10.{5000 + i % 400}/bench.{i}" for i in range(args.dois)]
+    unknown = [f"10.{5000 + i % 400}/typo.{i}" for i in range(args.probes)]
+    hits = known[::max(1, len(known) // args.probes)][:args.probes]
+
+    tmp_dir = tempfile.mkdtemp()
+    rows = []
+    try:
+        for fp_rate in args.fp_rates:
+            path = os.path.join(tmp_dir, f"bloom-{fp_rate}.bin")
+            start = time.perf_counter()
+            build_bloom(known, path, len(known), fp_rate)
+            build_time = time.perf_counter() - start
+            bloom = DoiBloomFilter(path)
+            measured = sum(doi in bloom for doi in unknown) / len(unknown)
+            hit_us = _per_call_us(bloom.__contains__, hits)
+            miss_us = _per_call_us(bloom.__contains__, unknown)
+            rows.append((fp_rate, bloom.size_bytes, bloom.k, build_time, measured, hit_us, miss_us))
+            bloom.close()
+
+        # 打錯的 DOI：filter 擋下 vs 送到 CrossRef（stub 回 404）
+        original_url = http_client.CROSSREF_API_URL
+        original_db = metadata_cache.db_path
+        original_index = crossref_service.suggest_index
+        original_bloom = doi_bloom.path
+        metadata_cache.db_path = ''
+        crossref_service.suggest_index = PrefixIndex(path='')
+        try:
+            with CrossrefStub(delay=args.stub_delay, missing_dois=set(unknown[:50])) as stub:
+                http_client.CROSSREF_API_URL = stub.url
+                doi_bloom.path = ''
+                without = _mistyped_latency(unknown[:50], args.stub_delay)
+                doi_bloom.path = os.path.join(tmp_dir, f"bloom-{args.fp_rates[-1]}.bin")
+                stub.reset_stats()
+                with_bloom = _mistyped_latency(unknown[:50], args.stub_delay)
+                upstream = stub.request_count
+        finally:
+            doi_bloom.path = original_bloom
+            doi_bloom.get()
+            http_client.CROSSREF_API_URL = original_url
+            metadata_cache.clear()
+            metadata_cache.db_path = original_db
+            crossref_service.suggest_index = original_index
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print("=" * 86)
+    print(f"DOI Bloom filter：{args.dois:,} 個 DOI，{args.probes:,} 個未知 DOI 量測誤判率")
+    print("=" * 86)
+    print(f"  {'目標誤判率':<10}{'檔案大小':>10}{'k':>4}{'建立':>9}{'實測誤判率':>12}"
+          f"{'命中查詢':>11}{'未命中查詢':>12}")
+    for fp_rate, size, k, build_time, measured, hit_us, miss_us in rows:
+        print(f"  {fp_rate:<14g}{size / 1e6:>8.2f} MB{k:>4}{build_time:>8.1f}s{measured:>12.4%}"
+              f"{hit_us:>10.2f}µs{miss_us:>10.2f}µs")
+    print(f"\n  打錯的 DOI（fetch_metadata_from_doi median）：無 filter {without:.2f} ms → "
+          f"有 filter {with_bloom:.3f} ms（upstream 請求 {upstream} 次）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
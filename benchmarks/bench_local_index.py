@@ -0,0 +1,143 @@
+"""
+離線 CrossRef 索引 benchmark
+
+產生 N 筆合成 CrossRef work 的 JSONL.gz dump，匯入 SQLite FTS5 索引後，量測
+DOI 查詢、標題查詢、關鍵字搜尋與自動補全的 median / p99 延遲。
+
+使用方式（從專案根目錄）：
+    python benchmarks/bench_local_index.py --records 1000000
+    python benchmarks/bench_local_index.py --records 100000 --keep-dir /tmp/local-index
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.local_index import LocalIndex, import_dump
+from services import crossref_service
+
+WORDS = (
+    "exercise cognition memory executive function aerobic training attention adolescents older adults "
+    "physical activity brain plasticity hippocampus fitness intervention randomized trial meta analysis "
+    "sleep nutrition stress anxiety depression motor learning skill acquisition reaction time working "
+    "inhibition academic achievement children sedentary behavior cardiovascular resistance endurance "
+    "neuroimaging cortisol mood wellbeing balance gait falls rehabilitation stroke dementia"
+).split()
+SURNAMES = (
+    "Smith Lee Wang Chen Kojima Hillman Aly Garcia Muller Rossi Silva Kim Nguyen Tanaka Brown Lopez "
+    "Calderon Menezes Berg Johnson Williams Martin Dubois Costa Novak Kowalski Ivanova Sato Park Singh"
+).split()
+
+
+def synthetic_work(i, rng):
+    title_words = rng.sample(WORDS, rng.randint(5, 10))
+    return {
+        "DOI": f"10.{5000 + i % 400}/bench.{i}",
+        "title": [" ".join(title_words).capitalize() + f" study {i}"],
+        "author": [{"family": rng.choice(SURNAMES), "given": rng.choice("ABCDEFGHJK") + "."}
+                   for _ in range(rng.randint(1, 4))],
+        "issued": {"date-parts": [[1990 + i % 35]]},
+        "container-title": [f"Journal of {rng.choice(WORDS).capitalize()} Research"],
+        "publisher": "Synthetic Publisher",
+        "type": "journal-article",
+    }
+
+
+def write_dump(path, records, seed):
+    rng = random.Random(seed)
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=1) as f:
+        for i in range(records):
+            f.write(json.dumps(synthetic_work(i, rng)) + "\n")
+
+
+def _timed(fn, queries):
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="離線 CrossRef 索引查詢延遲 benchmark")
+    parser.add_argument('--records', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--keep-dir', help="保留 dump 與索引的目錄（預設用暫存目錄並在結束時刪除）")
+    args = parser.parse_args(argv)
+
+    work_dir = args.keep_dir or tempfile.mkdtemp()
+    os.makedirs(work_dir, exist_ok=True)
+    dump_path = os.path.join(work_dir, "dump.jsonl.gz")
+    index_path = os.path.join(work_dir, "crossref_local.sqlite3")
+    try:
+        start = time.perf_counter()
+        write_dump(dump_path, args.records, args.seed)
+        gen_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        import_dump([dump_path], index_path)
+        import_time = time.perf_counter() - start
+        size_mb = os.path.getsize(index_path) / 1e6
+
+        index = LocalIndex(index_path)
+        rng = random.Random(args.seed + 1)
+        sample_ids = [rng.randrange(args.records) for _ in range(args.queries)]
+        # 重新產生被抽到的 work，拿到它們的標題
+        regen = random.Random(args.seed)
+        wanted = set(sample_ids)
+        titles = {}
+        for i in range(max(wanted) + 1):
+            w = synthetic_work(i, regen)
+            if i in wanted:
+                titles[i] = w["title"][0]
+
+        dois = [f"10.{5000 + i % 400}/bench.{i}" for i in sample_ids]
+        title_queries = [titles[i] for i in sample_ids]
+        keyword_queries = [" ".join(rng.sample(WORDS, 3)) for _ in range(args.queries)]
+        prefix_queries = [t[:rng.randint(8, 20)] for t in title_queries]
+
+        # crossref_service 的各入口實際走的路徑
+        original = crossref_service.local_index
+        crossref_service.local_index = index
+        try:
+            rows = [
+                ("DOI 查詢", _timed(index.get_work, dois)),
+                ("標題查詢", _timed(crossref_service._local_title_match, title_queries)),
+                ("關鍵字搜尋", _timed(lambda q: index.search(q, limit=3), keyword_queries)),
+                ("自動補全", _timed(lambda q: crossref_service._local_suggestions(q, 5), prefix_queries)),
+            ]
+            hits = sum(crossref_service._local_title_match(t) is not None for t in title_queries[:100])
+        finally:
+            crossref_service.local_index = original
+    finally:
+        if not args.keep_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("=" * 72)
+    print(f"離線索引：{args.records:,} 筆（產生 dump {gen_time:.1f} s，匯入 {import_time:.1f} s，"
+          f"索引 {size_mb:.0f} MB）")
+    print("=" * 72)
+    for name, samples in rows:
+        print(f"  {name:<8} median {statistics.median(samples) * 1000:7.3f} ms   "
+              f"p99 {_percentile(samples, 0.99) * 1000:7.3f} ms")
+    print(f"  標題查詢命中率 {hits}/100")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
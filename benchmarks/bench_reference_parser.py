@@ -0,0 +1,90 @@
+"""
+參考文獻條目解析 benchmark
+
+以合成的 APA 參考文獻清單（一半附 DOI）量測 parse_reference_entry 每筆耗時、
+整段 _parse_reference_section 的耗時，並以產生器的正確答案檢查各欄位的擷取正確率。
+
+使用方式（從專案根目錄）：
+    python benchmarks/bench_reference_parser.py --entries 10000
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.document_analyzer import DocumentAnalyzer
+from services.reference_parser import parse_reference_entry
+from benchmarks.manuscript_generator import generate_references
+
+_SOURCE_RE = re.compile(r"\)\. .+?\. (.+?), (\d+)\((\d+)\), (\d+-\d+)\.")
+
+
+def build_corpus(count, seed):
+    """回傳 [(文字, 預期欄位)]；偶數筆附上 DOI"""
+    rng = random.Random(seed)
+    corpus = []
+    for i, ref in enumerate(generate_references(count, rng)):
+        text = ref["text"]
+        journal, volume, issue, pages = _SOURCE_RE.search(text).groups()
+        expected = {"surnames": ref["surnames"], "year": ref["year"], "journal": journal,
+                    "volume": volume, "issue": issue, "pages": pages, "doi": ""}
+        if i % 2 == 0:
+            expected["doi"] = f"10.5555/bench.{i}"
+            text += f" https://doi.org/{expected['doi']}"
+        corpus.append((text, expected))
+    return corpus
+
+
+def field_accuracy(corpus):
+    fields = ("surnames", "year", "journal", "volume", "issue", "pages", "doi")
+    correct = dict.fromkeys(fields, 0)
+    for text, expected in corpus:
+        entry = parse_reference_entry(text)
+        got = dict(entry, surnames=[a.split(",")[0] for a in entry["authors"]])
+        for field in fields:
+            correct[field] += got[field] == expected[field]
+    return {field: correct[field] / len(corpus) for field in fields}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="參考文獻條目解析速度與欄位正確率 benchmark")
+    parser.add_argument('--entries', type=int, default=10000)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus(args.entries, args.seed)
+    texts = [text for text, _ in corpus]
+    section = "References\n" + "\n".join(texts)
+    analyzer = DocumentAnalyzer()
+
+    entry_runs, section_runs = [], []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        for text in texts:
+            parse_reference_entry(text)
+        entry_runs.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        items = analyzer._parse_reference_section(section)
+        section_runs.append(time.perf_counter() - start)
+    assert len(items) == len(texts)
+
+    entry_us = statistics.median(entry_runs) / len(texts) * 1e6
+    section_ms = statistics.median(section_runs) * 1000
+    print(f"{len(texts)} entries, median of {args.repeats} runs")
+    print(f"  parse_reference_entry       {entry_us:8.1f} µs / entry")
+    print(f"  _parse_reference_section    {section_ms:8.1f} ms total "
+          f"({section_ms * 1000 / len(texts):.1f} µs / entry, including line merging)")
+    print("Field accuracy:")
+    for field, ratio in field_accuracy(corpus).items():
+        print(f"  {field:<10} {ratio:7.2%}")
+
+
+if __name__ == "__main__":
+    main()
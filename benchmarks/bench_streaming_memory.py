@@ -0,0 +1,80 @@
+"""
+串流分析模式的記憶體 benchmark
+
+參考文獻數量固定、內文段落數逐步增加，以 tracemalloc 比較 analyze_document（整份讀入）
+與 analyze_document_streaming（逐段讀入，問題交給 callback）的峰值記憶體與耗時，
+並確認串流模式的結果與整份分析完全相同。串流模式的峰值應只隨參考文獻清單成長。
+
+使用方式（從專案根目錄）：
+    python benchmarks/bench_streaming_memory.py --paragraphs 1000 4000 16000 --references 300
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.document_analyzer import DocumentAnalyzer
+from benchmarks.manuscript_generator import generate_manuscript
+
+
+def _measure(fn):
+    """回傳 (結果, 峰值 MB, 秒)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / 1024 / 1024, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="串流分析模式記憶體 benchmark")
+    parser.add_argument('--paragraphs', type=int, nargs='+', default=[1000, 4000, 16000])
+    parser.add_argument('--references', type=int, default=300)
+    parser.add_argument('--chunk-size', type=int, default=None, help='串流每段字元數（預設使用設定值）')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    analyzer = DocumentAnalyzer()
+    if args.chunk_size:
+        analyzer.streaming_chunk_size = args.chunk_size
+    print(f"{'paragraphs':>10} {'file MB':>8} {'batch MB':>9} {'stream MB':>10} "
+          f"{'batch s':>8} {'stream s':>9} {'identical':>10}")
+    for paragraphs in args.paragraphs:
+        fd, path = tempfile.mkstemp(suffix='.docx')
+        os.close(fd)
+        try:
+            generate_manuscript(path, paragraphs=paragraphs, citation_density=2.0, references=args.references,
+                                multi_citation_ratio=0.25, malformed_ratio=0.05, seed=args.seed)
+            file_mb = os.path.getsize(path) / 1024 / 1024
+            batch, batch_mb, batch_s = _measure(lambda: analyzer.analyze_document(path, streaming=False))
+            # 問題一找到就交給 callback（這裡只計數），不保留在記憶體中
+            counts = {}
+
+            def on_finding(kind, finding):
+                counts[kind] = counts.get(kind, 0) + 1
+
+            streamed, stream_mb, stream_s = _measure(
+                lambda: analyzer.analyze_document_streaming(path, on_finding=on_finding))
+            identical = (streamed['summary'] == batch['summary']
+                         and streamed['citation_status'] == batch['citation_status']
+                         and counts.get('format_error', 0) == len(batch['format_errors'])
+                         and counts.get('missing_reference', 0) == len(batch['missing_references'])
+                         and analyzer.analyze_document_streaming(path) == batch)
+        finally:
+            os.remove(path)
+        print(f"{paragraphs:>10} {file_mb:>8.2f} {batch_mb:>9.1f} {stream_mb:>10.1f} "
+              f"{batch_s:>8.2f} {stream_s:>9.2f} {str(identical):>10}")
+
+
+if __name__ == "__main__":
+    main()
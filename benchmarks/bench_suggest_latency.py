@@ -0,0 +1,97 @@
+"""
+suggest_doi_candidates 延遲 benchmark（並行驗證 vs 逐一驗證）
+
+本機 stub 對搜尋請求延遲 search-delay 秒，對每個 DOI 驗證請求延遲
+verify-delay 秒，並以 slow-ratio 的機率模擬特別慢的 DOI（slow-delay 秒）。
+比較兩種設定下的 median / p99：
+- serial:     1 個 worker、沒有期限（等同原本逐一驗證的行為）
+- concurrent: VERIFY_MAX_WORKERS 個 worker、VERIFY_DEADLINE 期限
+
+使用方式（從專案根目錄）：
+    python benchmarks/bench_suggest_latency.py --calls 30 --verify-delay 0.3
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import crossref_service, http_client
+from services.prefix_index import PrefixIndex
+from services.metadata_cache import metadata_cache
+from benchmarks.crossref_stub import CrossrefStub
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _run(calls, limit):
+    samples = []
+    unverified = 0
+    for i in range(calls):
+        # 每次呼叫前清空快取，量測冷查詢的延遲
+        metadata_cache.clear()
+        start = time.perf_counter()
+        results = crossref_service.suggest_doi_candidates(f"exercise {i}", limit=limit)
+        samples.append(time.perf_counter() - start)
+        unverified += sum(1 for r in results if r.get('verified') is False)
+    return samples, unverified
+
+
+def _configure(workers, deadline):
+    crossref_service.VERIFY_MAX_WORKERS = workers
+    crossref_service.VERIFY_DEADLINE = deadline
+    if crossref_service._verify_pool is not None:
+        crossref_service._verify_pool.shutdown(wait=True)
+    crossref_service._verify_pool = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="suggest_doi_candidates 並行驗證延遲 benchmark")
+    parser.add_argument('--calls', type=int, default=30)
+    parser.add_argument('--limit', type=int, default=5)
+    parser.add_argument('--search-delay', type=float, default=0.05)
+    parser.add_argument('--verify-delay', type=float, default=0.2)
+    parser.add_argument('--slow-delay', type=float, default=3.0)
+    parser.add_argument('--slow-ratio', type=float, default=0.02)
+    parser.add_argument('--workers', type=int, default=crossref_service.VERIFY_MAX_WORKERS)
+    parser.add_argument('--deadline', type=float, default=crossref_service.VERIFY_DEADLINE)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+
+    def delay(path):
+        if path.startswith('/works/'):
+            return args.slow_delay if rng.random() < args.slow_ratio else args.verify_delay
+        return args.search_delay
+
+    metadata_cache.db_path = ''  # 只用記憶體層，避免寫入專案的 cache 目錄
+    crossref_service.suggest_index = PrefixIndex(path='')  # 每次量測都走 CrossRef
+    rows = []
+    with CrossrefStub(delay=delay) as stub:
+        http_client.CROSSREF_API_URL = stub.url
+        for name, workers, deadline in (("serial", 1, None),
+                                        ("concurrent", args.workers, args.deadline)):
+            _configure(workers, deadline)
+            rng.seed(args.seed)
+            samples, unverified = _run(args.calls, args.limit)
+            rows.append((name, samples, unverified))
+
+    print("=" * 78)
+    print(f"suggest_doi_candidates 延遲（{args.calls} 次，limit={args.limit}，"
+          f"驗證延遲 {args.verify_delay}s，慢 DOI {args.slow_ratio:.0%} × {args.slow_delay}s）")
+    print("=" * 78)
+    for name, samples, unverified in rows:
+        print(f"  {name:<11} median {statistics.median(samples) * 1000:8.1f} ms   "
+              f"p99 {_percentile(samples, 0.99) * 1000:8.1f} ms   unverified 候選 {unverified}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+參考文獻姓氏自動機 benchmark
+
+以固定長度的合成內文、不同大小的參考文獻姓氏清單，比較 SurnameAutomaton（Aho–Corasick）
+與把所有姓氏組成一個 regex alternation 的掃描耗時。自動機的掃描成本應與姓氏數量無關。
+
+使用方式（從專案根目錄）：
+    python benchmarks/bench_surname_automaton.py --sizes 100 1000 5000 10000
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.manuscript_generator import FILLER_WORDS
+from services.surname_automaton import SurnameAutomaton
+
+SYLLABLES = ["an", "ber", "cal", "de", "fer", "gon", "ha", "kim", "lo", "mar", "nez", "ov",
+             "pe", "ri", "sa", "ta", "ul", "vo", "wen", "yo", "zu", "chi", "sch", "mül"]
+PARTICLES = ["van der", "de", "von", "da"]
+
+
+def make_surnames(count, rng):
+    surnames = set()
+    while len(surnames) < count:
+        surname = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        if rng.random() < 0.1:
+            surname = f"{rng.choice(PARTICLES)} {surname}"
+        surnames.add(surname)
+    return sorted(surnames)
+
+
+def make_text(surnames, words, rng):
+    """約 words 個詞的內文，每 40 個詞插入一個「姓氏 (年份)」敘述型引用"""
+    parts = []
+    for i in range(words):
+        if i % 40 == 0:
+            parts.append(f"{rng.choice(surnames)} ({rng.randint(1990, 2024)})")
+        else:
+            parts.append(rng.choice(FILLER_WORDS))
+    return " ".join(parts)
+
+
+def regex_scan(pattern, text):
+    return [(m.start(), m.end()) for m in pattern.finditer(text)]
+
+
+def _median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="姓氏自動機 vs regex alternation benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000, 10000])
+    parser.add_argument('--words', type=int, default=50000, help='內文詞數')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    print(f"{'references':>10} {'build ms':>9} {'automaton ms':>13} {'regex ms':>9} {'same results':>13}")
+    for size in args.sizes:
+        surnames = make_surnames(size, rng)
+        text = make_text(surnames, args.words, rng)
+
+        start = time.perf_counter()
+        automaton = SurnameAutomaton()
+        for surname in surnames:
+            automaton.add(surname, surname)
+        automaton.find_all("")
+        build_ms = (time.perf_counter() - start) * 1000
+
+        # 對照組：所有姓氏組成一個不分大小寫的 alternation（較長的優先）
+        pattern = re.compile(r"\b(?:%s)\b" % "|".join(
+            re.escape(s) for s in sorted(surnames, key=len, reverse=True)), re.IGNORECASE)
+        # 只比較最長的比對（regex 不回報重疊的較短姓氏）
+        longest = {}
+        for start, end, _ in automaton.find_all(text):
+            if end - start > longest.get(start, 0):
+                longest[start] = end - start
+        found = [(start, start + size) for start, size in sorted(longest.items())]
+        found = [span for i, span in enumerate(found) if i == 0 or span[0] >= found[i - 1][1]]
+        same = found == regex_scan(pattern, text)
+
+        automaton_ms = _median_ms(lambda: automaton.find_all(text), args.repeat)
+        regex_ms = _median_ms(lambda: regex_scan(pattern, text), args.repeat)
+        print(f"{size:>10} {build_ms:>9.1f} {automaton_ms:>13.1f} {regex_ms:>9.1f} {str(same):>13}")
+
+
+if __name__ == "__main__":
+    main()
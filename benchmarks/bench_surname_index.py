@@ -0,0 +1,80 @@
+"""
+參考文獻姓氏模糊索引 benchmark
+
+以合成姓氏建立不同大小的參考文獻清單，比較 SurnameIndex（symmetric delete）與逐一計算
+編輯距離的線性掃描，對拼錯一個字母的姓氏查詢「您是否指」候選的每次耗時。
+
+使用方式（從專案根目錄）：
+    python benchmarks/bench_surname_index.py --sizes 100 1000 5000 10000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.surname_index import SurnameIndex, allowed_distance, edit_distance, surname_key
+
+SYLLABLES = ["an", "ber", "cal", "de", "fer", "gon", "ha", "kim", "lo", "mar", "nez", "ov",
+             "pe", "ri", "sa", "ta", "ul", "vo", "wen", "yo", "zu", "chi", "sch", "mül"]
+
+
+def make_surnames(count, rng):
+    surnames = set()
+    while len(surnames) < count:
+        surnames.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize())
+    return sorted(surnames)
+
+
+def misspell(surname, rng):
+    i = rng.randrange(1, len(surname))
+    return surname[:i] + rng.choice("aeiouyrstn") + surname[i + 1:]
+
+
+def linear_search(surnames, query):
+    key = surname_key(query)
+    limit = allowed_distance(key)
+    return sorted((d, s) for s in surnames
+                  if (d := edit_distance(key, s, limit=limit)) <= limit)
+
+
+def _median_us(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="姓氏模糊索引 vs 線性掃描 benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000, 10000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    print(f"{'references':>10} {'build ms':>9} {'index µs':>11} {'linear µs':>10} {'same results':>13}")
+    for size in args.sizes:
+        surnames = make_surnames(size, rng)
+        start = time.perf_counter()
+        index = SurnameIndex()
+        for i, surname in enumerate(surnames):
+            index.add(surname, i)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        folded = [surname_key(s) for s in surnames]
+        queries = [misspell(rng.choice(surnames), rng) for _ in range(args.queries)]
+        same = all([(d, w) for d, w, _ in index.search(q)] == linear_search(folded, q)
+                   for q in queries)
+        tree_us = _median_us(index.search, queries)
+        linear_us = _median_us(lambda q: linear_search(folded, q), queries)
+        print(f"{size:>10} {build_ms:>9.1f} {tree_us:>11.1f} {linear_us:>10.1f} {str(same):>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+本機 CrossRef stub server（benchmark 用）
+
+模擬 api.crossref.org 的 /works/{doi} 與 /works?query... 端點，可設定回應延遲，
+並統計收到的請求數與新建立的連線數，用來量測連線池、快取、並行化等最佳化效果。
+
+使用方式：
+    with CrossrefStub(delay=0.05) as stub:
+        http_client.CROSSREF_API_URL = stub.url
+        ...
+        print(stub.request_count, stub.connection_count)
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+def stub_work(doi, index=0):
+    """依 DOI 產生固定的 CrossRef work 資料"""
+    return {
+        "DOI": doi,
+        "title": [f"Stub work about exercise and cognition {doi}"],
+        "author": [
+            {"family": "Smith", "given": "J."},
+            {"family": "Lee", "given": "K."},
+        ],
+        "issued": {"date-parts": [[2000 + index % 25]]},
+        "container-title": ["Stub Journal of Benchmarks"],
+        "publisher": "Stub Publisher",
+        "type": "journal-article",
+    }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 支援 keep-alive
+    # 標頭與內容一次送出，避免 keep-alive 連線遇到 Nagle + delayed ACK 的 40ms 延遲
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connection_count += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in self.server.extra_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        with self.server.stats_lock:
+            self.server.request_count += 1
+            self.server.paths.append(self.path)
+        delay = self.server.delay
+        if callable(delay):
+            delay = delay(self.path)
+        if delay:
+            time.sleep(delay)
+
+        # 可用 status(path) 模擬 429 / 5xx 等錯誤回應
+        status = self.server.status(self.path) if self.server.status else None
+        if status and status != 200:
+            self._send_json(status, {"status": "error", "message": f"stub status {status}"})
+            return
+
+        parsed = urlparse(self.path)
+        path = unquote(parsed.path)
+        if path.startswith("/works/"):
+            doi = path[len("/works/"):]
+            if doi in self.server.missing_dois or doi.startswith("10.0000/"):
+                self._send_json(404, {"status": "error", "message": "Resource not found."})
+                return
+            self._send_json(200, {"status": "ok", "message": stub_work(doi)})
+            return
+        if path == "/works":
+            query = parse_qs(parsed.query)
+            rows = int(query.get("rows", ["5"])[0])
+            items = None
+            if self.server.search:
+                items = self.server.search({k: v[0] for k, v in query.items()})
+            if items is None:
+                items = [stub_work(f"10.5555/stub.{i}", i) for i in range(rows)]
+            self._send_json(200, {"status": "ok", "message": {"items": items}})
+            return
+        self._send_json(404, {"status": "error"})
+
+
+class CrossrefStub:
+    """在背景執行緒啟動的 stub server"""
+
+    def __init__(self, delay=0.0, missing_dois=None, headers=None, status=None, search=None):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self.server.daemon_threads = True
+        self.server.delay = delay
+        self.server.missing_dois = set(missing_dois or [])
+        self.server.extra_headers = dict(headers or {})
+        self.server.status = status
+        # search(params) 可回傳自訂的搜尋結果 items；回傳 None 則使用預設結果
+        self.server.search = search
+        self.server.stats_lock = threading.Lock()
+        self.server.request_count = 0
+        self.server.connection_count = 0
+        self.server.paths = []
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self):
+        return self.server.request_count
+
+    @property
+    def connection_count(self):
+        return self.server.connection_count
+
+    @property
+    def paths(self):
+        return list(self.server.paths)
+
+    def reset_stats(self):
+        with self.server.stats_lock:
+            self.server.request_count = 0
+            self.server.connection_count = 0
+            self.server.paths = []
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,226 @@
+"""
+合成論文產生器：產生可控制規模與引用分佈的 .docx 測試文件
+
+可調整的參數：
+- paragraphs: 內文段落數
+- citation_density: 每個段落平均的引用數
+- references: 參考文獻數量
+- multi_citation_ratio: 以分號合併的多重引用比例
+- malformed_ratio: 格式錯誤引用（缺左括號、et al. 前多逗號等）的比例
+- figures: 嵌入的雜訊圖片數量（用來模擬含大量圖表、檔案很大的論文）
+
+使用方式：
+    python benchmarks/manuscript_generator.py out.docx --paragraphs 500 --references 200
+"""
+import argparse
+import io
+import os
+import random
+import struct
+import sys
+import zlib
+
+from docx import Document
+from docx.shared import Inches
+
+SURNAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Miller", "Davis", "Wilson",
+    "Anderson", "Taylor", "Thomas", "Moore", "Martin", "Jackson", "Thompson", "White",
+    "Harris", "Clark", "Lewis", "Robinson", "Walker", "Young", "Allen", "King",
+    "Wright", "Scott", "Hill", "Green", "Adams", "Baker", "Nelson", "Carter",
+    "Mitchell", "Roberts", "Turner", "Phillips", "Campbell", "Parker", "Evans", "Edwards",
+    "Collins", "Stewart", "Morris", "Rogers", "Reed", "Cook", "Morgan", "Bell",
+    "Murphy", "Bailey", "Cooper", "Richardson", "Cox", "Howard", "Ward", "Peterson",
+    "Gray", "James", "Watson", "Brooks", "Kelly", "Sanders", "Price", "Bennett",
+    "Wood", "Barnes", "Ross", "Henderson", "Coleman", "Jenkins", "Perry", "Powell",
+    "Long", "Patterson", "Hughes", "Flores", "Washington", "Butler", "Simmons", "Foster",
+    "Wang", "Li", "Zhang", "Liu", "Chen", "Yang", "Huang", "Zhao", "Wu", "Zhou",
+    "Kojima", "Tanaka", "Suzuki", "Hillman", "Aly", "Cooke", "Delorme", "Makeig",
+]
+
+FILLER_WORDS = [
+    "exercise", "cognition", "attention", "memory", "performance", "participants",
+    "results", "indicate", "significant", "effects", "neural", "response", "task",
+    "study", "analysis", "suggests", "increased", "decreased", "across", "conditions",
+    "measured", "previous", "research", "found", "that", "the", "of", "and", "in",
+    "with", "for", "during", "after", "before", "between", "moderate", "acute",
+]
+
+SECTIONS = ["Introduction", "Methods", "Results", "Discussion"]
+
+JOURNALS = [
+    "Journal of Cognitive Neuroscience", "Psychophysiology", "NeuroImage",
+    "Mental Health and Physical Activity", "Brain and Cognition",
+]
+
+
+def _initials(rng):
+    letters = "ABCDEFGHJKLMNPRSTW"
+    if rng.random() < 0.4:
+        return f"{rng.choice(letters)}. {rng.choice(letters)}."
+    return f"{rng.choice(letters)}."
+
+
+def _sentence(rng, min_words=8, max_words=20):
+    words = [rng.choice(FILLER_WORDS) for _ in range(rng.randint(min_words, max_words))]
+    words[0] = words[0].capitalize()
+    return " ".join(words)
+
+
+def _noise_png(rng, width=512, height=512):
+    """產生不可壓縮的隨機雜訊 PNG（只用標準函式庫）"""
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    rows = b''.join(b'\x00' + rng.randbytes(width * 3) for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows, 0))
+            + chunk(b'IEND', b''))
+
+
+def generate_references(count, rng):
+    """產生參考文獻清單，每筆包含作者（姓, 名縮寫）、年份與完整 APA 文字"""
+    references = []
+    used_keys = set()
+    while len(references) < count:
+        num_authors = rng.choice([1, 1, 2, 2, 3, 4])
+        surnames = rng.sample(SURNAMES, num_authors)
+        year = str(rng.randint(1990, 2024))
+        # 避免第一作者 + 年份重複，讓引用與參考文獻一對一
+        key = (surnames[0], year)
+        if key in used_keys and len(used_keys) < len(SURNAMES) * 35:
+            continue
+        used_keys.add(key)
+
+        authors = [f"{s}, {_initials(rng)}" for s in surnames]
+        if len(authors) == 1:
+            author_text = authors[0]
+        else:
+            author_text = ", ".join(authors[:-1]) + ", & " + authors[-1]
+        title = _sentence(rng, 5, 12)
+        journal = rng.choice(JOURNALS)
+        volume = rng.randint(1, 90)
+        issue = rng.randint(1, 12)
+        first_page = rng.randint(1, 900)
+        text = (f"{author_text} ({year}). {title}. {journal}, {volume}({issue}), "
+                f"{first_page}-{first_page + rng.randint(5, 30)}.")
+        references.append({"surnames": surnames, "year": year, "text": text})
+    return references
+
+
+def _citation_for(ref, rng, narrative=False):
+    surnames = ref["surnames"]
+    year = ref["year"]
+    if len(surnames) == 1:
+        authors = surnames[0]
+    elif len(surnames) == 2:
+        joiner = " and " if narrative else " & "
+        authors = f"{surnames[0]}{joiner}{surnames[1]}"
+    else:
+        authors = f"{surnames[0]} et al."
+    if narrative:
+        return f"{authors} ({year})"
+    return f"({authors}, {year})"
+
+
+def _malformed_citation_for(ref, rng):
+    """產生常見的格式錯誤引用"""
+    surnames = ref["surnames"]
+    year = ref["year"]
+    kind = rng.choice(["missing_paren", "comma_et_al", "and_in_paren", "no_space"])
+    if kind == "missing_paren":
+        if len(surnames) >= 3:
+            return f"{surnames[0]} et al., {year})"
+        return f"{surnames[0]}, {year})"
+    if kind == "comma_et_al":
+        return f"({surnames[0]}, et al., {year})"
+    if kind == "and_in_paren" and len(surnames) >= 2:
+        return f"({surnames[0]} and {surnames[1]}, {year})"
+    return f"({surnames[0]} et al.,{year})"
+
+
+def generate_manuscript(path, paragraphs=200, citation_density=1.5, references=100,
+                        multi_citation_ratio=0.2, malformed_ratio=0.05, figures=0, seed=42):
+    """產生合成論文並存成 .docx，回傳產生時的統計資訊"""
+    rng = random.Random(seed)
+    refs = generate_references(references, rng)
+    doc = Document()
+    doc.add_heading("Synthetic Manuscript", 0)
+
+    stats = {"paragraphs": paragraphs, "references": len(refs), "citations": 0,
+             "multi_citations": 0, "malformed_citations": 0}
+    section_every = max(1, paragraphs // len(SECTIONS))
+    figure_every = max(1, paragraphs // figures) if figures else 0
+
+    for p in range(paragraphs):
+        if p % section_every == 0 and p // section_every < len(SECTIONS):
+            doc.add_paragraph(SECTIONS[p // section_every])
+
+        # 以 Poisson-like 的方式決定段落引用數（平均 citation_density）
+        n_citations = int(citation_density)
+        if rng.random() < citation_density - n_citations:
+            n_citations += 1
+
+        sentences = []
+        for _ in range(max(1, n_citations)):
+            sentence = _sentence(rng)
+            if n_citations and refs:
+                roll = rng.random()
+                if roll < malformed_ratio:
+                    sentence += " " + _malformed_citation_for(rng.choice(refs), rng)
+                    stats["malformed_citations"] += 1
+                elif roll < malformed_ratio + multi_citation_ratio:
+                    group = rng.sample(refs, min(len(refs), rng.randint(2, 3)))
+                    inner = "; ".join(_citation_for(r, rng)[1:-1] for r in group)
+                    sentence += f" ({inner})"
+                    stats["multi_citations"] += 1
+                elif rng.random() < 0.3:
+                    sentence = _citation_for(rng.choice(refs), rng, narrative=True) + " " + sentence[0].lower() + sentence[1:]
+                else:
+                    sentence += " " + _citation_for(rng.choice(refs), rng)
+                stats["citations"] += 1
+            sentences.append(sentence + ".")
+        doc.add_paragraph(" ".join(sentences))
+
+        if figure_every and p % figure_every == 0:
+            doc.add_picture(io.BytesIO(_noise_png(rng)), width=Inches(4))
+
+    doc.add_paragraph("References")
+    for ref in sorted(refs, key=lambda r: r["text"]):
+        doc.add_paragraph(ref["text"])
+
+    doc.save(path)
+    stats["bytes"] = os.path.getsize(path)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="產生合成 .docx 論文供 benchmark 使用")
+    parser.add_argument("output", help="輸出 .docx 路徑")
+    parser.add_argument("--paragraphs", type=int, default=200)
+    parser.add_argument("--citation-density", type=float, default=1.5)
+    parser.add_argument("--references", type=int, default=100)
+    parser.add_argument("--multi-citation-ratio", type=float, default=0.2)
+    parser.add_argument("--malformed-ratio", type=float, default=0.05)
+    parser.add_argument("--figures", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    stats = generate_manuscript(
+        args.output,
+        paragraphs=args.paragraphs,
+        citation_density=args.citation_density,
+        references=args.references,
+        multi_citation_ratio=args.multi_citation_ratio,
+        malformed_ratio=args.malformed_ratio,
+        figures=args.figures,
+        seed=args.seed,
+    )
+    print(f"已產生 {args.output}: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+大型文件分析的記憶體剖析工具
+
+以 tracemalloc 逐階段執行 DocumentAnalyzer，回報每個階段的：
+- peak: 該階段執行期間相對於開始時的峰值增量
+- retained: 該階段結束後仍被保留的記憶體增量
+- top allocation sites: 該階段新增記憶體最多的程式位置
+
+階段對應 analyze_document 的資料流：
+    extraction → joined_text → reference_list → citation_list → result_dict
+
+使用方式（從專案根目錄）：
+    python benchmarks/memory_profile.py thesis.docx other.docx
+    python benchmarks/memory_profile.py --synthetic --paragraphs 3000 --figures 60
+    python benchmarks/memory_profile.py thesis.docx --json report.json --top 10
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.document_analyzer import DocumentAnalyzer
+from benchmarks.manuscript_generator import generate_manuscript
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 只統計專案程式與其相依套件的配置，排除 tracemalloc 自身
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+]
+
+
+class StageProfiler:
+    """在 tracemalloc 啟動的狀態下量測單一階段的峰值、保留量與配置熱點"""
+
+    def __init__(self, top=5):
+        self.top = top
+        self.stages = []
+
+    def run(self, name, fn, *args):
+        gc.collect()
+        before_snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        result = fn(*args)
+
+        _, peak = tracemalloc.get_traced_memory()
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+        after_snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+        top_sites = []
+        for stat in after_snapshot.compare_to(before_snapshot, 'lineno')[:self.top]:
+            if stat.size_diff <= 0:
+                continue
+            frame = stat.traceback[0]
+            top_sites.append({
+                'site': f"{frame.filename}:{frame.lineno}",
+                'size_diff_bytes': stat.size_diff,
+                'count_diff': stat.count_diff,
+            })
+
+        self.stages.append({
+            'stage': name,
+            'peak_bytes': peak - before,
+            'retained_bytes': after - before,
+            'top_sites': top_sites,
+        })
+        return result
+
+
+def profile_document(file_path, top=5):
+    """依 analyze_document 的資料流逐階段剖析單一文件"""
+    analyzer = DocumentAnalyzer()
+    profiler = StageProfiler(top=top)
+
+    tracemalloc.start()
+    try:
+        paragraphs = profiler.run('extraction', analyzer._extract_paragraphs_from_docx, file_path)
+
+        def join_and_split(paras):
+            doc_text = '\n'.join(paras)
+            return analyzer._separate_text_and_references(doc_text)
+
+        main_text, references_section = profiler.run('joined_text', join_and_split, paragraphs)
+        # analyze_document 合併文字後不再持有段落清單
+        del paragraphs
+
+        def build_references(section):
+            items = analyzer._parse_reference_section(section)
+            return items, analyzer._generate_citation_formats(items)
+
+        reference_items, reference_dict = profiler.run('reference_list', build_references, references_section)
+        found_citations = profiler.run('citation_list', analyzer._find_citations_in_text, main_text, reference_dict)
+
+        def build_result(citations, ref_dict, ref_items):
+            format_errors = analyzer._check_citation_formats(citations, ref_dict)
+            missing_references = analyzer._check_missing_references(citations, ref_dict)
+            ambiguous_citations = analyzer._check_ambiguous_citations(citations, ref_dict)
+            citation_status = analyzer._mark_cited_references(citations, ref_dict)
+            return analyzer._build_result(format_errors, missing_references, citation_status,
+                                          ref_items, len(citations),
+                                          ambiguous_citations=ambiguous_citations)
+
+        result = profiler.run('result_dict', build_result, found_citations, reference_dict, reference_items)
+        _, overall_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    report = {
+        'document': file_path,
+        'file_bytes': os.path.getsize(file_path),
+        'text_chars': len(main_text) + len(references_section),
+        'references': len(reference_items),
+        'citations': len(found_citations),
+        'findings': (len(result['format_errors']) + len(result['missing_references'])
+                     + len(result['ambiguous_citations'])),
+        'overall_peak_bytes': overall_peak,
+        'stages': profiler.stages,
+    }
+    if resource is not None:
+        # ru_maxrss 在 Linux 為 KB、在 macOS 為 bytes
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        report['max_rss_bytes'] = maxrss if sys.platform == 'darwin' else maxrss * 1024
+    return report
+
+
+def _mb(n):
+    return n / 1024 / 1024
+
+
+def print_report(report):
+    print("\n" + "=" * 78)
+    print(f"文件: {report['document']}")
+    print(f"檔案 {_mb(report['file_bytes']):.2f} MB, 文字 {report['text_chars']} 字元, "
+          f"參考文獻 {report['references']}, 引用 {report['citations']}")
+    print("=" * 78)
+    print(f"  {'stage':<16}{'peak (MB)':>12}{'retained (MB)':>16}")
+    for stage in report['stages']:
+        print(f"  {stage['stage']:<16}{_mb(stage['peak_bytes']):>12.2f}{_mb(stage['retained_bytes']):>16.2f}")
+    print(f"  traced peak (all stages): {_mb(report['overall_peak_bytes']):.2f} MB")
+    if 'max_rss_bytes' in report:
+        print(f"  process max RSS: {_mb(report['max_rss_bytes']):.2f} MB")
+    for stage in report['stages']:
+        if not stage['top_sites']:
+            continue
+        print(f"\n  [{stage['stage']}] top allocation sites:")
+        for site in stage['top_sites']:
+            print(f"    {_mb(site['size_diff_bytes']):>8.2f} MB  {site['count_diff']:>8} blocks  {site['site']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="以 tracemalloc 逐階段剖析 DocumentAnalyzer 的記憶體用量")
+    parser.add_argument('documents', nargs='*', help=".docx 文件路徑")
+    parser.add_argument('--synthetic', action='store_true', help="額外產生一份合成論文進行剖析")
+    parser.add_argument('--paragraphs', type=int, default=2000, help="合成論文段落數")
+    parser.add_argument('--references', type=int, default=400, help="合成論文參考文獻數")
+    parser.add_argument('--figures', type=int, default=20, help="合成論文嵌入圖片數")
+    parser.add_argument('--top', type=int, default=5, help="每個階段列出的配置熱點數")
+    parser.add_argument('--json', help="將報告另存為 JSON")
+    args = parser.parse_args(argv)
+
+    documents = list(args.documents)
+    synthetic_path = None
+    if args.synthetic or not documents:
+        fd, synthetic_path = tempfile.mkstemp(suffix='.docx')
+        os.close(fd)
+        generate_manuscript(synthetic_path, paragraphs=args.paragraphs,
+                            references=args.references, figures=args.figures)
+        documents.append(synthetic_path)
+
+    reports = []
+    try:
+        for path in documents:
+            report = profile_document(path, top=args.top)
+            print_report(report)
+            reports.append(report)
+    finally:
+        if synthetic_path and os.path.exists(synthetic_path):
+            os.unlink(synthetic_path)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ 報告已寫入 {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
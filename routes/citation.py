@@ -1,16 +1,41 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from services.crossref_service import (
     fetch_metadata_from_doi,
     suggest_doi_candidates,
     fetch_metadata_from_title,
     fetch_metadata_from_keywords,
+    pending_stale_refreshes,
 )
+from services.circuit_breaker import crossref_breaker
+from services.deadline import Deadline
+from services.request_sequence import suggest_sequencer
+from services.prefetcher import reference_prefetcher
+from services.rate_limiter import crossref_limiter
 from services.apa_formatter import format_apa_reference, generate_citation_key
-from services.reference_parser import parse_reference
+from services.reference_parser import extract_doi, parse_reference
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
 import re
+import threading
 
 bp = Blueprint('citation', __name__)
 
+# 每個端點整體可花在 CrossRef 上的時間預算（秒）
+GENERATE_CITATION_BUDGET = float(os.environ.get("GENERATE_CITATION_BUDGET", "8"))
+SUGGEST_DOI_BUDGET = float(os.environ.get("SUGGEST_DOI_BUDGET", "4"))
+
+# 批次端點：單次最多幾筆輸入、所有批次請求共用幾個查詢 CrossRef 的 worker
+BATCH_MAX_INPUTS = int(os.environ.get("BATCH_MAX_INPUTS", "200"))
+BATCH_MAX_WORKERS = int(os.environ.get("BATCH_MAX_WORKERS", "4"))
+# 每個批次請求同時排入共用 pool 的輸入數：大批次不會排在所有其他請求前面
+BATCH_WINDOW = int(os.environ.get("BATCH_WINDOW", "4"))
+# 不需要連線的模式，直接在串流時處理
+_OFFLINE_MODES = ("reference", "unknown")
+
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
 
 def detect_input_mode(text: str):
     """Detect user input mode: doi, reference, title, keyword, or unknown.
@@ -150,24 +175,42 @@ def _compare_meta(a: dict, b: dict) -> bool:
 def generate_citation():
     data = request.get_json()
     user_input = data.get('input', '').strip()
+    payload, status = resolve_citation(user_input)
+    return jsonify(payload), status
+
+
+def classify_input(user_input):
+    """回傳 (mode, doi)；輸入中任何位置出現 DOI 都優先以 DOI 模式處理"""
+    mode = detect_input_mode(user_input)
+
+    # If mixed input contains DOI anywhere (e.g. a reference ending in
+    # https://doi.org/...), prefer the exact DOI lookup over parsing/searching
+    doi = extract_doi(user_input)
+    if doi:
+        return "doi", doi
+    return mode, None
+
+
+def resolve_citation(user_input, budget=None):
+    """解析單一輸入並產生 APA reference 與 citation，回傳 (回應內容, HTTP 狀態碼)
+
+    /api/generate_citation 與批次端點共用；所有 CrossRef 呼叫共用 budget 秒的期限，
+    用完時回傳目前最好的結果並標記 degraded。
+    """
+    deadline = Deadline(GENERATE_CITATION_BUDGET if budget is None else budget)
+    degraded = False
 
     try:
-        mode = detect_input_mode(user_input)
-
-        # If mixed input contains DOI anywhere, prefer DOI
-        # extract DOI-like substring if present
-        doi_match = re.search(r"(10\.\d{4,9}/\S+)", user_input, re.I)
-        if doi_match:
-            mode = "doi"
-            doi_val = doi_match.group(1).rstrip('.,;')
-        else:
-            doi_val = None
+        mode, doi_val = classify_input(user_input)
 
         if mode == "doi":
             # normalize DOI from urls like https://doi.org/...
             doi = doi_val or re.sub(r"^https?://(dx\.)?doi\.org/", "", user_input, flags=re.I).strip()
-            meta = fetch_metadata_from_doi(doi)
+            meta = fetch_metadata_from_doi(doi, deadline=deadline)
             suggestion = "偵測為 DOI 模式，正在查詢 CrossRef..."
+            if meta.get('stale'):
+                degraded = deadline.expired()
+                suggestion += " (注意：CrossRef 暫時無法連線，以下為先前快取的資料。)"
 
         elif mode == "reference":
             meta = parse_reference(user_input)
@@ -176,16 +219,16 @@ def generate_citation():
         elif mode == "title":
             # strip surrounding quotes
             title = user_input.strip('"').strip("'")
-            meta = fetch_metadata_from_title(title)
+            meta = fetch_metadata_from_title(title, deadline=deadline)
             # Verify the found metadata actually matches the provided title.
             # If not, inform user no data found (user requested exact title search).
             if not _compare_meta({"title": title}, meta):
-                return jsonify({"mode": "title", "status": "error", "message": "使用標題搜尋但找不到與該標題相符的期刊文章。"}), 404
+                return {"mode": "title", "status": "error", "message": "使用標題搜尋但找不到與該標題相符的期刊文章。"}, 404
 
             suggestion = "偵測為 Title 模式，系統將根據完整標題搜尋最相似論文"
 
         elif mode == "keyword":
-            metas = fetch_metadata_from_keywords(user_input, limit=3)
+            metas = fetch_metadata_from_keywords(user_input, limit=3, deadline=deadline)
             suggestion = "偵測為 關鍵字 模式，以下為最相關的前 3 筆結果"
 
             # Prefer a candidate that has both authors and a year. Fallback to
@@ -203,7 +246,7 @@ def generate_citation():
             # candidate metadata. If mismatch, omit DOI from the response.
             if meta and meta.get('doi'):
                 try:
-                    doi_meta = fetch_metadata_from_doi(meta.get('doi'))
+                    doi_meta = fetch_metadata_from_doi(meta.get('doi'), deadline=deadline)
                     if not _compare_meta(meta, doi_meta):
                         # mismatch -> remove DOI to avoid giving incorrect DOI
                         meta = dict(meta)
@@ -213,12 +256,16 @@ def generate_citation():
                     # If DOI lookup fails, omit DOI
                     meta = dict(meta)
                     meta['doi'] = ''
-                    suggestion += " (注意：無法取得 DOI 的完整 metadata，已省略 DOI。)"
+                    if deadline.expired():
+                        degraded = True
+                        suggestion += " (注意：查詢時間已達上限，未能驗證 DOI，已省略 DOI。)"
+                    else:
+                        suggestion += " (注意：無法取得 DOI 的完整 metadata，已省略 DOI。)"
 
             apa_ref = format_apa_reference(meta) if meta else ""
             citation = generate_citation_key(meta) if meta else {"parenthetical": "", "narrative": ""}
 
-            return jsonify({
+            return {
                 "mode": mode,
                 "status": "success",
                 "suggestion": suggestion,
@@ -226,25 +273,30 @@ def generate_citation():
                 "citations": citation,
                 "meta": meta,
                 "results": metas,
-            })
+                "degraded": degraded,
+            }, 200
 
         else:
-            return jsonify({"mode": "unknown", "status": "error", "message": "無法判斷輸入格式，請輸入 DOI、APA Reference、標題或關鍵字。"}), 400
+            return {"mode": "unknown", "status": "error", "message": "無法判斷輸入格式，請輸入 DOI、APA Reference、標題或關鍵字。"}, 400
 
         apa_ref = format_apa_reference(meta)
         citation = generate_citation_key(meta)
 
-        return jsonify({
+        return {
             "mode": mode,
             "status": "success",
             "suggestion": suggestion,
             "reference": apa_ref,
             "citations": citation,
-            "meta": meta
-        })
+            "meta": meta,
+            "degraded": degraded,
+        }, 200
 
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+        if deadline.expired():
+            return {"status": "error", "degraded": True,
+                    "message": "CrossRef 查詢超過時間限制，請稍後再試。"}, 504
+        return {"status": "error", "message": str(e)}, 500
 
 
 # ============ 2️⃣ CrossRef DOI Suggestion 功能 ============
@@ -254,5 +306,100 @@ def suggest_doi():
     if not prefix:
         return jsonify([])
 
-    results = suggest_doi_candidates(prefix)
-    return jsonify(results)
\ No newline at end of file
+    # 前端每次輸入送出 client（每個頁面一個 id）與遞增的 seq；
+    # 同一個 client 送出較新的 seq 後，舊請求不再送出新的 CrossRef 請求
+    superseded = None
+    client_id = request.args.get('client', '').strip()
+    seq = request.args.get('seq', type=int)
+    if client_id and seq is not None:
+        superseded = suggest_sequencer.begin(client_id, seq)
+
+    deadline = Deadline(SUGGEST_DOI_BUDGET, cancelled=superseded)
+    try:
+        if deadline.cancelled():
+            raise ConnectionError("已有較新的請求。")
+        results = suggest_doi_candidates(prefix, deadline=deadline)
+    except ConnectionError as e:
+        if deadline.cancelled():
+            suggest_sequencer.record_superseded()
+            return jsonify({"status": "superseded", "message": "已有較新的請求，放棄這次查詢。"}), 409
+        return jsonify({"status": "error", "message": str(e)}), 503
+    return jsonify(results)
+
+
+# ============ 3️⃣ CrossRef 連線狀態（監控用） ============
+@bp.route('/api/crossref/status', methods=['GET'])
+def crossref_status():
+    return jsonify({
+        "circuit_breaker": crossref_breaker.snapshot(),
+        "rate_limiter": crossref_limiter.stats(),
+        "pending_stale_refreshes": pending_stale_refreshes(),
+        "suggest_requests": suggest_sequencer.stats(),
+        "prefetch": reference_prefetcher.stats(),
+    })
+
+
+# ============ 4️⃣ 批次 Citation ============
+def _batch_executor():
+    """所有批次請求共用的 thread pool，限制同時查詢 CrossRef 的輸入數"""
+    global _batch_pool
+    if _batch_pool is None:
+        with _batch_pool_lock:
+            if _batch_pool is None:
+                _batch_pool = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS,
+                                                 thread_name_prefix="batch-citation")
+    return _batch_pool
+
+
+@bp.route('/api/generate_citations', methods=['POST'])
+def generate_citations():
+    """一次產生多筆 citation：{"inputs": [...]} 或 {"text": "每行一筆"}
+
+    需要查詢 CrossRef 的輸入（DOI、標題、關鍵字）送進共用的 thread pool 並行解析，
+    每個請求最多同時排入 BATCH_WINDOW 筆（送出一筆才補下一筆），相同的輸入只解析一次，
+    快取與 single-flight 也與其他請求共用。結果以 NDJSON 依輸入順序串流回傳：
+    前面的輸入一完成就送出，不必等整批結束；用戶端中途斷線時取消尚未開始的查詢。
+    """
+    data = request.get_json(silent=True) or {}
+    inputs = data.get('inputs')
+    if inputs is None:
+        inputs = str(data.get('text', '')).splitlines()
+    if not isinstance(inputs, list):
+        return jsonify({"status": "error", "message": "inputs 必須是字串陣列。"}), 400
+    inputs = [str(item).strip() for item in inputs if str(item).strip()]
+    if not inputs:
+        return jsonify({"status": "error", "message": "請至少輸入一筆 DOI、Reference、標題或關鍵字。"}), 400
+    if len(inputs) > BATCH_MAX_INPUTS:
+        return jsonify({"status": "error",
+                        "message": f"一次最多處理 {BATCH_MAX_INPUTS} 筆，請分批送出。"}), 413
+
+    # 需要連線的輸入（不重複），依第一次出現的順序
+    online = []
+    for text in inputs:
+        if text not in online and classify_input(text)[0] not in _OFFLINE_MODES:
+            online.append(text)
+
+    def stream():
+        executor = _batch_executor()
+        futures = {}
+        consumed = 0  # 已輪到的連線輸入數
+        try:
+            for index, text in enumerate(inputs):
+                while len(futures) < min(len(online), consumed + BATCH_WINDOW):
+                    next_text = online[len(futures)]
+                    futures[next_text] = executor.submit(resolve_citation, next_text)
+                future = futures.get(text)
+                if future is None:
+                    payload, status = resolve_citation(text)
+                else:
+                    if consumed < len(online) and online[consumed] == text:
+                        consumed += 1
+                    payload, status = future.result()
+                line = dict(payload, index=index, input=text, http_status=status)
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        finally:
+            # 用戶端斷線（generator 被關閉）時，還沒開始的查詢不再執行
+            for future in futures.values():
+                future.cancel()
+
+    return Response(stream(), mimetype="application/x-ndjson")
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+
+# 連續失敗幾次後開啟斷路器
+FAILURE_THRESHOLD = int(os.environ.get("CROSSREF_BREAKER_THRESHOLD", "5"))
+# 開啟後經過多少秒才放行一個試探請求（half-open）
+RESET_TIMEOUT = float(os.environ.get("CROSSREF_BREAKER_RESET", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ConnectionError):
+    """斷路器開啟中，請求直接失敗而不等待 timeout"""
+
+
+class CircuitBreaker:
+    """包住 CrossRef client 的斷路器
+
+    - closed：正常放行；連續失敗達 failure_threshold 次即轉為 open
+    - open：所有請求立即丟出 CircuitOpenError；reset_timeout 秒後轉為 half_open
+    - half_open：只放行一個試探請求，成功則 closed，失敗則重新 open
+    - 由 open/half_open 回到 closed 時呼叫 add_recovery_listener 註冊的函式
+
+    每個放行的呼叫都必須以 record_success()、record_failure() 或 release()
+    其中之一結束，否則 half_open 的試探名額不會釋放。
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.reset()
+
+    def reset(self):
+        """回到 closed 並清除統計（測試時使用）"""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+            self._open_count = 0
+            self._rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(self.clock())
+
+    def _current_state(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def _open(self, now):
+        if self._state != OPEN:
+            self._open_count += 1
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+
+    def before_call(self):
+        """請求前呼叫；斷路器開啟時丟出 CircuitOpenError"""
+        with self._lock:
+            state = self._current_state(self.clock())
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self._rejected += 1
+        raise CircuitOpenError("CrossRef 暫時無法連線，請稍後再試。")
+
+    def record_success(self):
+        with self._lock:
+            recovered = self._state != CLOSED
+            self._state = CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+            listeners = list(self._listeners) if recovered else []
+        for listener in listeners:
+            try:
+                listener()
+            except Exception as e:
+                print(f"[CircuitBreaker] recovery listener 失敗: {e}")
+
+    def record_failure(self):
+        with self._lock:
+            now = self.clock()
+            self._failures += 1
+            if self._current_state(now) == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open(now)
+
+    def release(self):
+        """呼叫結束但無法判斷 CrossRef 是否正常（例如 429、本機限速），只釋放試探名額"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def add_recovery_listener(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+
+    def snapshot(self):
+        """供監控使用的狀態摘要"""
+        with self._lock:
+            now = self.clock()
+            state = self._current_state(now)
+            retry_in = None
+            if state == OPEN:
+                retry_in = round(max(0.0, self._opened_at + self.reset_timeout - now), 2)
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "retry_in": retry_in,
+                "open_count": self._open_count,
+                "rejected": self._rejected,
+            }
+
+
+# 所有 CrossRef 請求共用的斷路器
+crossref_breaker = CircuitBreaker()
@@ -1,32 +1,241 @@
+import random
 import requests
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+
+from .http_client import crossref_get, crossref_url, READ_TIMEOUT
+from .metadata_cache import metadata_cache, doi_cache_key, strip_doi_prefix
+from .singleflight import SingleFlight
+from .rate_limiter import RateLimitExceeded, parse_retry_after
+from .circuit_breaker import CircuitOpenError, crossref_breaker
+from .deadline import DeadlineExceeded, RequestCancelled, remaining_or_none
+from .local_index import local_index
+from .doi_bloom import doi_bloom
+from .prefix_index import suggest_index
+
+# safe_request 重試等待的上限（秒）
+BACKOFF_CAP = 8.0
+
+# suggest_doi_candidates 驗證 DOI 時的並行上限與整體期限（秒）
+VERIFY_MAX_WORKERS = 5
+VERIFY_DEADLINE = 3.0
+
+_verify_pool = None
+_verify_pool_lock = threading.Lock()
+
+# 本機前綴索引至少有幾筆結果才直接回傳，不足時才查 CrossRef
+SUGGEST_INDEX_MIN_RESULTS = 3
+
+# fetch_metadata_from_title 是否同時送出 filtered 與 unfiltered 兩個搜尋
+HEDGE_TITLE_SEARCH = True
+SEARCH_MAX_WORKERS = 4
+
+_search_pool = None
+_search_pool_lock = threading.Lock()
+
+# 同一時間相同的 DOI / 標題 / 關鍵字查詢只打一次 CrossRef
+_inflight = SingleFlight()
+
+# CrossRef 無法連線時回傳過 stale 資料的 DOI，恢復後在背景重新抓取
+STALE_REFRESH_MAX = 1000
+_stale_dois = {}
+_stale_lock = threading.Lock()
+
+
+def _query_key(text):
+    """標題與關鍵字查詢的合併 key：忽略大小寫與多餘空白"""
+    return " ".join((text or "").lower().split())
+
+
+def title_cache_key(title):
+    """fetch_metadata_from_title 結果的快取 key"""
+    return "title:" + _query_key(title)
+
+
+class _LeaderOutOfTime(Exception):
+    """leader 失敗時自己的 deadline 已用完：失敗可能只是 timeout 被 leader 的期限截短"""
+
+    def __init__(self, error, deadline):
+        super().__init__(str(error))
+        self.error = error
+        self.deadline = deadline
+
+
+def _shared(key, deadline, fn, *args):
+    """以 single-flight 執行 fn；有 deadline 時等待其他呼叫者的結果最多等到期限
+
+    fn 以 leader 自己的參數（含 deadline）執行。leader 因自己的期限用完或請求被取消
+    （RequestCancelled）而失敗時，還有時間的等待者以自己的 deadline 重新執行。
+    """
+    def run():
+        try:
+            return fn(*args)
+        except ConnectionError as e:
+            if deadline is not None and deadline.expired():
+                raise _LeaderOutOfTime(e, deadline) from e
+            raise
+
+    while True:
+        try:
+            return _inflight.do(key, run, wait_timeout=remaining_or_none(deadline))
+        except TimeoutError:
+            raise DeadlineExceeded("CrossRef 查詢已超過時間限制。")
+        except _LeaderOutOfTime as e:
+            if e.deadline is deadline or (deadline is not None and deadline.expired()):
+                raise e.error from None
+
+
+def _meta_from_work(data, doi):
+    """把 CrossRef work 轉成 /api/generate_citation 使用的 metadata 格式"""
+    authors = [
+        f"{a.get('family', '')}, {a.get('given', '')}".strip(", ")
+        for a in data.get("author", [])
+    ]
+    return {
+        "title": data.get("title", [""])[0],
+        "authors": authors,
+        "year": str(data.get("issued", {}).get("date-parts", [[None]])[0][0]),
+        "journal": data.get("container-title", [""])[0],
+        "doi": doi,
+        "publisher": data.get("publisher", "N/A"),
+    }
+
+
+def _cache_search_items(items):
+    """搜尋結果本身就是完整的 work 紀錄，順便寫入 DOI 快取與自動補全索引，
+    之後對同一個 DOI 的 fetch_metadata_from_doi 不必再打 CrossRef"""
+    for i in items:
+        doi = i.get("DOI")
+        if doi and i.get("title"):
+            metadata_cache.set(doi_cache_key(doi), _meta_from_work(i, doi))
+    _index_for_suggest(items)
+
+
+def _is_fragment(title, doi):
+    """table / figure 之類的片段紀錄（標題或 DOI 看起來是附屬資源）
+
+    片段判斷只寫在這裡；只需檢查其中一項時另一項傳入 None。
+    """
+    s = (title or "").strip().lower()
+    if re.match(r"^(table|figure)\b", s) or re.search(r"\b(table|figure)\s*\d+\b", s):
+        return True
+    return bool(doi) and bool(re.search(r"/fig|/table|/supp|/append", doi.lower()))
+
+
+def _suggestion_from_work(i):
+    return {
+        "doi": i.get("DOI", ""),
+        "title": i.get("title", ["N/A"])[0],
+        "year": i.get("issued", {}).get("date-parts", [[None]])[0][0],
+        "authors": ", ".join([a.get("family", "") for a in i.get("author", [])[:2]]),
+    }
+
+
+def _index_for_suggest(works):
+    """已解析的 work 加入 /api/suggest_doi 的前綴索引（片段紀錄不加入）"""
+    suggest_index.add_many(
+        _suggestion_from_work(i) for i in works
+        if i.get("DOI") and i.get("title") and not _is_fragment(i["title"][0], i["DOI"]))
+
 
 # --------------------------------------------------------
 # 1️⃣ 根據 DOI 抓完整 metadata → 用於 /api/generate_citation
 # --------------------------------------------------------
-def fetch_metadata_from_doi(doi):
-    """使用 DOI 取得 CrossRef metadata"""
+def fetch_metadata_from_doi(doi, timeout=READ_TIMEOUT, deadline=None):
+    """使用 DOI 取得 CrossRef metadata（先查快取）
+
+    deadline（services.deadline.Deadline）限制整個查詢的時間，用完時與
+    CrossRef 無法連線一樣處理：有舊資料就回傳 stale，否則丟出 DeadlineExceeded。
+    """
+    doi = strip_doi_prefix(doi)
+    cache_key = doi_cache_key(doi)
+    hit, cached = metadata_cache.get(cache_key)
+    if hit:
+        if cached is None:
+            raise ValueError("DOI 不存在於 CrossRef 資料庫。")
+        meta = dict(cached)
+        meta["doi"] = doi
+        return meta
+
+    work = local_index.get_work(doi)
+    if work is not None:
+        return _meta_from_work(work, doi)
+
+    # 不在已知 DOI 的 Bloom filter 中 → 確定不存在，不必連線
+    if not doi_bloom.might_exist(doi):
+        raise ValueError("DOI 不存在於 CrossRef 資料庫。")
+
+    try:
+        meta = _shared(cache_key, deadline, _fetch_doi_upstream, doi, cache_key, timeout, deadline)
+    except ConnectionError:
+        # CrossRef 無法連線（含斷路器開啟）：有舊資料就先用，標記為 stale
+        meta = _serve_stale(doi, cache_key)
+        if meta is None:
+            raise
+    meta["doi"] = doi
+    return meta
+
+
+def _serve_stale(doi, cache_key):
+    stale = metadata_cache.get_stale(cache_key)
+    if stale is None:
+        return None
+    with _stale_lock:
+        if len(_stale_dois) < STALE_REFRESH_MAX:
+            _stale_dois[cache_key] = doi
+    stale["stale"] = True
+    return stale
+
+
+def pending_stale_refreshes():
+    with _stale_lock:
+        return len(_stale_dois)
+
+
+def _refresh_stale_entries():
+    """CrossRef 恢復後重新抓取曾以 stale 資料回應的 DOI；再次失敗就留待下次恢復"""
+    while True:
+        with _stale_lock:
+            if not _stale_dois:
+                return
+            cache_key, doi = next(iter(_stale_dois.items()))
+        try:
+            _inflight.do(cache_key, _fetch_doi_upstream, doi, cache_key, READ_TIMEOUT)
+        except ConnectionError:
+            return
+        except ValueError:
+            pass
+        with _stale_lock:
+            _stale_dois.pop(cache_key, None)
+
+
+def _on_crossref_recovered():
+    if pending_stale_refreshes():
+        threading.Thread(target=_refresh_stale_entries, name="crossref-stale-refresh",
+                         daemon=True).start()
+
+
+crossref_breaker.add_recovery_listener(_on_crossref_recovered)
+
+
+def _fetch_doi_upstream(doi, cache_key, timeout, deadline=None):
     try:
-        url = f"https://api.crossref.org/works/{doi}"
-        response = requests.get(url, timeout=8)
+        url = crossref_url(f"works/{doi}")
+        response = crossref_get(url, timeout=timeout, deadline=deadline)
+        if response.status_code == 404:
+            metadata_cache.set_negative(cache_key)
+        if response.status_code == 429 or response.status_code >= 500:
+            raise ConnectionError("CrossRef 暫時無法服務，請稍後再試。")
         if response.status_code != 200:
             raise ValueError("DOI 不存在於 CrossRef 資料庫。")
 
         data = response.json().get("message", {})
-        authors = [
-            f"{a.get('family', '')}, {a.get('given', '')}".strip(", ")
-            for a in data.get("author", [])
-        ]
-
-        return {
-            "title": data.get("title", [""])[0],
-            "authors": authors,
-            "year": str(data.get("issued", {}).get("date-parts", [[None]])[0][0]),
-            "journal": data.get("container-title", [""])[0],
-            "doi": doi,
-            "publisher": data.get("publisher", "N/A"),
-        }
+        meta = _meta_from_work(data, doi)
+        metadata_cache.set(cache_key, meta)
+        _index_for_suggest([data])
+        return meta
 
     except requests.exceptions.ConnectionError:
         raise ConnectionError("無法連線 CrossRef。")
@@ -37,18 +246,43 @@ def fetch_metadata_from_doi(doi):
 # --------------------------------------------------------
 # 2️⃣ 根據 DOI 或關鍵字搜尋建議 → 用於 /api/suggest_doi
 # --------------------------------------------------------
-def suggest_doi_candidates(prefix, limit=5):
+def suggest_doi_candidates(prefix, limit=5, deadline=None):
 
-    """自動補全建議：支援完整 DOI、部分 DOI、或關鍵字搜尋"""
+    """自動補全建議：支援完整 DOI、部分 DOI、或關鍵字搜尋
+
+    有 deadline 時所有 CrossRef 請求都限制在剩餘時間內，驗證階段也不超過期限。
+    """
     prefix = prefix.strip()
     prefix = re.sub(r"^https?://(dx\.)?doi\.org/", "", prefix, flags=re.I)
     prefix = re.sub(r"^doi://", "", prefix, flags=re.I)
 
+    # ✅ Step 0. 離線索引：有結果就不連線（索引內的 DOI 都確實存在，不需再驗證）
+    local = _local_suggestions(prefix, limit)
+    if local:
+        return local
+
+    # ✅ Step 0b. 服務曾解析過的 DOI / 標題前綴索引；結果太少才查 CrossRef
+    indexed = suggest_index.search(prefix, limit)
+    exact = any(r["doi"].lower() == prefix.lower() for r in indexed)
+    if indexed and (exact or len(indexed) >= min(limit, SUGGEST_INDEX_MIN_RESULTS)):
+        return [dict(r, verified=True) for r in indexed]
+
     try:
-        # ✅ Step 1. 嘗試精準查詢
-        if prefix.startswith("10.") and "/" in prefix:
-            precise_url = f"https://api.crossref.org/works/{prefix}"
-            r = safe_request(precise_url)
+        # ✅ Step 1. 嘗試精準查詢（Bloom filter 判定不存在的 DOI 直接改走模糊搜尋）
+        if prefix.startswith("10.") and "/" in prefix and doi_bloom.might_exist(prefix):
+            precise_url = crossref_url(f"works/{prefix}")
+            r = safe_request(precise_url, deadline=deadline)
+            if not r:
+                # CrossRef 無法回應時，快取中有這個 DOI 的舊資料就直接回傳
+                stale = _serve_stale(prefix, doi_cache_key(prefix))
+                if stale:
+                    return [{
+                        "doi": prefix,
+                        "title": stale.get("title", ""),
+                        "year": stale.get("year"),
+                        "authors": ", ".join(a.split(",")[0] for a in stale.get("authors", [])[:2]),
+                        "stale": True,
+                    }]
             if r:
                 msg = r.json().get("message", {})
                 return [{
@@ -59,38 +293,26 @@ def suggest_doi_candidates(prefix, limit=5):
                 }]
 
         # ✅ Step 2. fallback 模糊搜尋
-        url = "https://api.crossref.org/works"
+        url = crossref_url("works")
         params = {
             "rows": limit,
             "query.bibliographic": prefix
         }
 
-        res = safe_request(url, params=params)
+        res = safe_request(url, params=params, deadline=deadline)
         if not res:
             raise ConnectionError("CrossRef 伺服器未回應")
 
         items = res.json().get("message", {}).get("items", [])
         results = []
 
-        def is_fragment_title(t: str) -> bool:
-            if not t:
-                return False
-            s = t.strip().lower()
-            # starts with table/figure or similar fragmentary labels
-            if re.match(r"^(table|figure)\b", s):
-                return True
-            # common pattern like 'Table 1:' or 'Figure 2:' earlier in title
-            if re.search(r"\b(table|figure)\s*\d+\b", s):
-                return True
-            return False
-
         for i in items:
             doi = i.get("DOI", "")
             title = i.get("title", ["N/A"])[0]
             year = i.get("issued", {}).get("date-parts", [[None]])[0][0]
             authors = ", ".join([a.get("family", "") for a in i.get("author", [])[:2]])
             # skip fragmentary table/figure titles or DOIs that look like fragments
-            if is_fragment_title(title) or (doi and re.search(r"/fig|/table|/supp|/append|/fig- |/table-", doi.lower())):
+            if _is_fragment(title, doi):
                 continue
             if prefix.lower() in doi.lower() or prefix.lower() in title.lower():
                 results.append({
@@ -103,7 +325,7 @@ def suggest_doi_candidates(prefix, limit=5):
         # ✅ 若模糊查完全沒結果，嘗試再用一般 query 搜一次
         if not results:
             params = {"rows": limit, "query": prefix}
-            res = safe_request(url, params=params)
+            res = safe_request(url, params=params, deadline=deadline)
             if res:
                 items = res.json().get("message", {}).get("items", [])
                 for i in items:
@@ -111,7 +333,7 @@ def suggest_doi_candidates(prefix, limit=5):
                     title = i.get("title", ["N/A"])[0]
                     year = i.get("issued", {}).get("date-parts", [[None]])[0][0]
                     authors = ", ".join([a.get("family", "") for a in i.get("author", [])[:2]])
-                    if is_fragment_title(title) or (doi and re.search(r"/fig|/table|/supp|/append|/fig- |/table-", doi.lower())):
+                    if _is_fragment(title, doi):
                         continue
                     results.append({
                         "doi": doi,
@@ -120,25 +342,15 @@ def suggest_doi_candidates(prefix, limit=5):
                         "authors": authors
                     })
 
+        # 使用者已輸入更新的內容：不再送出驗證請求
+        if deadline is not None and deadline.cancelled():
+            raise RequestCancelled("已有較新的請求，放棄這次查詢。")
+
         # Verify collected DOIs actually resolve in CrossRef. Keep only verified
         # ones when possible to avoid suggesting fragment/preprint records that
-        # don't resolve to a proper work entry.
-        verified = []
-        for r in results:
-            doi_val = (r.get('doi') or '').strip()
-            if not doi_val:
-                continue
-            try:
-                check = safe_request(f"https://api.crossref.org/works/{doi_val}")
-                if check:
-                    # also ensure title of resolved DOI is not a table/figure fragment
-                    msg = check.json().get('message', {})
-                    cand_title = msg.get('title', [""])[0]
-                    if not is_fragment_title(cand_title):
-                        verified.append(r)
-            except Exception:
-                # skip problematic DOI
-                continue
+        # don't resolve to a proper work entry. Candidates still pending when
+        # the verification deadline expires are returned marked unverified.
+        verified = _verify_candidates(results, deadline=deadline)
 
         # prefer verified if any, otherwise return original results (to avoid
         # empty suggestions when CrossRef lookup fails)
@@ -148,45 +360,185 @@ def suggest_doi_candidates(prefix, limit=5):
         raise ConnectionError("無法連線 CrossRef。")
 
     
+def _local_suggestions(prefix, limit):
+    if not local_index.available():
+        return []
+    if prefix.startswith("10.") and "/" in prefix:
+        work = local_index.get_work(prefix)
+        items = [work] if work else local_index.doi_prefix(prefix, limit)
+    else:
+        # 使用者還在輸入，最後一個詞當作前綴比對
+        items = local_index.search(prefix, limit=limit, prefix_last=True)
+
+    return [dict(_suggestion_from_work(i), verified=True) for i in items
+            if not _is_fragment(i.get("title", ["N/A"])[0], i.get("DOI", ""))]
+
+
+def _verify_executor():
+    """所有 suggest 請求共用的驗證 thread pool，限制對 CrossRef 的總並行數"""
+    global _verify_pool
+    if _verify_pool is None:
+        with _verify_pool_lock:
+            if _verify_pool is None:
+                _verify_pool = ThreadPoolExecutor(max_workers=VERIFY_MAX_WORKERS,
+                                                  thread_name_prefix="doi-verify")
+    return _verify_pool
+
+
+def _search_executor():
+    """fetch_metadata_from_title 的 hedged 搜尋共用的 thread pool"""
+    global _search_pool
+    if _search_pool is None:
+        with _search_pool_lock:
+            if _search_pool is None:
+                _search_pool = ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS,
+                                                  thread_name_prefix="title-search")
+    return _search_pool
+
+
+def _verify_candidates(results, deadline=None):
+    """並行確認候選 DOI 能在 CrossRef 解析且不是 table/figure fragment
+
+    回傳保留原順序的清單：驗證通過的標記 verified=True；期限到時仍未完成的
+    標記 verified=False 一併回傳；驗證失敗的則剔除。等待時間為 VERIFY_DEADLINE
+    與 deadline 剩餘時間的較小者。
+    """
+    wait_seconds = VERIFY_DEADLINE
+    if deadline is not None:
+        wait_seconds = min(wait_seconds, deadline.remaining())
+
+    def verify(doi_val):
+        try:
+            meta = fetch_metadata_from_doi(doi_val, deadline=deadline)
+        except Exception:
+            # skip problematic DOI
+            return False
+        # also ensure title of resolved DOI is not a table/figure fragment
+        return not _is_fragment(meta.get("title", ""), None)
+
+    executor = _verify_executor()
+    futures = []
+    for r in results:
+        doi_val = (r.get('doi') or '').strip()
+        if doi_val:
+            futures.append((r, executor.submit(verify, doi_val)))
+    if not futures:
+        return []
+
+    wait([f for _, f in futures], timeout=wait_seconds)
+
+    verified = []
+    for r, future in futures:
+        if future.done():
+            if not future.cancelled() and future.result():
+                verified.append(dict(r, verified=True))
+        else:
+            # 尚未開始的直接取消，已在執行的讓它在背景完成（結果會進快取）
+            future.cancel()
+            verified.append(dict(r, verified=False))
+    return verified
+
+
 # ✅ 帶重試與延遲的安全請求
-def safe_request(url, params=None, retries=2, delay=2, timeout=15):
-    """帶自動重試的 requests.get，避免 CrossRef timeout"""
+def safe_request(url, params=None, retries=2, delay=2, timeout=READ_TIMEOUT, deadline=None):
+    """帶自動重試的 GET（走共用連線池與速率限制），避免 CrossRef timeout
+
+    429 / 5xx / timeout 以 jittered exponential backoff 重試（429 優先依
+    Retry-After），其他 4xx 不重試。速率限制排隊已滿或斷路器開啟時直接放棄。
+    有 deadline 時每次請求的 timeout 不超過剩餘時間，等不起 backoff 就不再重試。
+    """
     for attempt in range(retries):
+        retry_after = None
         try:
-            res = requests.get(url, params=params, timeout=timeout)
+            res = crossref_get(url, params=params, timeout=timeout, deadline=deadline)
             if res.status_code == 200:
                 return res
+            if res.status_code != 429 and res.status_code < 500:
+                break
+            retry_after = parse_retry_after(res.headers.get("Retry-After"))
+            reason = f"HTTP {res.status_code}"
+        except RateLimitExceeded as e:
+            print(f"[RateLimit] {e}")
+            break
+        except CircuitOpenError as e:
+            print(f"[CircuitBreaker] {e}")
+            break
+        except DeadlineExceeded as e:
+            print(f"[Deadline] {e}")
+            break
         except requests.exceptions.Timeout:
-            if attempt < retries - 1:
-                print(f"[Retry {attempt+1}] CrossRef timeout，等待 {delay} 秒後重試...")
-                time.sleep(delay)
-                continue
+            reason = "timeout"
         except requests.exceptions.RequestException as e:
             print(f"[Error] CrossRef 連線失敗: {e}")
             break
-    return None    
+
+        if attempt < retries - 1:
+            wait_seconds = backoff_delay(attempt, delay, retry_after)
+            if deadline is not None and wait_seconds >= deadline.remaining():
+                print(f"[Deadline] CrossRef {reason}，剩餘時間不足以重試")
+                break
+            print(f"[Retry {attempt+1}] CrossRef {reason}，等待 {wait_seconds:.1f} 秒後重試...")
+            time.sleep(wait_seconds)
+    return None
+
+
+def backoff_delay(attempt, base, retry_after=None, cap=BACKOFF_CAP):
+    """第 attempt 次重試前的等待秒數：full jitter exponential backoff"""
+    if retry_after is not None:
+        return min(cap, retry_after)
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
 
 
 # --------------------------------------------------------
 # 3️⃣ 根據 Title 或 Keywords 搜尋並回傳 metadata
 # --------------------------------------------------------
-def fetch_metadata_from_title(title, timeout=10):
+def fetch_metadata_from_title(title, timeout=READ_TIMEOUT, deadline=None):
     """Search CrossRef by title and pick the best-matching work.
 
     Uses `query.title` and inspects up to several candidates, preferring
     exact or close title matches and filtering out fragment-like DOIs
-    (e.g. URLs that point to /fig- or /table- resources).
+    (e.g. URLs that point to /fig- or /table- resources). Concurrent
+    lookups of the same (normalized) title share one upstream search,
+    and the result is cached under the normalized title.
+    Every request is bounded by the optional `deadline`. An exact
+    (normalized) title match in the offline index is returned without
+    going to the network; partial titles always go to CrossRef.
+    """
+    local = _local_title_match(title)
+    if local is not None:
+        return _title_meta(local)
+
+    # 同一標題的搜尋結果也寫入快取（例如背景預先查詢過的參考文獻）
+    cache_key = title_cache_key(title)
+    hit, cached = metadata_cache.get(cache_key)
+    if hit and cached is not None:
+        return dict(cached)
+    meta = _shared(cache_key, deadline, _fetch_title_upstream, title, timeout, deadline)
+    if meta.get("title"):
+        metadata_cache.set(cache_key, meta)
+    return meta
+
+
+def _local_title_match(title):
+    """在離線索引中找標題完全相同（忽略標點大小寫）的 work；有期刊的優先
+
+    只是包含查詢字串的標題不算命中（"Deep learning" 會對到任意較長的標題），
+    交給 CrossRef 依相關度排序後再挑選。
     """
+    exact = local_index.get_by_title(title)
+    if not exact:
+        return None
+    for i in exact:
+        if (i.get("container-title") or [""])[0].strip():
+            return i
+    return exact[0]
+
+
+def _fetch_title_upstream(title, timeout, deadline=None):
     def normalize(t):
         return re.sub(r"[^0-9a-z]", "", (t or "").lower())
 
-    def doi_is_fragment(doi):
-        if not doi:
-            return False
-        d = doi.lower()
-        return any(x in d for x in ['/fig', '/table', '/supp', '/append', '/fig-','/table-'])
-
-    url = "https://api.crossref.org/works"
+    url = crossref_url("works")
 
     # Helper: try to pick the best candidate from a list of CrossRef items
     def pick_best_from_items(items_list):
@@ -201,57 +553,69 @@ def fetch_metadata_from_title(title, timeout=10):
         # 1) exact normalized match with journal and non-fragment DOI
         for i in items_list:
             cand_title = i.get('title', [""])[0]
-            if normalize(cand_title) == norm_q and has_journal(i) and not doi_is_fragment(i.get('DOI', '')):
+            if normalize(cand_title) == norm_q and has_journal(i) and not _is_fragment(None, i.get('DOI', '')):
                 return i
 
         # 2) candidate contains query and has journal
         for i in items_list:
             cand_title = i.get('title', [""])[0]
-            if title.lower() in cand_title.lower() and has_journal(i) and not doi_is_fragment(i.get('DOI', '')):
+            if title.lower() in cand_title.lower() and has_journal(i) and not _is_fragment(None, i.get('DOI', '')):
                 return i
 
         # 3) choose first with journal and non-fragment DOI
         for i in items_list:
-            if has_journal(i) and not doi_is_fragment(i.get('DOI', '')):
+            if has_journal(i) and not _is_fragment(None, i.get('DOI', '')):
                 return i
 
         # 4) exact normalized match (any non-fragment)
         for i in items_list:
             cand_title = i.get('title', [""])[0]
-            if normalize(cand_title) == norm_q and not doi_is_fragment(i.get('DOI', '')):
+            if normalize(cand_title) == norm_q and not _is_fragment(None, i.get('DOI', '')):
                 return i
 
         # 5) candidate contains query (any non-fragment)
         for i in items_list:
             cand_title = i.get('title', [""])[0]
-            if title.lower() in cand_title.lower() and not doi_is_fragment(i.get('DOI', '')):
+            if title.lower() in cand_title.lower() and not _is_fragment(None, i.get('DOI', '')):
                 return i
 
         # 6) choose first non-fragment DOI
         for i in items_list:
-            if not doi_is_fragment(i.get('DOI', '')):
+            if not _is_fragment(None, i.get('DOI', '')):
                 return i
 
         # no non-fragment candidate found
         return None
 
-    # Phase 1: prefer journal-article filtered results
+    def search(params):
+        res = safe_request(url, params=params, timeout=timeout, deadline=deadline)
+        if not res:
+            return None
+        found = res.json().get("message", {}).get("items", [])
+        _cache_search_items(found)
+        return found
+
     params_filtered = {"rows": 5, "query.title": title, "filter": "type:journal-article"}
-    res = safe_request(url, params=params_filtered, timeout=timeout)
-    items = []
-    if res:
-        items = res.json().get("message", {}).get("items", [])
+    params = {"rows": 5, "query.title": title}
 
+    # Hedge: the unfiltered fallback search runs concurrently with phase 1,
+    # so the fallback case costs one round trip instead of two. When phase 1
+    # qualifies, the fallback is cancelled if still queued and ignored otherwise.
+    fallback = _search_executor().submit(search, params) if HEDGE_TITLE_SEARCH else None
+
+    # Phase 1: prefer journal-article filtered results
+    items = search(params_filtered) or []
     best_item = pick_best_from_items(items)
 
     # Phase 2: fallback to unfiltered query when no suitable journal-article found
-    if not best_item:
-        params = {"rows": 5, "query.title": title}
-        res2 = safe_request(url, params=params, timeout=timeout)
-        if not res2:
+    if best_item:
+        if fallback is not None:
+            fallback.cancel()
+    else:
+        items2 = _fallback_result(fallback, deadline) if fallback is not None else search(params)
+        if items2 is None:
             raise ConnectionError("CrossRef 未回應 (title search)。")
 
-        items2 = res2.json().get("message", {}).get("items", [])
         if not items2:
             raise ValueError("找不到與標題相符的文章。")
 
@@ -261,7 +625,19 @@ def fetch_metadata_from_title(title, timeout=10):
         if not best_item and items2:
             best_item = items2[0]
 
-    i = best_item
+    return _title_meta(best_item)
+
+
+def _fallback_result(fallback, deadline):
+    """等待並行的備援搜尋；共用執行緒池滿載時最多等到請求期限，不無限期阻塞"""
+    try:
+        return fallback.result(timeout=remaining_or_none(deadline))
+    except FutureTimeoutError:
+        fallback.cancel()
+        raise DeadlineExceeded("CrossRef 查詢已超過時間限制。")
+
+
+def _title_meta(i):
     doi = i.get("DOI", "")
     authors = [f"{a.get('family','')}, {a.get('given','')}".strip(', ') for a in i.get("author", [])]
     year_val = i.get("issued", {}).get("date-parts", [[None]])[0][0]
@@ -277,29 +653,38 @@ def fetch_metadata_from_title(title, timeout=10):
     }
 
 
-def fetch_metadata_from_keywords(keywords, limit=3, timeout=10):
+def fetch_metadata_from_keywords(keywords, limit=3, timeout=READ_TIMEOUT, deadline=None):
     """Use CrossRef to search by keywords and return up to `limit` metadata dicts.
 
     Each item uses the same simplified metadata shape as other fetch functions.
+    Concurrent identical keyword queries share one upstream search.
+    Every request is bounded by the optional `deadline`.
     """
-    url = "https://api.crossref.org/works"
+    # 離線索引有結果就不連線
+    local_items = local_index.search(keywords, limit=limit)
+    if local_items:
+        results = _keyword_results(local_items, limit)
+        if results:
+            return results
+
+    key = f"keywords:{limit}:{_query_key(keywords)}"
+    return _shared(key, deadline, _fetch_keywords_upstream, keywords, limit, timeout, deadline)
+
+
+def _fetch_keywords_upstream(keywords, limit, timeout, deadline=None):
+    url = crossref_url("works")
     params = {"rows": limit, "query.bibliographic": keywords}
-    res = safe_request(url, params=params, timeout=timeout)
+    res = safe_request(url, params=params, timeout=timeout, deadline=deadline)
     if not res:
         raise ConnectionError("CrossRef 未回應 (keyword search)。")
 
     items = res.json().get("message", {}).get("items", [])
-    results = []
+    _cache_search_items(items)
+    return _keyword_results(items, limit)
 
-    def is_fragment_title(t: str) -> bool:
-        if not t:
-            return False
-        s = t.strip().lower()
-        if re.match(r"^(table|figure)\b", s):
-            return True
-        if re.search(r"\b(table|figure)\s*\d+\b", s):
-            return True
-        return False
+
+def _keyword_results(items, limit):
+    results = []
 
     for i in items[:limit]:
         doi = i.get("DOI", "")
@@ -317,7 +702,7 @@ def fetch_metadata_from_keywords(keywords, limit=3, timeout=10):
 
         title = i.get("title", ["N/A"])[0]
         # skip fragmentary table/figure titles and DOIs that look like fragments
-        if is_fragment_title(title) or (doi and re.search(r"/fig|/table|/supp|/append|/fig- |/table-", doi.lower())):
+        if _is_fragment(title, doi):
             continue
 
         results.append({
@@ -0,0 +1,59 @@
+import time
+
+# 剩餘時間少於此值就不再送出新的 CrossRef 請求
+MIN_CALL_TIME = 0.05
+
+
+class DeadlineExceeded(ConnectionError):
+    """請求的時間預算已用完
+
+    繼承 ConnectionError：呼叫端原本就把 ConnectionError 當作「CrossRef 暫時無法使用」
+    處理（例如回傳 stale 快取），期限用完時走同一條路徑。
+    """
+
+
+class RequestCancelled(DeadlineExceeded):
+    """同一個用戶端已送出較新的請求，這個請求的結果不再需要
+
+    繼承 DeadlineExceeded：被取消的請求與時間用完一樣，不再送出新的 CrossRef 請求。
+    """
+
+
+class Deadline:
+    """單一 API 請求的時間預算，沿著 CrossRef 呼叫鏈往下傳
+
+    每個 CrossRef 呼叫以 cap() 把自己的 timeout 限制在剩餘時間內；
+    剩餘時間不足 MIN_CALL_TIME 時 cap() 直接丟出 DeadlineExceeded。
+    cancelled（回傳 bool 的 callable）為真時視為剩餘時間為 0，cap() 丟出 RequestCancelled。
+    """
+
+    def __init__(self, budget, clock=time.monotonic, cancelled=None):
+        self.budget = budget
+        self.clock = clock
+        self.expires_at = clock() + budget
+        self._cancelled = cancelled
+
+    def cancelled(self):
+        return self._cancelled is not None and self._cancelled()
+
+    def remaining(self):
+        if self.cancelled():
+            return 0.0
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self):
+        return self.remaining() < MIN_CALL_TIME
+
+    def cap(self, timeout=None):
+        """回傳 min(timeout, 剩餘時間)；時間已用完則丟出 DeadlineExceeded"""
+        if self.cancelled():
+            raise RequestCancelled("已有較新的請求，放棄這次查詢。")
+        remaining = self.remaining()
+        if remaining < MIN_CALL_TIME:
+            raise DeadlineExceeded("CrossRef 查詢已超過時間限制。")
+        return remaining if timeout is None else min(timeout, remaining)
+
+
+def remaining_or_none(deadline):
+    """deadline 為 None 時回傳 None（不限時），否則回傳剩餘秒數"""
+    return None if deadline is None else deadline.remaining()
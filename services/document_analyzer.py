@@ -1,81 +1,393 @@
+import os
 import re
+import zipfile
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from itertools import dropwhile, islice
 from docx import Document
-from typing import Dict, List, Tuple, Any
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+from lxml import etree
+from typing import Dict, Iterable, Iterator, List, Tuple, Any
 from .apa_formatter import generate_citation_key
+from .reference_parser import LETTER, PARTICLE_PREFIX, UPPER, find_year, parse_reference_entry
+from .surname_automaton import SurnameAutomaton
+from .surname_index import SurnameIndex, surname_key, surname_keys, umlaut_key
+from .reference_verifier import verify_reference_list
+from .prefetcher import reference_prefetcher
+
+# 參考文獻清單中常見的標題行
+_REFERENCE_HEADING_RE = re.compile(
+    r'^(References|Reference|參考文獻|参考文献|REFERENCES|Bibliography|Works Cited|Literatur|Bibliographie)$',
+    re.IGNORECASE)
+# 姓氏中的一個詞（可含重音符號、撇號與連字號：López、O'Brien、Lopez-Calderon）
+_NAME = rf"{LETTER}(?:{LETTER}|[\-'’])*"
+_SURNAME = rf"{UPPER}(?:{LETTER}|[\-'’])+"
+# 引用中的第一作者姓氏（可有小寫介系詞：van der Berg）
+_CITATION_AUTHOR_RE = re.compile(rf"^{PARTICLE_PREFIX}({_SURNAME})")
+# 已知姓氏之後的敘述型引用其餘部分：" (2020)"、" et al. (2020)"、" and Van der Berg (2020a)"
+_NARRATIVE_TAIL_RE = re.compile(
+    rf"(?:\s+et al\.|\s+(?:and|&)\s+(?i:{PARTICLE_PREFIX}){_SURNAME})?\s+\(\d{{4}}[a-z]?\)")
+# 新的參考文獻開頭："Last, F."、"Last ("、"Last, &"，或複合姓氏 "De Menezes, K." / "van der Berg, A."
+# 行首的介系詞可能大寫（"Van der Berg, A."、"De la Cruz, M."），不分大小寫比對
+_REFERENCE_START_RE = re.compile(
+    rf"^(?i:{PARTICLE_PREFIX}){_SURNAME}(?:,\s+{UPPER}|\s+\(|,\s+&|\s+{_SURNAME},\s+{UPPER}\.)")
+
+# 內文超過此長度（字元）時以多個 process 分段掃描引用；每段約 CITATION_SCAN_CHUNK_SIZE 字元
+PARALLEL_SCAN_THRESHOLD = int(os.environ.get("CITATION_SCAN_PARALLEL_THRESHOLD", "1000000"))
+PARALLEL_SCAN_WORKERS = int(os.environ.get("CITATION_SCAN_WORKERS", str(os.cpu_count() or 1)))
+PARALLEL_SCAN_CHUNK_SIZE = int(os.environ.get("CITATION_SCAN_CHUNK_SIZE", "200000"))
+
+# 檔案超過此大小（bytes）時 analyze_document 改用串流模式；串流模式每次掃描約此長度（字元）的內文
+STREAMING_FILE_SIZE = int(os.environ.get("ANALYZE_STREAMING_FILE_SIZE", str(8 * 1024 * 1024)))
+STREAMING_CHUNK_SIZE = int(os.environ.get("ANALYZE_STREAMING_CHUNK_SIZE", "65536"))
+# 串流模式第一次讀取時，參考文獻標題之後最多暫存多少字元；超過時（例如目錄中的標題）改為之後再讀一次
+STREAMING_REFERENCE_BUFFER = int(os.environ.get("ANALYZE_STREAMING_REFERENCE_BUFFER", "1000000"))
+
+# 常見的章節標題模式（支援編號和無編號）
+_SECTION_PATTERNS = [(re.compile(pattern, re.IGNORECASE), name) for pattern, name in [
+    (r'\n\s*\d*\.?\s*Abstract\s*\n', 'Abstract'),
+    (r'\n\s*\d*\.?\s*Introduction\s*\n', 'Introduction'),
+    (r'\n\s*\d*\.?\s*Method[s]?\s*\n', 'Methods'),
+    (r'\n\s*\d*\.?\s*Material[s]?\s+and\s+Method[s]?\s*\n', 'Methods'),
+    (r'\n\s*\d*\.?\s*Result[s]?\s*\n', 'Results'),
+    (r'\n\s*\d*\.?\s*Finding[s]?\s*\n', 'Results'),  # 替代用詞
+    (r'\n\s*\d*\.?\s*Discussion\s*\n', 'Discussion'),
+    (r'\n\s*\d*\.?\s*Conclusion[s]?\s*\n', 'Conclusion'),
+    (r'\n\s*\d*\.?\s*Reference[s]?\s*\n', 'References'),
+    (r'\n\s*\d*\.?\s*Background\s*\n', 'Background'),  # 常見章節
+    (r'\n\s*\d*\.?\s*Experiment[s]?\s*\n', 'Experiments'),
+]]
+
+
+def _main_document_part(package):
+    """.docx 套件中主文件 XML 的路徑（依 _rels/.rels 的 officeDocument 關聯）"""
+    relationships = etree.fromstring(package.read('_rels/.rels'))
+    for relationship in relationships:
+        if relationship.get('Type', '').endswith('/officeDocument'):
+            return relationship.get('Target').lstrip('/')
+    return 'word/document.xml'
+
+
+def _scan_chunk(task):
+    """process pool 的工作：掃描一段內文（含重疊區），只回傳起點在 [own_start, own_end) 的引用"""
+    window, automaton, base, own_start, own_end = task
+    citations = DocumentAnalyzer()._scan_citations(window, automaton, base)
+    return [citation for citation in citations if own_start <= citation['position'] < own_end]
+
 
 class DocumentAnalyzer:
     def __init__(self):
+        self.parallel_threshold = PARALLEL_SCAN_THRESHOLD
+        self.parallel_workers = PARALLEL_SCAN_WORKERS
+        self.parallel_chunk_size = PARALLEL_SCAN_CHUNK_SIZE
+        self.streaming_file_size = STREAMING_FILE_SIZE
+        self.streaming_chunk_size = STREAMING_CHUNK_SIZE
+        self.streaming_reference_buffer = STREAMING_REFERENCE_BUFFER
         self.parenthetical_patterns = [
-            r'\([A-Za-z][^)]*\d{4}[^)]*\)',  # (Author, 2023)
-            r'\([A-Za-z][^)]*et al\.[^)]*\d{4}[^)]*\)',  # (Author et al., 2023)
-            r'\([A-Za-z][^)]*&[^)]*\d{4}[^)]*\)',  # (Author & Author, 2023)
+            rf'\({LETTER}[^)]*\d{{4}}[^)]*\)',  # (Author, 2023)
+            rf'\({LETTER}[^)]*et al\.[^)]*\d{{4}}[^)]*\)',  # (Author et al., 2023)
+            rf'\({LETTER}[^)]*&[^)]*\d{{4}}[^)]*\)',  # (Author & Author, 2023)
         ]
         # 添加：匹配缺少左括號的引用（格式錯誤但仍需識別）
         self.malformed_parenthetical_patterns = [
-            r'(?<!\()[A-Z][a-z]+\s+et al\.,\s*\d{4}\)',  # Wang et al., 2024) - 缺左括號
-            r'(?<!\()[A-Z][a-z]+(?:\s+&\s+[A-Z][a-z]+)?,\s*\d{4}\)',  # Wang & Smith, 2024) - 缺左括號
+            r'(?<!\()[A-Z][a-z]+\s+et al\.,\s*\d{4}[a-z]?\)',  # Wang et al., 2024) - 缺左括號
+            r'(?<!\()[A-Z][a-z]+(?:\s+&\s+[A-Z][a-z]+)?,\s*\d{4}[a-z]?\)',  # Wang & Smith, 2024) - 缺左括號
         ]
         self.narrative_patterns = [
-            r'[A-Za-z]+\s+\(\d{4}\)',  # Author (2023)
-            r'[A-Za-z]+\s+et al\.\s+\(\d{4}\)',  # Author et al. (2023)
-            r'[A-Za-z]+\s+and\s+[A-Za-z]+\s+\(\d{4}\)',  # Author and Author (2023)
-            r'[A-Za-z]+\s+&\s+[A-Za-z]+\s+\(\d{4}\)',  # Author & Author (2023)
+            rf'{_NAME}\s+\(\d{{4}}[a-z]?\)',  # Author (2023) / Author (2023a)
+            rf'{_NAME}\s+et al\.\s+\(\d{{4}}[a-z]?\)',  # Author et al. (2023)
+            rf'{_NAME}\s+and\s+{_NAME}\s+\(\d{{4}}[a-z]?\)',  # Author and Author (2023)
+            rf'{_NAME}\s+&\s+{_NAME}\s+\(\d{{4}}[a-z]?\)',  # Author & Author (2023)
         ]
 
-    def analyze_document(self, file_path: str) -> Dict[str, Any]:
+    def analyze_document(self, file_path: str, verify_references: bool = False,
+                         prefetch: bool = False, streaming: bool = None) -> Dict[str, Any]:
+        """verify_references=True 時另外以 CrossRef 並行驗證整份參考文獻清單（有時間上限）；
+        prefetch=True 時把參考文獻的 DOI / 標題交給背景預先查詢，不等待結果；
+        streaming=True（未指定時檔案超過 streaming_file_size）改用 analyze_document_streaming"""
+        if streaming is None:
+            streaming = os.path.isfile(file_path) and os.path.getsize(file_path) >= self.streaming_file_size
+        if streaming:
+            return self.analyze_document_streaming(file_path, verify_references=verify_references,
+                                                   prefetch=prefetch)
         try:
             doc_text = self._extract_text_from_docx(file_path)
             main_text, references_section = self._separate_text_and_references(doc_text)
             reference_items = self._parse_reference_section(references_section)
             reference_dict = self._generate_citation_formats(reference_items)
-            found_citations = self._find_citations_in_text(main_text)
+            found_citations = self._find_citations_in_text(main_text, reference_dict)
             format_errors = self._check_citation_formats(found_citations, reference_dict)
             missing_references = self._check_missing_references(found_citations, reference_dict)
+            ambiguous_citations = self._check_ambiguous_citations(found_citations, reference_dict)
             citation_status = self._mark_cited_references(found_citations, reference_dict)
-            
-            # 生成檢查摘要
-            total_errors = len(format_errors)
-            total_missing = len(missing_references)
-            total_uncited = sum(1 for ref in citation_status if not ref['cited'])
-            
-            # 判斷整體狀態
-            if total_errors == 0 and total_missing == 0 and total_uncited == 0:
-                overall_status = 'excellent'
-                status_message = '✅ 太棒了！沒有發現任何問題，可以準備投稿了！'
-            elif total_errors + total_missing <= 5 and total_uncited <= 3:
-                overall_status = 'good'
-                status_message = '✅ 整體良好，只有少數問題需要修正。'
-            elif total_errors + total_missing <= 10:
-                overall_status = 'needs_revision'
-                status_message = '⚠️ 發現一些問題，建議修正後再投稿。'
-            else:
-                overall_status = 'needs_major_revision'
-                status_message = '❌ 發現較多問題，需要仔細檢查並修正。'
-            
-            return {
-                'format_errors': format_errors,
-                'missing_references': missing_references,
-                'citation_status': citation_status,
-                'total_references': len(reference_items),
-                'total_citations': len(found_citations),
-                'summary': {
-                    'total_errors': total_errors,
-                    'total_missing': total_missing,
-                    'total_uncited': total_uncited,
-                    'overall_status': overall_status,
-                    'status_message': status_message
-                }
-            }
+            result = self._build_result(format_errors, missing_references, citation_status,
+                                        reference_items, len(found_citations),
+                                        ambiguous_citations=ambiguous_citations)
+            if verify_references:
+                result['reference_verification'] = verify_reference_list(reference_items)
+            elif prefetch:
+                reference_prefetcher.enqueue_references(reference_items)
+            return result
+        except Exception as e:
+            raise Exception(f"文檔分析失敗: {str(e)}")
+
+    def analyze_document_streaming(self, file_path: str, on_finding=None, verify_references: bool = False,
+                                   prefetch: bool = False) -> Dict[str, Any]:
+        """串流模式：先讀參考文獻清單建立索引，再逐段讀入內文、偵測並檢查引用
+
+        不保留整份內文與引用清單，峰值記憶體與參考文獻清單（加上一段內文）成正比，
+        與文件長度無關；結果與 analyze_document 相同。提供 on_finding(kind, finding) 時，
+        每個問題（kind 為 'format_error'、'missing_reference' 或 'ambiguous_citation'）
+        一找到就交給它，結果中不保留這些清單，只在摘要中回報數量。
+        """
+        try:
+            main_paragraphs, references_section = self._stream_sections(file_path)
+            reference_items = self._parse_reference_section(references_section)
+            del references_section
+            reference_dict = self._generate_citation_formats(reference_items)
+            automaton = self._build_surname_automaton(reference_dict) if reference_dict else None
+            for ref in reference_dict.values():
+                ref['cited'] = False
+
+            indexes = {}
+            findings = {'format_error': [], 'missing_reference': [], 'ambiguous_citation': []}
+            counts = dict.fromkeys(findings, 0)
+            total_citations = 0
+            for citations in self._stream_citations(main_paragraphs, automaton):
+                total_citations += len(citations)
+                for kind, found in (
+                        ('format_error', self._check_citation_formats(citations, reference_dict, indexes)),
+                        ('missing_reference', self._check_missing_references(citations, reference_dict, indexes)),
+                        ('ambiguous_citation', self._check_ambiguous_citations(citations, reference_dict, indexes))):
+                    counts[kind] += len(found)
+                    if on_finding is None:
+                        findings[kind].extend(found)
+                    else:
+                        for finding in found:
+                            on_finding(kind, finding)
+                self._mark_cited(citations, reference_dict, indexes)
+
+            result = self._build_result(findings['format_error'], findings['missing_reference'],
+                                        self._citation_status(reference_dict), reference_items, total_citations,
+                                        counts['format_error'], counts['missing_reference'],
+                                        findings['ambiguous_citation'], counts['ambiguous_citation'])
+            if verify_references:
+                result['reference_verification'] = verify_reference_list(reference_items)
+            elif prefetch:
+                reference_prefetcher.enqueue_references(reference_items)
+            return result
         except Exception as e:
             raise Exception(f"文檔分析失敗: {str(e)}")
 
+    def _stream_sections(self, file_path: str) -> Tuple[Iterable[str], str]:
+        """第一次讀取文件找出參考文獻段落，回傳 (內文段落的 iterator, 參考文獻文字)
+
+        切分方式與 _separate_text_and_references 相同：取最後一個參考文獻標題；
+        找不到標題時以 80% 字元位置切分（此時需要再讀一次文件取出參考文獻文字）。
+        標題之後的段落最多暫存 streaming_reference_buffer 字元：較早出現的標題（例如目錄）
+        不會讓整份內文留在記憶體中，超過時改為之後再讀一次、只取最後一個標題之後的段落。
+        """
+        main_count = None     # 內文段落數（最後一個已成立的標題之前）
+        ref_start = None      # 標題之後第一個段落的位置
+        ref_lines = None      # 標題之後的段落；超過暫存上限時為 None
+        ref_chars = 0
+        pending = None        # 標題後面還需要有一段才成立（標題之後要有換行）
+        last_content = -1     # 最後一個非空白段落
+        heading_word = None   # 緊接在已成立標題之後的同一標題不算（regex 已用掉它前面的換行）
+        total_chars = 0
+        for index, paragraph in enumerate(self._iter_docx_paragraphs(file_path)):
+            total_chars += len(paragraph) + (1 if index else 0)
+            if pending is not None:
+                # 新的標題成立：之前暫存的段落都屬於內文，直接丟棄
+                main_count, ref_start, ref_lines, ref_chars = pending, index, [], 0
+                pending = None
+            if ref_lines is not None:
+                ref_lines.append(paragraph)
+                ref_chars += len(paragraph) + 1
+                if ref_chars > self.streaming_reference_buffer:
+                    ref_lines = None
+            stripped = paragraph.strip()
+            if not stripped:
+                continue
+            heading = _REFERENCE_HEADING_RE.match(stripped)
+            word = heading.group(1).casefold() if heading else None
+            if heading and index > 0 and word != heading_word:
+                # 內文到標題前最後一個非空白段落為止（regex 的 \n\s* 包含其間的空白段落）
+                pending = last_content + 1
+                heading_word = word
+            else:
+                heading_word = None
+            last_content = index
+
+        if main_count is not None:
+            if ref_lines is None:
+                ref_lines = islice(self._iter_docx_paragraphs(file_path), ref_start, None)
+            # 標題後的 \s*\n 也包含緊接的空白段落
+            lines = dropwhile(lambda line: not line.strip(), ref_lines)
+            return (islice(self._iter_docx_paragraphs(file_path), main_count), '\n'.join(lines))
+
+        split_point = int(total_chars * 0.8)
+        return (self._iter_text_prefix(file_path, split_point),
+                ''.join(self._iter_text_suffix(file_path, split_point)))
+
+    def _iter_text_prefix(self, file_path: str, limit: int) -> Iterator[str]:
+        """內文（段落以換行連接）前 limit 個字元，逐段產生"""
+        position = 0
+        for paragraph in self._iter_docx_paragraphs(file_path):
+            yield paragraph[:limit - position]
+            position += len(paragraph)
+            if position >= limit:
+                return
+            position += 1  # 段落之間的換行
+
+    def _iter_text_suffix(self, file_path: str, start: int) -> Iterator[str]:
+        """內文從第 start 個字元到結尾的片段"""
+        position = 0
+        for index, paragraph in enumerate(self._iter_docx_paragraphs(file_path)):
+            piece = ('\n' if index else '') + paragraph
+            if position + len(piece) > start:
+                yield piece[max(start - position, 0):]
+            position += len(piece)
+
+    def _iter_docx_paragraphs(self, file_path: str) -> Iterator[str]:
+        """逐段讀取 .docx 本文段落文字（與 python-docx 的 Document.paragraphs 相同）
+
+        以 iterparse 讀取主文件 XML，處理完的段落與其前面的元素（表格等）隨即釋放，
+        也不載入圖片等其他部分。
+        """
+        try:
+            with zipfile.ZipFile(file_path) as package:
+                with package.open(_main_document_part(package)) as stream:
+                    body_tag = qn('w:body')
+                    for _, element in etree.iterparse(stream, events=('end',), tag=qn('w:p'),
+                                                      resolve_entities=False, huge_tree=True):
+                        parent = element.getparent()
+                        if parent is None or parent.tag != body_tag:
+                            continue  # 表格內的段落
+                        yield parse_xml(etree.tostring(element)).text
+                        element.clear()
+                        while element.getprevious() is not None:
+                            del parent[0]
+        except Exception as e:
+            raise Exception(f"無法讀取文檔: {str(e)}")
+
+    def _stream_citations(self, paragraphs: Iterable[str], automaton: SurnameAutomaton = None) -> Iterator[List[Dict[str, Any]]]:
+        """逐段讀入內文，每累積約 streaming_chunk_size 字元就掃描一次，產生該段的引用（已填入章節）
+
+        重疊規則與 _scan_citations_parallel 相同：掃描範圍往前到上一個 ")"、往後到下一個 ")"，
+        只保留起點在本段的引用與章節標題，因此結果與整份掃描相同。為了限制記憶體，前後
+        重疊區最多各 streaming_chunk_size 字元；只有單一引用超過這個長度且中間沒有 ")" 時才會不同。
+        """
+        chunk_size = self.streaming_chunk_size
+        paragraphs = iter(paragraphs)
+        buffer, buffer_start = '', 0   # 尚未丟棄的內文 [buffer_start, buffer_start + len(buffer))
+        own_start = 0
+        headings = []
+        first = True
+        exhausted = False
+
+        def read(parts):
+            nonlocal first, exhausted
+            paragraph = next(paragraphs, None)
+            if paragraph is None:
+                exhausted = True
+                return ''
+            piece = paragraph if first else '\n' + paragraph
+            first = False
+            parts.append(piece)
+            return piece
+
+        while True:
+            parts = [buffer]
+            length = len(buffer)
+            while not exhausted and buffer_start + length - own_start < chunk_size:
+                length += len(read(parts))
+            own_end = buffer_start + length
+            # 往後讀到本段結尾之後出現 ")"
+            lookahead = 0
+            while not exhausted and lookahead < chunk_size:
+                piece = read(parts)
+                lookahead += len(piece)
+                if ')' in piece:
+                    break
+            window = ''.join(parts)
+            window_end = len(window)
+            if buffer_start + window_end > own_end:
+                window_end = window.find(')', own_end - buffer_start) + 1 or window_end
+            scanned = window[:window_end]
+
+            citations = [citation for citation in self._scan_citations(scanned, automaton, buffer_start)
+                         if own_start <= citation['position'] < own_end]
+            headings.extend(heading for heading in self._find_headings(scanned, buffer_start)
+                            if own_start <= heading[1] < own_end)
+            get_section = self._section_locator(headings)
+            for citation in citations:
+                citation['section'] = get_section(int(citation['position']))
+            yield citations
+
+            if exhausted and own_end == buffer_start + len(window):
+                return
+            # 下一段的掃描範圍從本段結尾前最後一個 ")" 開始
+            last_paren = window.rfind(')', 0, own_end - buffer_start)
+            next_start = max(buffer_start + max(last_paren, 0), own_end - chunk_size)
+            buffer = window[next_start - buffer_start:]
+            buffer_start = next_start
+            own_start = own_end
+
+    def _build_result(self, format_errors: list, missing_references: list, citation_status: list,
+                      reference_items: list, total_citations: int,
+                      total_errors: int = None, total_missing: int = None,
+                      ambiguous_citations: list = None, total_ambiguous: int = None) -> Dict[str, Any]:
+        """彙整各階段結果並生成檢查摘要；串流模式不保留問題清單時另外傳入數量"""
+        ambiguous_citations = [] if ambiguous_citations is None else ambiguous_citations
+        total_errors = len(format_errors) if total_errors is None else total_errors
+        total_missing = len(missing_references) if total_missing is None else total_missing
+        total_ambiguous = len(ambiguous_citations) if total_ambiguous is None else total_ambiguous
+        total_uncited = sum(1 for ref in citation_status if not ref['cited'])
+        # 沒寫年份後綴的引用需要修正，與格式問題一起計算
+        total_issues = total_errors + total_missing + total_ambiguous
+        
+        # 判斷整體狀態
+        if total_issues == 0 and total_uncited == 0:
+            overall_status = 'excellent'
+            status_message = '✅ 太棒了！沒有發現任何問題，可以準備投稿了！'
+        elif total_issues <= 5 and total_uncited <= 3:
+            overall_status = 'good'
+            status_message = '✅ 整體良好，只有少數問題需要修正。'
+        elif total_issues <= 10:
+            overall_status = 'needs_revision'
+            status_message = '⚠️ 發現一些問題，建議修正後再投稿。'
+        else:
+            overall_status = 'needs_major_revision'
+            status_message = '❌ 發現較多問題，需要仔細檢查並修正。'
+        
+        return {
+            'format_errors': format_errors,
+            'missing_references': missing_references,
+            'ambiguous_citations': ambiguous_citations,
+            'citation_status': citation_status,
+            'total_references': len(reference_items),
+            # 已附 DOI 的條目：驗證與預先查詢直接以 DOI 查詢，不需標題搜尋
+            'references_with_doi': sum(1 for item in reference_items if item.get('doi')),
+            'total_citations': total_citations,
+            'summary': {
+                'total_errors': total_errors,
+                'total_missing': total_missing,
+                'total_ambiguous': total_ambiguous,
+                'total_uncited': total_uncited,
+                'overall_status': overall_status,
+                'status_message': status_message
+            }
+        }
+
     def _extract_text_from_docx(self, file_path: str) -> str:
+        return '\n'.join(self._extract_paragraphs_from_docx(file_path))
+
+    def _extract_paragraphs_from_docx(self, file_path: str) -> List[str]:
         try:
             doc = Document(file_path)
-            full_text = []
-            for paragraph in doc.paragraphs:
-                full_text.append(paragraph.text)
-            return '\n'.join(full_text)
+            return [paragraph.text for paragraph in doc.paragraphs]
         except Exception as e:
             raise Exception(f"無法讀取文檔: {str(e)}")
 
@@ -116,7 +428,7 @@ class DocumentAnalyzer:
 
     def _parse_reference_section(self, references_text: str) -> List[Dict[str, str]]:
         """
-        解析參考文獻部分，提取每個條目，並嘗試抓出所有作者與年份
+        解析參考文獻部分，提取每個條目的作者、年份、標題、期刊、卷期頁碼與 DOI
         """
         if not references_text.strip():
             return []
@@ -133,24 +445,16 @@ class DocumentAnalyzer:
                 continue
             
             # 跳過常見的標題行
-            if re.match(r'^(References|Reference|參考文獻|参考文献|REFERENCES|Bibliography|Works Cited|Literatur|Bibliographie)$', line, re.IGNORECASE):
+            if _REFERENCE_HEADING_RE.match(line):
                 continue
             
             # 判斷是否是新的參考文獻開始
             # 通常以大寫字母開頭，且符合 "姓, 名縮寫" 或 "姓 (" 的模式
             # 如果當前參考文獻已經有內容且包含年份，且新行看起來是新參考文獻的開頭
-            is_new_reference_start = (
-                re.match(r'^[A-Z][a-zA-Z\-\']+,\s+[A-Z]', line) or  # 匹配 "Last, F."
-                re.match(r'^[A-Z][a-zA-Z\-\']+\s+\(', line) or      # 匹配 "Last ("
-                re.match(r'^[A-Z][a-zA-Z\-\']+,\s+&', line)         # 匹配 "Last, &"
-            )
+            is_new_reference_start = _REFERENCE_START_RE.match(line)
             
-            # 檢查當前參考文獻是否包含年份（支援多種格式）
-            has_year = current_ref and (
-                re.search(r'\(\d{4}\)', current_ref) or  # 括號格式: (2020)
-                re.search(r',\s*\d{4}\.', current_ref) or  # 逗號+年份+句點: , 1998.
-                re.search(r'\s+\d{4}\.', current_ref)      # 空格+年份+句點: 1998.
-            )
+            # 檢查當前參考文獻是否包含年份（與條目解析共用同一個年份判斷）
+            has_year = is_new_reference_start and current_ref and find_year(current_ref)
             
             if is_new_reference_start and has_year:
                 # 上一個參考文獻結束，保存它
@@ -163,163 +467,168 @@ class DocumentAnalyzer:
                 else:
                     current_ref = line
         
-        # 別忘了最後一個（支援多種年份格式）
-        if current_ref and (
-            re.search(r'\(\d{4}\)', current_ref) or
-            re.search(r',\s*\d{4}\.', current_ref) or
-            re.search(r'\s+\d{4}\.', current_ref)
-        ):
+        # 別忘了最後一個
+        if current_ref and find_year(current_ref):
             merged_references.append(current_ref.strip())
         
-        # 解析每個合併後的參考文獻
+        # 解析每個合併後的參考文獻：作者、年份、標題、期刊、DOI 一次取出
         references = []
         for i, line in enumerate(merged_references):
-            # 改良的作者和年份解析
-            # 支援多種年份格式：(2020)、, 1998.、1998.
-            year = None
-            year_match = re.search(r'\((\d{4})\)', line)  # 優先匹配括號格式
-            if year_match:
-                year = year_match.group(1)
-                authors_end_pos = year_match.start()
-            else:
-                # 嘗試匹配其他格式：逗號+年份+句點 或 空格+年份+句點
-                year_match = re.search(r'[,\s](\d{4})\.', line)
-                if year_match:
-                    year = year_match.group(1)
-                    authors_end_pos = year_match.start()
-                else:
-                    continue  # 沒找到年份，跳過這個條目
-            
-            # 獲取年份前的部分作為作者區域
-            authors_part = line[:authors_end_pos].strip()
-            
-            # 解析作者 - 使用更強大的方法
-            authors = []
-            
-            # 方法：尋找 "姓, 名縮寫" 的模式
-            # 支援各種格式：Last, F. M. / Last, F.-M. / Last, Y.-K. 等
-            # 也支援複合姓氏：De Menezes, K. J. / Van der Berg, A. B.
-            # 匹配模式：從開頭到第一個逗號（姓氏），然後是名字縮寫
-            author_pattern = r'([A-Z][a-zA-Z\-\'\s]+?),\s*([A-Z][\.\-\s]*[A-Z]*[\.\s]*[A-Z]*\.?)'
-            
-            matches = re.findall(author_pattern, authors_part)
-            
-            if matches:
-                # 找到完整的 "姓, 名" 格式
-                for last_name, initials in matches:
-                    # 清理姓氏（去除尾部空格）
-                    last_name = last_name.strip()
-                    # 清理名字縮寫
-                    clean_initials = initials.strip().rstrip('.')
-                    if not clean_initials.endswith('.'):
-                        clean_initials += '.'
-                    authors.append(f"{last_name}, {clean_initials}")
-            else:
-                # 備用方法：只提取姓氏
-                # 先移除 "et al." 以避免干擾
-                clean_authors_part = re.sub(r'\bet\s+al\.?', '', authors_part, flags=re.IGNORECASE)
-                
-                # 用 & 和 , 分割
-                parts = re.split(r'[&,]', clean_authors_part)
-                
-                for part in parts:
-                    part = part.strip()
-                    # 找到姓氏（可能是複合姓氏，匹配到逗號、& 或結尾）
-                    # 支援 "De Menezes" 等複合姓氏
-                    match = re.match(r'^([A-Z][a-zA-Z\-\'\s]+?)(?:\s+[A-Z]\.|\s*$)', part)
-                    if match:
-                        last_name = match.group(1).strip().rstrip('.,')
-                        if f"{last_name}," not in [a.split(',')[0] + ',' for a in authors]:
-                            authors.append(f"{last_name},")
-            
-            if authors and year:
-                references.append({
-                    'id': i + 1,
-                    'text': line,
-                    'authors': authors,  # 保留所有作者，不限制數量
-                    'year': year,
-                })
+            entry = parse_reference_entry(line)
+            if entry is None or not entry['authors']:
+                continue  # 沒找到年份或作者，跳過這個條目
+            references.append(dict(entry, id=i + 1, text=line))
+        self._assign_year_suffixes(references)
         return references
 
+    def _assign_year_suffixes(self, references: List[Dict[str, Any]]) -> None:
+        """同一作者清單、同一年份的多篇參考文獻依標題排序補上 a、b、c 年份後綴（APA 7）
+
+        排序一次後逐組處理，O(n log n)。組內已有任何條目寫了後綴時保留原樣；
+        自動補上的條目標記 year_suffix_inferred。
+        """
+        def group_key(ref):
+            return (tuple(surname_key(a.split(",")[0]) for a in ref['authors']), ref['year'])
+
+        keyed = sorted(((group_key(ref), ref['title'].casefold(), i) for i, ref in enumerate(references)
+                        if ref['year'] != 'n.d.'))
+        start = 0
+        while start < len(keyed):
+            end = start
+            while end < len(keyed) and keyed[end][0] == keyed[start][0]:
+                end += 1
+            group = [references[i] for _, _, i in keyed[start:end]]
+            if len(group) > 1 and not any(ref['year_suffix'] for ref in group):
+                for offset, ref in enumerate(group[:26]):
+                    ref['year_suffix'] = chr(ord('a') + offset)
+                    ref['year_suffix_inferred'] = True
+            start = end
+
     def _generate_citation_formats(self, reference_items: list) -> dict:
         """為每個參考文獻產生 Parenthetical/Narrative 格式（用現有 generate_citation_key）"""
         reference_dict = {}
         for item in reference_items:
             meta = {
                 "authors": item.get("authors", []),
-                "year": item.get("year", "")
+                # 年份後綴是比對鍵的一部分：(Smith, 2020a) 與 (Smith, 2020b) 是不同的參考文獻
+                "year": item.get("year", "") + item.get("year_suffix", "")
             }
             citation_keys = generate_citation_key(meta)
+            # 比對用的鍵只在這裡計算一次，之後各階段直接比較
+            author_keys = tuple(surname_key(a.split(",")[0]) for a in meta["authors"])
             reference_dict[item['id']] = {
                 'item': item,
                 'parenthetical': citation_keys['parenthetical'],
                 'narrative': citation_keys['narrative'],
+                'author_keys': author_keys,
+                'first_author_key': author_keys[0] if author_keys else '',
+                # 查表用：第一作者有 ä/ö/ü 時另登記德文拼法（Müller 也對應到 Mueller）
+                'first_author_keys': surname_keys(meta["authors"][0].split(",")[0]) if author_keys else (),
+                'year': meta["year"].strip(),
+                'base_year': item.get("year", "").strip(),
                 'cited': False
             }
         return reference_dict
 
-    def _find_citations_in_text(self, text: str) -> List[Dict[str, str]]:
-        """改良版：能識別括號內多個引用的情況，並記錄所在章節"""
-        citations = []
-        
-        # 檢測章節標題
+    def _find_citations_in_text(self, text: str, reference_dict: Dict[str, Dict[str, Any]] = None) -> List[Dict[str, str]]:
+        """改良版：能識別括號內多個引用的情況，並記錄所在章節；
+        提供 reference_dict 時另以參考文獻姓氏找出多詞姓氏的敘述型引用。
+        內文超過 parallel_threshold 字元時分段以多個 process 掃描，結果與單一 process 相同"""
+        automaton = self._build_surname_automaton(reference_dict) if reference_dict else None
+        if self.parallel_workers > 1 and len(text) >= self.parallel_threshold:
+            citations = self._scan_citations_parallel(text, automaton)
+        else:
+            citations = self._scan_citations(text, automaton)
+        get_section = self._section_locator(self._find_headings(text))
+        for citation in citations:
+            citation['section'] = get_section(int(citation['position']))
+        return citations
+
+    def _find_headings(self, text: str, base: int = 0) -> List[Tuple[int, int, int, str]]:
+        """內文中的章節標題 [(結束位置, 開始位置, 模式順序, 章節名稱)]，位置加上 base"""
+        headings = []
+        for order, (pattern, section_name) in enumerate(_SECTION_PATTERNS):
+            for match in pattern.finditer(text):
+                headings.append((base + match.end(), base + match.start(), order, section_name))
+        return headings
+
+    def _section_locator(self, headings: List[Tuple[int, int, int, str]]):
+        """回傳 position → 所在章節的函式：位置之前最後一個章節標題"""
+        headings = sorted(headings)
+        ends = [heading[0] for heading in headings]
+        # 結束位置在 position 之前的標題中，開始位置最後者（相同時取較前面的模式）
+        best = []
+        current = (-1, 0, 'Document Start')
+        for _, heading_start, order, section_name in headings:
+            if (heading_start, -order) > (current[0], -current[1]):
+                current = (heading_start, order, section_name)
+            best.append(current[2])
+
         def get_section(position: int) -> str:
-            """根據位置判斷所在章節"""
-            text_before = text[:position]
-            
-            # 常見的章節標題模式（支援編號和無編號）
-            section_patterns = [
-                (r'\n\s*\d*\.?\s*Abstract\s*\n', 'Abstract'),
-                (r'\n\s*\d*\.?\s*Introduction\s*\n', 'Introduction'),
-                (r'\n\s*\d*\.?\s*Method[s]?\s*\n', 'Methods'),
-                (r'\n\s*\d*\.?\s*Material[s]?\s+and\s+Method[s]?\s*\n', 'Methods'),
-                (r'\n\s*\d*\.?\s*Result[s]?\s*\n', 'Results'),
-                (r'\n\s*\d*\.?\s*Finding[s]?\s*\n', 'Results'),  # 替代用詞
-                (r'\n\s*\d*\.?\s*Discussion\s*\n', 'Discussion'),
-                (r'\n\s*\d*\.?\s*Conclusion[s]?\s*\n', 'Conclusion'),
-                (r'\n\s*\d*\.?\s*Reference[s]?\s*\n', 'References'),
-                (r'\n\s*\d*\.?\s*Background\s*\n', 'Background'),  # 常見章節
-                (r'\n\s*\d*\.?\s*Experiment[s]?\s*\n', 'Experiments'),
-            ]
-            
-            # 找到最近的章節標題
-            current_section = 'Document Start'
-            last_match_pos = -1
-            
-            for pattern, section_name in section_patterns:
-                matches = list(re.finditer(pattern, text_before, re.IGNORECASE))
-                if matches:
-                    last_match = matches[-1]  # 取最後一個匹配
-                    if last_match.start() > last_match_pos:
-                        last_match_pos = last_match.start()
-                        current_section = section_name
-            
-            return current_section
+            count = bisect_right(ends, position)
+            return best[count - 1] if count else 'Document Start'
+        return get_section
+
+    def _scan_citations_parallel(self, text: str, automaton: SurnameAutomaton = None) -> List[Dict[str, Any]]:
+        """在段落邊界把內文切成多段，各段連同前後重疊區交給 process pool 掃描後依位置合併
+
+        每段的掃描範圍從段落邊界之前最後一個 ")" 開始，到下一段邊界之後第一個 ")" 為止。
+        所有引用樣式都在第一個 ")" 結束，不會跨過 ")"，因此重疊區內的比對與去重結果
+        和整份掃描相同；每段只保留起點在自己範圍內的引用，邊界上不會重複。
+        """
+        bounds = [0]
+        while True:
+            cut = text.find('\n', bounds[-1] + self.parallel_chunk_size)
+            if cut < 0 or cut + 1 >= len(text):
+                break
+            bounds.append(cut + 1)
+        bounds.append(len(text))
+
+        tasks = []
+        for own_start, own_end in zip(bounds, bounds[1:]):
+            window_start = max(text.rfind(')', 0, own_start), 0)
+            window_end = text.find(')', own_end) + 1 or len(text)
+            if own_end == len(text):
+                window_end = own_end
+            tasks.append((text[window_start:window_end], automaton, window_start, own_start, own_end))
+
+        if len(tasks) == 1:
+            return _scan_chunk(tasks[0])
+        citations = []
+        with ProcessPoolExecutor(max_workers=min(self.parallel_workers, len(tasks))) as pool:
+            for chunk_citations in pool.map(_scan_chunk, tasks):
+                citations.extend(chunk_citations)
+        return sorted(citations, key=lambda x: x['position'])
+
+    def _scan_citations(self, text: str, automaton: SurnameAutomaton = None, base: int = 0) -> List[Dict[str, Any]]:
+        """掃描 text 中的所有引用並去除重疊；位置加上 base（text 在整份內文中的起點），
+        章節由呼叫端填入"""
+        citations = []
         
         # 先找所有括號內引用
-        processed_ranges = []  # 記錄已處理的位置範圍，避免重複處理
-        
+        # 記錄已處理的位置範圍，避免重複處理；範圍互不重疊，依起點排序後以二分搜尋檢查
+        processed_starts, processed_ends = [], []
+
+        def is_processed(start, end):
+            i = bisect_left(processed_starts, end)
+            return i > 0 and processed_ends[i - 1] > start
+
         for pattern in self.parenthetical_patterns:
             matches = re.finditer(pattern, text)
             for match in matches:
                 # 檢查這個 match 是否已經被處理過
                 match_start = match.start()
                 match_end = match.end()
-                is_already_processed = False
-                for proc_start, proc_end in processed_ranges:
-                    # 如果有重疊，跳過
-                    if not (match_end <= proc_start or match_start >= proc_end):
-                        is_already_processed = True
-                        break
-                
-                if is_already_processed:
+                # 如果有重疊，跳過
+                if is_processed(match_start, match_end):
                     continue
                 
                 # 標記這個範圍為已處理
-                processed_ranges.append((match_start, match_end))
+                i = bisect_left(processed_starts, match_start)
+                processed_starts.insert(i, match_start)
+                processed_ends.insert(i, match_end)
                 
                 citation_text = match.group()
-                section = get_section(match.start())
                 
                 # 檢查是否包含分號（表示多個引用）
                 if ';' in citation_text:
@@ -338,14 +647,14 @@ class DocumentAnalyzer:
                         if part and re.search(r'\d{4}', part):
                             # 為每個部分計算不同的位置偏移，避免去重時被誤刪
                             # 使用微小的位置偏移（0.1, 0.2, ...）來區分同一括號內的多個引用
-                            position_offset = match.start() + (i * 0.1)
+                            position_offset = base + match.start() + (i * 0.1)
                             citation_dict = {
                                 'text': f"({part})",
                                 'original_text': part,
                                 'type': 'parenthetical',
                                 'position': position_offset,  # 使用偏移後的位置
-                                'end_position': match.end(),
-                                'section': section,
+                                'end_position': base + match.end(),
+                                'section': None,
                                 'has_parentheses': True,
                                 'from_multi_citation': True,  # 標記來自多重引用
                                 'original_multi_citation': citation_text  # 保存原始多重引用文本
@@ -368,18 +677,18 @@ class DocumentAnalyzer:
                             'text': f"({author_part}, {year1})",
                             'original_text': citation_text,  # 保留原始錯誤格式
                             'type': 'parenthetical',
-                            'position': match.start(),
-                            'end_position': match.end(),
-                            'section': section,
+                            'position': base + match.start(),
+                            'end_position': base + match.end(),
+                            'section': None,
                             'has_parentheses': True
                         })
                         citations.append({
                             'text': f"({author_part}, {year2})",
                             'original_text': citation_text,  # 保留原始錯誤格式
                             'type': 'parenthetical',
-                            'position': match.start(),
-                            'end_position': match.end(),
-                            'section': section,
+                            'position': base + match.start(),
+                            'end_position': base + match.end(),
+                            'section': None,
                             'has_parentheses': True
                         })
                     else:
@@ -388,9 +697,9 @@ class DocumentAnalyzer:
                             'text': citation_text,
                             'original_text': citation_text,
                             'type': 'parenthetical',
-                            'position': match.start(),
-                            'end_position': match.end(),
-                            'section': section,
+                            'position': base + match.start(),
+                            'end_position': base + match.end(),
+                            'section': None,
                             'has_parentheses': True
                         })
         
@@ -401,18 +710,11 @@ class DocumentAnalyzer:
                 # 檢查是否已經被 parenthetical patterns 處理過
                 match_start = match.start()
                 match_end = match.end()
-                is_already_processed = False
-                for proc_start, proc_end in processed_ranges:
-                    # 如果有重疊，跳過（因為已經被正常的 parenthetical pattern 處理了）
-                    if not (match_end <= proc_start or match_start >= proc_end):
-                        is_already_processed = True
-                        break
-                
-                if is_already_processed:
+                # 如果有重疊，跳過（因為已經被正常的 parenthetical pattern 處理了）
+                if is_processed(match_start, match_end):
                     continue
                 
                 citation_text = match.group()
-                section = get_section(match.start())
                 
                 # 添加左括號來標準化
                 normalized_text = f"({citation_text}"
@@ -421,9 +723,9 @@ class DocumentAnalyzer:
                     'text': normalized_text,  # 標準化後的文字
                     'original_text': citation_text,  # 原始文字（缺左括號）
                     'type': 'parenthetical',
-                    'position': match.start(),
-                    'end_position': match.end(),
-                    'section': section,
+                    'position': base + match.start(),
+                    'end_position': base + match.end(),
+                    'section': None,
                     'has_parentheses': False,  # 標記為缺括號
                     'malformed': True  # 標記為格式錯誤
                 })
@@ -432,62 +734,80 @@ class DocumentAnalyzer:
         for pattern in self.narrative_patterns:
             matches = re.finditer(pattern, text)
             for match in matches:
-                section = get_section(match.start())
                 citation_text = match.group()
                 citations.append({
                     'text': citation_text,
                     'original_text': citation_text,
                     'type': 'narrative',
-                    'position': match.start(),
-                    'end_position': match.end(),  # 添加結束位置
-                    'section': section,
+                    'position': base + match.start(),
+                    'end_position': base + match.end(),  # 添加結束位置
+                    'section': None,
                     'has_parentheses': True
                 })
         
+        # 以參考文獻姓氏自動機找敘述型引用：Van der Berg (2020)、De Menezes et al. (2016)
+        if automaton is not None:
+            # 已被上面的 regex 完整找到的（同一結尾、起點不更前面）不重複加入
+            narrative_starts = {}
+            for citation in citations:
+                if citation['type'] == 'narrative':
+                    end = citation['end_position']
+                    narrative_starts[end] = min(citation['position'], narrative_starts.get(end, end))
+            for start, end in self._find_known_author_citations(text, automaton):
+                if narrative_starts.get(base + end, base + len(text)) <= base + start:
+                    continue
+                citation_text = text[start:end]
+                citations.append({
+                    'text': citation_text,
+                    'original_text': citation_text,
+                    'type': 'narrative',
+                    'position': base + start,
+                    'end_position': base + end,
+                    'section': None,
+                    'has_parentheses': True
+                })
+
         # 智能去重：處理重疊的引用（保留較長的）
         citations = sorted(citations, key=lambda x: (x['position'], -len(x['text'])))  # 先按位置，再按長度倒序
         
+        # 依位置處理，因此只需要和結束位置在目前起點之後的已選引用比較
         unique_citations = []
-        for i, citation in enumerate(citations):
+        active = []  # 仍可能與後面引用重疊的已選引用（依選擇順序，不含多重引用）
+        for citation in citations:
             # 如果是來自多重引用（分號分隔），不需要去重檢查
             if citation.get('from_multi_citation', False):
                 unique_citations.append(citation)
                 continue
             
-            # 檢查是否與已選擇的引用重疊
-            is_overlapping = False
-            for selected in unique_citations:
-                # 跳過多重引用的比對
-                if selected.get('from_multi_citation', False):
+            # 檢查是否與已選擇的引用重疊（有交集）
+            current_start = citation['position']
+            active = [selected for selected in active if selected['end_position'] > current_start]
+            if active:
+                selected = active[0]
+                # 保留較長的引用
+                if len(citation['text']) > len(selected['text']):
+                    # 新的更長，移除舊的
+                    unique_citations.remove(selected)
+                    active.remove(selected)
+                else:
+                    # 舊的更長或相等，跳過新的
                     continue
-                
-                # 檢查位置範圍是否重疊
-                selected_start = selected['position']
-                selected_end = selected.get('end_position', selected_start + len(selected['text']))
-                current_start = citation['position']
-                current_end = citation.get('end_position', current_start + len(citation['text']))
-                
-                # 如果重疊（有交集）
-                if not (current_end <= selected_start or current_start >= selected_end):
-                    # 保留較長的引用
-                    if len(citation['text']) > len(selected['text']):
-                        # 新的更長，移除舊的
-                        unique_citations.remove(selected)
-                        break  # 跳出內層循環，添加新的
-                    else:
-                        # 舊的更長或相等，跳過新的
-                        is_overlapping = True
-                        break
             
-            if not is_overlapping:
-                unique_citations.append(citation)
+            unique_citations.append(citation)
+            active.append(citation)
         
         # 最後按位置排序
         unique_citations = sorted(unique_citations, key=lambda x: x['position'])
         return unique_citations
 
-    def _check_citation_formats(self, citations: List[Dict[str, str]], reference_dict: Dict[str, Dict[str, Any]]) -> List[Dict[str, str]]:
+    def _check_citation_formats(self, citations: List[Dict[str, str]], reference_dict: Dict[str, Dict[str, Any]],
+                                indexes: Dict[str, Any] = None) -> List[Dict[str, str]]:
+        """indexes：同一份參考文獻分批檢查時共用的索引快取"""
         format_errors = []
+        indexes = {} if indexes is None else indexes
+        if 'keys' not in indexes:
+            indexes['keys'] = self._reference_key_index(reference_dict)
+        key_index = indexes['keys']
         for citation in citations:
             citation_text = citation['text']
             citation_type = citation['type']
@@ -496,47 +816,34 @@ class DocumentAnalyzer:
             
             # 檢查作者數量是否與參考文獻匹配
             # 提取引用中的作者和年份
-            citation_info = self._extract_author_year_from_citation(citation_text)
-            citation_author = citation_info.get('author', '').lower().strip()
-            citation_year = citation_info.get('year', '').strip()
+            citation_author, citation_year = self._citation_match_key(citation)
             
             if citation_author and citation_year:
-                # 尋找匹配的參考文獻
-                for ref_id, ref_data in reference_dict.items():
-                    ref_authors = ref_data['item'].get('authors', [])
-                    ref_year = ref_data['item'].get('year', '').strip()
+                # 尋找匹配的參考文獻（第一作者 + 年份，直接查表）
+                matches = self._references_for_citation(key_index, citation)
+                if matches:
+                    ref_data = reference_dict[matches[0]]
+                    # 檢查作者數量是否正確
+                    num_ref_authors = len(ref_data['author_keys'])
                     
-                    if not ref_authors or not ref_year:
-                        continue
+                    # 檢查引用中是否使用了 et al.
+                    has_et_al = 'et al.' in citation_text
                     
-                    # 提取第一作者的 last name
-                    first_ref_author = ref_authors[0].split(",")[0].lower().strip()
+                    # 檢查引用中是否有兩位作者（使用 & 或 and）
+                    has_two_authors = bool(re.search(r'&|and', citation_text, re.IGNORECASE))
                     
-                    # 如果第一作者和年份匹配
-                    if citation_author == first_ref_author and citation_year == ref_year:
-                        # 檢查作者數量是否正確
-                        num_ref_authors = len(ref_authors)
-                        
-                        # 檢查引用中是否使用了 et al.
-                        has_et_al = 'et al.' in citation_text
-                        
-                        # 檢查引用中是否有兩位作者（使用 & 或 and）
-                        has_two_authors = bool(re.search(r'&|and', citation_text, re.IGNORECASE))
-                        
-                        # APA 7 規則：3 位或以上作者必須使用 et al.
-                        if num_ref_authors >= 3:
-                            if not has_et_al:
-                                # 檢查是否錯誤地列出了兩位作者
-                                if has_two_authors:
-                                    error_messages.append(f'APA 7 格式中，3 位或以上作者應使用 "et al."，建議改為: {ref_data["parenthetical"]}')
-                                else:
-                                    error_messages.append(f'APA 7 格式中，3 位或以上作者應使用 "et al."，建議改為: {ref_data["parenthetical"]}')
-                        # APA 7 規則：2 位作者必須列出兩位
-                        elif num_ref_authors == 2:
-                            if has_et_al:
-                                error_messages.append(f'APA 7 格式中，2 位作者應列出兩位作者名，建議改為: {ref_data["parenthetical"]}')
-                        
-                        break  # 找到匹配的參考文獻，停止搜索
+                    # APA 7 規則：3 位或以上作者必須使用 et al.
+                    if num_ref_authors >= 3:
+                        if not has_et_al:
+                            # 檢查是否錯誤地列出了兩位作者
+                            if has_two_authors:
+                                error_messages.append(f'APA 7 格式中，3 位或以上作者應使用 "et al."，建議改為: {ref_data["parenthetical"]}')
+                            else:
+                                error_messages.append(f'APA 7 格式中，3 位或以上作者應使用 "et al."，建議改為: {ref_data["parenthetical"]}')
+                    # APA 7 規則：2 位作者必須列出兩位
+                    elif num_ref_authors == 2:
+                        if has_et_al:
+                            error_messages.append(f'APA 7 格式中，2 位作者應列出兩位作者名，建議改為: {ref_data["parenthetical"]}')
             
             # 檢查括號完整性
             if citation.get('malformed', False):
@@ -600,7 +907,7 @@ class DocumentAnalyzer:
                         error_messages.append('Parenthetical citation 應該有括號')
                         
             elif citation_type == 'narrative':
-                if re.match(r'[A-Za-z]+.*\(\d{4}\)', citation_text):
+                if re.match(rf'{LETTER}+.*\(\d{{4}}[a-z]?\)', citation_text):
                     is_valid_format = True
             
             # 如果有任何錯誤訊息，加入錯誤列表
@@ -620,18 +927,22 @@ class DocumentAnalyzer:
                 })
         return format_errors
 
-    def _check_missing_references(self, citations: List[Dict[str, str]], reference_dict: Dict[str, Dict[str, Any]]) -> List[Dict[str, str]]:
-        """改良版：使用模糊比對（第一作者 last name + 年份）來減少誤報"""
+    def _check_missing_references(self, citations: List[Dict[str, str]], reference_dict: Dict[str, Dict[str, Any]],
+                                  indexes: Dict[str, Any] = None) -> List[Dict[str, str]]:
+        """改良版：使用模糊比對（第一作者 last name + 年份）來減少誤報；
+        indexes：同一份參考文獻分批檢查時共用的索引快取"""
         missing_references = []
+        indexes = {} if indexes is None else indexes
+        if 'keys' not in indexes:
+            indexes['keys'] = self._reference_key_index(reference_dict)
+        key_index = indexes['keys']
         
         for citation in citations:
             citation_text = citation['text']
             original_text = citation.get('original_text', citation_text)
             
             # 從 citation 中提取第一作者和年份
-            citation_info = self._extract_author_year_from_citation(citation_text)
-            citation_author = citation_info.get('author', '').lower().strip()
-            citation_year = citation_info.get('year', '').strip()
+            citation_author, citation_year = self._citation_match_key(citation)
             
             if not citation_author or not citation_year:
                 # 無法提取作者或年份，但仍然嘗試精確比對
@@ -650,55 +961,50 @@ class DocumentAnalyzer:
                     })
                 continue
             
-            # 在 reference_dict 中尋找匹配的項目
-            matching_refs = []
-            for ref_id, ref_data in reference_dict.items():
-                ref_authors = ref_data['item'].get('authors', [])
-                ref_year = ref_data['item'].get('year', '').strip()
-                
-                if not ref_authors or not ref_year:
-                    continue
-                
-                # 提取第一作者的 last name
-                first_ref_author = ref_authors[0].split(",")[0].lower().strip()
-                
-                # 比對第一作者 + 年份
-                if citation_author == first_ref_author and citation_year == ref_year:
-                    matching_refs.append((ref_id, ref_data))
+            # 以第一作者 + 年份（含後綴）直接查表
+            matching_refs = [(ref_id, reference_dict[ref_id])
+                             for ref_id in self._references_for_citation(key_index, citation)]
             
             # 判斷結果
-            if len(matching_refs) == 0:
+            if self._is_ambiguous_match(matching_refs, citation_year):
+                # 引用沒寫後綴，但同一作者同一年有多篇 (2020a, 2020b)：參考文獻存在，
+                # 由 _check_ambiguous_citations 提示加上後綴
+                pass
+            elif len(matching_refs) == 0:
                 # 完全沒找到 → 可能是缺少參考文獻，或是作者數量不匹配
                 # 檢查是否有相同年份但不同作者的參考文獻（可能是只寫了部分作者）
                 suggestion = None
                 for ref_id, ref_data in reference_dict.items():
-                    ref_authors = ref_data['item'].get('authors', [])
-                    ref_year = ref_data['item'].get('year', '').strip()
-                    
-                    # 檢查年份是否匹配
-                    if ref_year == citation_year:
-                        # 檢查引用中的作者是否出現在參考文獻的作者列表中（任一位置）
-                        for ref_author in ref_authors:
-                            ref_author_last = ref_author.split(",")[0].lower().strip()
-                            if citation_author == ref_author_last:
-                                # 找到了！但不是第一作者
-                                # 這可能表示引用格式錯誤（遺漏了其他作者）
-                                suggestion = f"可能應該是: {ref_data['parenthetical']}"
-                                break
-                    if suggestion:
+                    # 檢查年份是否匹配，且引用中的作者出現在參考文獻的作者列表中（任一位置）
+                    if ref_data['year'] == citation_year and citation_author in ref_data['author_keys']:
+                        # 找到了！但不是第一作者
+                        # 這可能表示引用格式錯誤（遺漏了其他作者）
+                        suggestion = f"可能應該是: {ref_data['parenthetical']}"
                         break
                 
+                # 姓氏可能拼錯（Lopes / López）：以模糊索引找出最接近的參考文獻
+                did_you_mean = []
+                if not suggestion:
+                    # 第一次找不到參考文獻時才建立
+                    if 'surnames' not in indexes:
+                        indexes['surnames'] = self._build_surname_index(reference_dict)
+                    did_you_mean = self._did_you_mean(indexes['surnames'], reference_dict,
+                                                      citation_author, citation_year)
+                    if did_you_mean:
+                        suggestion = f"可能應該是: {did_you_mean[0]}"
+                
                 missing_references.append({
                     'citation': citation_text,
                     'type': citation['type'],
                     'section': citation.get('section', 'Unknown'),
-                    'suggestion': suggestion  # 添加建議
+                    'suggestion': suggestion,  # 添加建議
+                    'did_you_mean': did_you_mean
                 })
             elif len(matching_refs) == 1:
                 # 只找到一個 → 確定是這個 reference，不需要進一步比對
                 pass
             else:
-                # 找到多個（同一作者同一年有多篇）
+                # 找到多個（同一第一作者、同一年份但作者清單不同，例如 Smith & Lee / Smith & Wang）
                 # 這時需要更精確的比對，使用原來的字串匹配邏輯
                 found_exact_match = False
                 
@@ -739,6 +1045,104 @@ class DocumentAnalyzer:
         
         return missing_references
 
+    def _check_ambiguous_citations(self, citations: List[Dict[str, str]], reference_dict: Dict[str, Dict[str, Any]],
+                                   indexes: Dict[str, Any] = None) -> List[Dict[str, str]]:
+        """沒寫年份後綴、但同一作者同一年有多篇 (2020a, 2020b) 的引用：無法判斷是哪一篇
+
+        這些參考文獻都存在（也都標記為已引用），因此不算缺少參考文獻，另外列出請作者補上後綴。
+        indexes：同一份參考文獻分批檢查時共用的索引快取
+        """
+        ambiguous_citations = []
+        indexes = {} if indexes is None else indexes
+        if 'keys' not in indexes:
+            indexes['keys'] = self._reference_key_index(reference_dict)
+        key_index = indexes['keys']
+        for citation in citations:
+            citation_author, citation_year = self._citation_match_key(citation)
+            if not citation_author or not citation_year:
+                continue
+            matching_refs = [(ref_id, reference_dict[ref_id])
+                             for ref_id in self._references_for_citation(key_index, citation)]
+            if self._is_ambiguous_match(matching_refs, citation_year):
+                options = [ref_data['parenthetical'] for _, ref_data in matching_refs]
+                ambiguous_citations.append({
+                    'citation': citation['text'],
+                    'type': citation['type'],
+                    'section': citation.get('section', 'Unknown'),
+                    'error': f"同一作者同一年有多篇，請加上年份後綴: {'、'.join(options)}",
+                    'did_you_mean': options
+                })
+        return ambiguous_citations
+
+    def _is_ambiguous_match(self, matching_refs: list, citation_year: str) -> bool:
+        """找到多篇且都是以不含後綴的年份對到（引用沒寫後綴）"""
+        return len(matching_refs) > 1 and all(ref_data['year'] != citation_year for _, ref_data in matching_refs)
+
+    def _reference_key_index(self, reference_dict: Dict[str, Dict[str, Any]]) -> Tuple[dict, dict]:
+        """(第一作者比對鍵, 年份) → 參考文獻 id list 的查表
+
+        第一個 dict 以含後綴的年份為鍵；第二個以不含後綴的年份收錄有後綴的條目，
+        讓沒寫後綴的引用仍能找到候選。
+        """
+        exact, by_base_year = {}, {}
+        for ref_id, ref_data in reference_dict.items():
+            if not ref_data['first_author_key'] or not ref_data['year']:
+                continue
+            for author in ref_data['first_author_keys']:
+                exact.setdefault((author, ref_data['year']), []).append(ref_id)
+                if ref_data['year'] != ref_data['base_year']:
+                    by_base_year.setdefault((author, ref_data['base_year']), []).append(ref_id)
+        return exact, by_base_year
+
+    def _lookup_references(self, key_index: Tuple[dict, dict], author: str, year: str) -> list:
+        exact, by_base_year = key_index
+        return exact.get((author, year)) or by_base_year.get((author, year), [])
+
+    def _references_for_citation(self, key_index: Tuple[dict, dict], citation: Dict[str, Any]) -> list:
+        """引用對應的參考文獻 id list；引用姓氏有 ä/ö/ü 時標準鍵找不到再以德文拼法查"""
+        citation_author, citation_year = self._citation_match_key(citation)
+        matches = self._lookup_references(key_index, citation_author, citation_year)
+        if not matches and citation.get('umlaut_key'):
+            matches = self._lookup_references(key_index, citation['umlaut_key'], citation_year)
+        return matches
+
+    def _build_surname_index(self, reference_dict: Dict[str, Dict[str, Any]]) -> SurnameIndex:
+        """以每篇參考文獻的第一作者姓氏建立模糊索引（每份文件建立一次）"""
+        index = SurnameIndex()
+        for ref_id, ref_data in reference_dict.items():
+            if ref_data['first_author_key']:
+                index.add(ref_data['first_author_key'], ref_id)
+        return index
+
+    def _did_you_mean(self, surname_index: SurnameIndex, reference_dict: Dict[str, Dict[str, Any]],
+                      citation_author: str, citation_year: str, limit: int = 3) -> List[str]:
+        """編輯距離內最接近的參考文獻 citation；距離相同時年份相符者優先"""
+        candidates = []
+        for distance, _, ref_ids in surname_index.search(citation_author):
+            for ref_id in ref_ids:
+                ref_data = reference_dict[ref_id]
+                same_year = ref_data['year'] == citation_year
+                candidates.append((distance, not same_year, ref_data['parenthetical']))
+        candidates.sort()
+        return [parenthetical for _, _, parenthetical in candidates[:limit]]
+
+    def _build_surname_automaton(self, reference_dict: Dict[str, Dict[str, Any]]) -> SurnameAutomaton:
+        """以每篇參考文獻所有作者的完整姓氏（含介系詞）建立自動機（每份文件建立一次）"""
+        automaton = SurnameAutomaton()
+        for ref_id, ref_data in reference_dict.items():
+            for author in ref_data['item'].get('authors', []):
+                automaton.add(author.split(',')[0], ref_id)
+        return automaton
+
+    def _find_known_author_citations(self, text: str, automaton: SurnameAutomaton) -> List[Tuple[int, int]]:
+        """一次掃描內文找出「已知姓氏 + (年份)」的位置 [(start, end)]"""
+        spans = []
+        for start, end, _ in automaton.find_all(text):
+            tail = _NARRATIVE_TAIL_RE.match(text, end)
+            if tail:
+                spans.append((start, tail.end()))
+        return spans
+
     def _exact_citation_match(self, citation_text: str, original_text: str, ref_data: Dict[str, Any]) -> bool:
         """精確匹配引用和參考文獻（用於無法提取作者年份的情況）"""
         def normalize_citation(text):
@@ -776,57 +1180,61 @@ class DocumentAnalyzer:
         for ref in reference_dict.values():
             ref['cited'] = False
         
-        # 對每個 reference，檢查其 citation key 是否出現在 citations 中
-        for ref_id, ref_data in reference_dict.items():
-            parenthetical = ref_data['parenthetical']
-            narrative = ref_data['narrative']
-            
-            # 提取參考文獻的第一作者和年份
-            ref_authors = ref_data['item'].get('authors', [])
-            ref_year = ref_data['item'].get('year', '').strip()
-            
-            if not ref_authors or not ref_year:
+        self._mark_cited(citations, reference_dict)
+        return self._citation_status(reference_dict)
+
+    def _mark_cited(self, citations: list, reference_dict: dict, indexes: Dict[str, Any] = None) -> None:
+        """把 citations 引用到的參考文獻標記為 cited（可分批呼叫）
+
+        以引用預先計算的 (第一作者, 年份) 直接查表；沒寫後綴的引用同時標記 2020a / 2020b。
+        無法取出作者或年份的引用才以引用文字與 parenthetical / narrative 比對。
+        indexes：同一份參考文獻分批標記時共用的索引快取
+        """
+        indexes = {} if indexes is None else indexes
+        if 'keys' not in indexes:
+            indexes['keys'] = self._reference_key_index(reference_dict)
+        exact, by_base_year = indexes['keys']
+        
+        for citation in citations:
+            citation_author, citation_year = self._citation_match_key(citation)
+            if citation_author and citation_year:
+                for author in (citation_author, citation.get('umlaut_key')):
+                    key = (author, citation_year)
+                    for ref_id in exact.get(key, []) + by_base_year.get(key, []):
+                        reference_dict[ref_id]['cited'] = True
                 continue
             
-            first_ref_author = ref_authors[0].split(",")[0].lower().strip()
-            
-            # 移除括號和標準化格式以便比對
-            def normalize(text):
-                text = text.replace('(', '').replace(')', '')
-                text = ' '.join(text.split())  # 標準化空白
-                text = text.lower()
-                return text
-            
-            parenthetical_norm = normalize(parenthetical)
-            narrative_norm = normalize(narrative)
-            
-            # 檢查是否有任何 citation 匹配
-            for citation in citations:
-                citation_norm = normalize(citation['text'])
-                
-                # 方法 1: 精確比對（忽略 & 和 and 的差異）
-                def exact_matches(key_norm, cit_norm):
-                    if key_norm == cit_norm:
-                        return True
-                    # 嘗試 & <-> and 轉換
-                    key_with_and = key_norm.replace('&', 'and')
-                    key_with_amp = key_norm.replace(' and ', ' & ')
-                    if key_with_and == cit_norm or key_with_amp == cit_norm:
-                        return True
-                    return False
-                
-                # 方法 2: 模糊匹配（第一作者 + 年份）
-                citation_info = self._extract_author_year_from_citation(citation['text'])
-                citation_author = citation_info.get('author', '').lower().strip()
-                citation_year = citation_info.get('year', '').strip()
-                
-                fuzzy_match = (citation_author == first_ref_author and citation_year == ref_year)
-                
-                if exact_matches(parenthetical_norm, citation_norm) or exact_matches(narrative_norm, citation_norm) or fuzzy_match:
-                    ref_data['cited'] = True
-                    break
+            # 精確比對（忽略括號、空白、大小寫以及 & 和 and 的差異）
+            if 'strings' not in indexes:
+                indexes['strings'] = self._reference_string_index(reference_dict)
+            for ref_id in indexes['strings'].get(self._normalize_citation_text(citation['text']), []):
+                reference_dict[ref_id]['cited'] = True
         
-        # 回傳狀態
+        # DOI 是參考文獻的精確識別：同一 DOI 重複列出的條目視為同一篇，引用狀態一致
+        cited_dois = {ref['item']['doi'].lower() for ref in reference_dict.values()
+                      if ref['cited'] and ref['item'].get('doi')}
+        for ref in reference_dict.values():
+            if ref['item'].get('doi', '').lower() in cited_dois:
+                ref['cited'] = True
+
+    def _normalize_citation_text(self, text: str) -> str:
+        """移除括號、標準化空白並轉小寫"""
+        return ' '.join(text.replace('(', '').replace(')', '').split()).lower()
+
+    def _reference_string_index(self, reference_dict: Dict[str, Dict[str, Any]]) -> Dict[str, list]:
+        """標準化的 parenthetical / narrative（含 & 與 and 互換的寫法）→ 參考文獻 id list"""
+        index = {}
+        for ref_id, ref_data in reference_dict.items():
+            if not ref_data['first_author_key'] or not ref_data['year']:
+                continue
+            for citation_format in (ref_data['parenthetical'], ref_data['narrative']):
+                key = self._normalize_citation_text(citation_format)
+                for variant in {key, key.replace('&', 'and'), key.replace(' and ', ' & ')}:
+                    index.setdefault(variant, []).append(ref_id)
+        return index
+
+    def _citation_status(self, reference_dict: dict) -> list:
+        """每篇參考文獻的引用狀態"""
         citation_status = []
         for ref in reference_dict.values():
             # 格式化作者顯示
@@ -835,9 +1243,10 @@ class DocumentAnalyzer:
             citation_status.append({
                 'reference': ref['item']['text'],
                 'authors_display': authors_display,
-                'year': ref['item'].get('year', ''),
+                'year': ref['year'],
                 'parenthetical': ref['parenthetical'],
                 'narrative': ref['narrative'],
+                'doi': ref['item'].get('doi', ''),
                 'cited': ref['cited']
             })
         return citation_status
@@ -848,11 +1257,14 @@ class DocumentAnalyzer:
         clean_text = citation_text.strip()
         
         # 尋找年份
-        year_match = re.search(r'(\d{4})', clean_text)
+        year_match = re.search(r'(\d{4})([a-z](?![a-z]))?', clean_text)
         year = year_match.group(1) if year_match else ""
+        year_suffix = (year_match.group(2) or "") if year_match else ""
         
         # 提取作者部分
         author = ""
+        author_key = ""
+        author_umlaut_key = None
         if year:
             # 對於括號內引用 (Author, 2024) 或 (Author et al., 2024)
             if clean_text.startswith('(') and clean_text.endswith(')'):
@@ -864,7 +1276,7 @@ class DocumentAnalyzer:
                 else:
                     author_part = ""
             # 對於缺少左括號的引用 Author et al., 2024) 
-            elif clean_text.endswith(')') and not clean_text.startswith('('):
+            elif clean_text.endswith(')') and '(' not in clean_text:
                 # 移除右括號
                 inner = clean_text[:-1]
                 # 找到年份前的部分
@@ -915,31 +1327,39 @@ class DocumentAnalyzer:
                 # 移除尾部的標點（再次清理）
                 author_part = author_part.rstrip(',;.& ')
                 
-                # 提取第一個有效的作者姓氏（大寫字母開頭的單詞，支援連字號）
-                author_match = re.search(r'^([A-Z][a-zA-Z\-\']+)', author_part.strip())
+                # 提取第一個有效的作者姓氏（大寫字母開頭的單詞，支援連字號與重音符號）
+                author_match = _CITATION_AUTHOR_RE.search(author_part.strip())
                 if author_match:
                     author = author_match.group(1).rstrip('.,')
+                    # 比對鍵取完整姓氏（含 De / van der 等介系詞）
+                    author_key = surname_key(author_part)
+                    author_umlaut_key = umlaut_key(author_part)
         
-        return {'author': author, 'year': year}
+        return {'author': author, 'year': year, 'year_suffix': year_suffix, 'author_key': author_key,
+                'umlaut_key': author_umlaut_key}
+
+    def _citation_match_key(self, citation: Dict[str, Any]) -> Tuple[str, str]:
+        """引用的 (第一作者比對鍵, 年份含後綴)，計算一次後存在 citation 中供各階段共用"""
+        key = citation.get('match_key')
+        if key is None:
+            info = self._extract_author_year_from_citation(citation['text'])
+            key = citation['match_key'] = (info['author_key'], info['year'] + info['year_suffix'])
+            if info['umlaut_key']:
+                citation['umlaut_key'] = info['umlaut_key']
+        return key
 
     def _citation_matches_reference(self, citation_info: Dict[str, str], ref_data: Dict[str, Any]) -> bool:
         """改良版：與 generate_citation_key 邏輯一致的比對"""
-        citation_author = citation_info.get('author', '').lower().strip()
-        citation_year = citation_info.get('year', '').strip()
+        citation_author = citation_info.get('author_key', '')
+        citation_year = citation_info.get('year', '').strip() + citation_info.get('year_suffix', '')
         
-        ref_authors = ref_data['item'].get('authors', [])
-        ref_year = ref_data['item'].get('year', '').strip()
-        
-        # 年份必須完全匹配
-        if citation_year != ref_year:
+        # 年份（含後綴）必須完全匹配
+        if citation_year != ref_data['year']:
             return False
         
-        # 作者比對：使用與 generate_citation_key 相同的邏輯
-        if citation_author and ref_authors:
-            # 使用與 generate_citation_key 相同的方式提取第一作者姓氏
-            first_ref_author = ref_authors[0].split(",")[0].lower().strip()
-            
-            # 比對第一作者的姓氏
-            return citation_author == first_ref_author
+        # 作者比對：比較預先計算的第一作者姓氏比對鍵
+        if citation_author and ref_data['first_author_key']:
+            return (citation_author in ref_data['first_author_keys']
+                    or citation_info.get('umlaut_key') in ref_data['first_author_keys'])
         
         return False
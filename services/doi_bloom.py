@@ -0,0 +1,195 @@
+"""
+已知 DOI 的 Bloom filter：在送出 CrossRef 請求前快速排除確定不存在的 DOI
+
+filter 以 memory-mapped 檔案載入，查詢只讀取 k 個 byte，不需把整個檔案讀進記憶體。
+「不在 filter 裡」代表 DOI 不在建立 filter 用的清單中；清單應涵蓋所有需要查詢的
+已註冊 DOI（例如 CrossRef 的完整 DOI 清單），否則清單外的合法 DOI 會被判定為不存在。
+
+建立 filter：
+    python -m services.doi_bloom dois.txt --fp-rate 0.001 --output cache/doi_bloom.bin
+    python -m services.doi_bloom --from-index cache/crossref_local.sqlite3
+"""
+import argparse
+import hashlib
+import math
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+
+from .metadata_cache import canonical_doi
+
+_DEFAULT_BLOOM_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   "cache", "doi_bloom.bin")
+# 設為空字串即停用 Bloom filter
+DOI_BLOOM_PATH = os.environ.get("CROSSREF_DOI_BLOOM", _DEFAULT_BLOOM_PATH)
+DEFAULT_FP_RATE = 0.001
+
+_MAGIC = b"DOIBLOOM"
+_VERSION = 1
+# magic, version, 位元數 m, hash 數 k, 建立時的項目數 n, 目標誤判率
+_HEADER = struct.Struct("<8sIQIQd")
+
+
+def optimal_parameters(n, fp_rate):
+    """依項目數與目標誤判率算出位元數 m 與 hash 數 k"""
+    n = max(1, n)
+    m = max(8, math.ceil(-n * math.log(fp_rate) / (math.log(2) ** 2)))
+    k = max(1, round(m / n * math.log(2)))
+    return m, k
+
+
+def _hashes(doi):
+    """double hashing 的兩個 64-bit 值（一次 blake2b）；第 i 個位置為 (h1 + i * h2) % m"""
+    digest = hashlib.blake2b(canonical_doi(doi).encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class DoiBloomFilter:
+    """唯讀、memory-mapped 的 Bloom filter"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Bloom filter 檔案是空的: {path}")
+        magic, version, self.m, self.k, self.n, self.fp_rate = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError(f"不是有效的 DOI Bloom filter 檔案: {path}")
+        self._offset = _HEADER.size
+
+    def __contains__(self, doi):
+        mm = self._mm
+        offset = self._offset
+        m = self.m
+        h1, h2 = _hashes(doi)
+        # 遇到第一個為 0 的位元就能確定不存在
+        for i in range(self.k):
+            pos = (h1 + i * h2) % m
+            if not mm[offset + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    @property
+    def size_bytes(self):
+        return _HEADER.size + (self.m + 7) // 8
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+def build_bloom(dois, path, expected_items, fp_rate=DEFAULT_FP_RATE):
+    """把 DOI 寫入新的 Bloom filter 檔案，回傳實際加入的數量
+
+    expected_items 決定 filter 大小；實際數量超過時誤判率會高於 fp_rate。
+    先寫暫存檔再以 os.replace 換上。
+    """
+    m, k = optimal_parameters(expected_items, fp_rate)
+    bits = bytearray((m + 7) // 8)
+    count = 0
+    for doi in dois:
+        doi = doi.strip()
+        if not doi:
+            continue
+        h1, h2 = _hashes(doi)
+        for i in range(k):
+            pos = (h1 + i * h2) % m
+            bits[pos >> 3] |= 1 << (pos & 7)
+        count += 1
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".building"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, m, k, count, fp_rate))
+        f.write(bits)
+    os.replace(tmp_path, path)
+    return count
+
+
+class _BloomHolder:
+    """延遲載入 DOI_BLOOM_PATH；檔案不存在時 might_exist() 一律回傳 True（不過濾）"""
+
+    def __init__(self, path=DOI_BLOOM_PATH):
+        self.path = path
+        self._filter = None
+        self._loaded_path = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._loaded_path != self.path:
+            with self._lock:
+                if self._loaded_path != self.path:
+                    if self._filter is not None:
+                        self._filter.close()
+                    self._filter = None
+                    if self.path and os.path.exists(self.path):
+                        try:
+                            self._filter = DoiBloomFilter(self.path)
+                        except (OSError, ValueError) as e:
+                            print(f"[DoiBloom] 無法載入 {self.path}: {e}")
+                    self._loaded_path = self.path
+        return self._filter
+
+    def might_exist(self, doi):
+        bloom = self.get()
+        return bloom is None or doi in bloom
+
+
+# 整個 process 共用的 DOI Bloom filter
+doi_bloom = _BloomHolder()
+
+
+def _iter_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield line
+
+
+def _iter_index_dois(index_path):
+    conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+    try:
+        for (doi,) in conn.execute("SELECT doi FROM works"):
+            yield doi
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="由 DOI 清單建立 Bloom filter")
+    parser.add_argument('paths', nargs='*', help="每行一個 DOI 的文字檔")
+    parser.add_argument('--from-index', help="改由離線 CrossRef 索引（services.local_index）取得 DOI")
+    parser.add_argument('--fp-rate', type=float, default=DEFAULT_FP_RATE)
+    parser.add_argument('--output', default=DOI_BLOOM_PATH or _DEFAULT_BLOOM_PATH)
+    args = parser.parse_args(argv)
+    if not args.paths and not args.from_index:
+        parser.error("請指定 DOI 清單檔案或 --from-index")
+
+    def sources():
+        for path in args.paths:
+            yield from _iter_lines(path)
+        if args.from_index:
+            yield from _iter_index_dois(args.from_index)
+
+    # 先數一次數量來決定 filter 大小
+    expected = sum(1 for doi in sources() if doi.strip())
+    start = time.perf_counter()
+    count = build_bloom(sources(), args.output, expected, args.fp_rate)
+    elapsed = time.perf_counter() - start
+    m, k = optimal_parameters(expected, args.fp_rate)
+    print(f"完成：{count:,} 個 DOI，m={m:,} bits（{(m + 7) // 8 / 1e6:.1f} MB），k={k}，"
+          f"目標誤判率 {args.fp_rate}，{elapsed:.1f} s → {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .rate_limiter import crossref_limiter, parse_retry_after
+from .circuit_breaker import crossref_breaker
+from .deadline import remaining_or_none
+
+# --------------------------------------------------------
+# CrossRef 連線設定（可用環境變數覆寫）
+# --------------------------------------------------------
+CROSSREF_API_URL = os.environ.get("CROSSREF_API_URL", "https://api.crossref.org").rstrip("/")
+# CrossRef polite pool: 帶上聯絡信箱的請求會被分到較穩定的 pool
+CROSSREF_MAILTO = os.environ.get("CROSSREF_MAILTO", "")
+USER_AGENT = "APA-Citation-Checker/1.0 (https://github.com/YoMuscle/article_helper"
+USER_AGENT += f"; mailto:{CROSSREF_MAILTO})" if CROSSREF_MAILTO else ")"
+
+POOL_SIZE = int(os.environ.get("CROSSREF_POOL_SIZE", "20"))
+CONNECT_TIMEOUT = float(os.environ.get("CROSSREF_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.environ.get("CROSSREF_READ_TIMEOUT", "10"))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    session = requests.Session()
+    # 重試交給 safe_request 處理，adapter 本身不重試
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept": "application/json",
+        "Connection": "keep-alive",
+    })
+    return session
+
+
+def get_session():
+    """取得共用的 requests.Session（lazy 建立，執行緒安全）
+
+    Session 底層的 urllib3 connection pool 可跨執行緒共用，同一個 worker 內
+    所有 CrossRef 呼叫都重複使用已建立的 TCP/TLS 連線。
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def reset_session():
+    """關閉並丟棄共用 session（fork 之後或測試時使用）"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def crossref_url(path=""):
+    """組出 CrossRef API 的完整 URL，例如 crossref_url("works/10.1000/xyz")"""
+    return f"{CROSSREF_API_URL}/{path.lstrip('/')}" if path else CROSSREF_API_URL
+
+
+def crossref_get(url, params=None, timeout=None, deadline=None):
+    """透過共用 session 發出 GET，統一套用 timeout、polite pool 參數、速率限制與斷路器
+
+    排隊過多時會丟出 RateLimitExceeded，斷路器開啟時丟出 CircuitOpenError，
+    deadline 用完時丟出 DeadlineExceeded（皆為 ConnectionError 的子類別）。
+    有 deadline 時 connect / read timeout 與等待 token 的時間都不超過剩餘時間。
+    連線失敗、timeout 與 5xx 計為斷路器失敗；被 deadline 截短的 timeout 不計。
+    """
+    if CROSSREF_MAILTO:
+        params = dict(params or {})
+        params.setdefault("mailto", CROSSREF_MAILTO)
+    read_timeout = timeout if timeout is not None else READ_TIMEOUT
+    connect_timeout = CONNECT_TIMEOUT
+    capped = False
+    if deadline is not None:
+        remaining = deadline.cap()
+        capped = remaining < max(read_timeout, connect_timeout)
+        read_timeout = min(read_timeout, remaining)
+        connect_timeout = min(connect_timeout, remaining)
+    crossref_breaker.before_call()
+    try:
+        crossref_limiter.acquire(timeout=remaining_or_none(deadline))
+        response = get_session().get(url, params=params, timeout=(connect_timeout, read_timeout))
+    except requests.exceptions.Timeout:
+        if capped:
+            crossref_breaker.release()
+        else:
+            crossref_breaker.record_failure()
+        raise
+    except requests.exceptions.ConnectionError:
+        crossref_breaker.record_failure()
+        raise
+    except BaseException:
+        crossref_breaker.release()
+        raise
+
+    crossref_limiter.update_from_headers(response.headers)
+    if response.status_code == 429:
+        crossref_limiter.penalize(parse_retry_after(response.headers.get("Retry-After")))
+        crossref_breaker.release()
+    elif response.status_code >= 500:
+        crossref_breaker.record_failure()
+    else:
+        crossref_breaker.record_success()
+    return response
@@ -0,0 +1,294 @@
+"""
+離線 CrossRef 索引：把 CrossRef metadata dump 匯入本機 SQLite（FTS5 索引標題與作者）
+
+crossref_service 的各個查詢會先查這個索引，查不到才連線 CrossRef。
+索引檔不存在時自動停用，行為與原本相同。
+
+匯入 dump（JSON / JSONL，可為 .gz，也可指定整個目錄）：
+    python -m services.local_index dump.jsonl.gz other_dump_dir/ --output cache/crossref_local.sqlite3
+
+支援的格式：
+- JSONL：每行一個 work，或每行一個 API 回應
+- JSON：CrossRef 公開 data file（{"items": [...]}）、API 回應（{"message": {...}}）或 work 陣列
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from .metadata_cache import canonical_doi
+
+_DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   "cache", "crossref_local.sqlite3")
+# 設為空字串即停用離線索引
+LOCAL_INDEX_PATH = os.environ.get("CROSSREF_LOCAL_INDEX", _DEFAULT_INDEX_PATH)
+# 全文搜尋最多對幾筆符合的資料計算 bm25 排名；符合筆數少於此值時排名是精確的，
+# 查詢只含非常常見的詞時只在前 SEARCH_POOL 筆中排名，避免對數十萬筆逐一計分
+SEARCH_POOL = 200
+
+_SCHEMA = (
+    "CREATE TABLE works ("
+    " doi TEXT PRIMARY KEY,"
+    " display_doi TEXT NOT NULL,"
+    " title TEXT NOT NULL,"
+    " title_key TEXT NOT NULL,"
+    " authors TEXT NOT NULL,"
+    " author_names TEXT NOT NULL,"
+    " year INTEGER,"
+    " journal TEXT,"
+    " publisher TEXT,"
+    " type TEXT)",
+    "CREATE VIRTUAL TABLE works_fts USING fts5("
+    " title, author_names, content='works', content_rowid='rowid',"
+    " tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+)
+
+_INDEXES = (
+    "CREATE INDEX works_title_key ON works (title_key)",
+)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def title_key(title):
+    """標題的比對 key：只保留英數字並轉小寫（與 fetch_metadata_from_title 的 normalize 相同）"""
+    return re.sub(r"[^0-9a-z]", "", (title or "").lower())
+
+
+def _fts_query(text, column=None, prefix_last=False):
+    """把使用者輸入轉成 FTS5 查詢：每個詞都要出現（AND），詞本身加引號避免語法錯誤"""
+    tokens = _TOKEN_RE.findall((text or "").lower())
+    if not tokens:
+        return None
+    if prefix_last and len(tokens) > 1 and len(tokens[-1]) < 2:
+        # 只打了一個字母的詞幾乎符合所有資料，先忽略
+        tokens = tokens[:-1]
+        prefix_last = False
+    terms = [f'"{t}"' for t in tokens]
+    if prefix_last:
+        terms[-1] += "*"
+    query = " ".join(terms)
+    return f"{column} : ({query})" if column else query
+
+
+def _row_to_work(row):
+    """還原成 CrossRef work 的形狀，讓 crossref_service 既有的挑選邏輯可以直接使用"""
+    display_doi, title, authors, year, journal, publisher, work_type = row
+    return {
+        "DOI": display_doi,
+        "title": [title],
+        "author": json.loads(authors),
+        "issued": {"date-parts": [[year]]},
+        "container-title": [journal or ""],
+        "publisher": publisher or "N/A",
+        "type": work_type,
+    }
+
+
+_SELECT = "SELECT display_doi, title, authors, year, journal, publisher, type FROM works"
+
+
+class LocalIndex:
+    """唯讀的離線索引，每個執行緒使用自己的 SQLite 連線"""
+
+    def __init__(self, db_path=LOCAL_INDEX_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def available(self):
+        return bool(self.db_path) and os.path.exists(self.db_path)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.path != self.db_path:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            self._local.conn = conn
+            self._local.path = self.db_path
+        return conn
+
+    def _query(self, sql, params):
+        if not self.available():
+            return []
+        try:
+            return self._connection().execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"[LocalIndex] 查詢失敗: {e}")
+            return []
+
+    def get_work(self, doi):
+        """以 DOI 查詢（不分大小寫），回傳 CrossRef 形狀的 work 或 None"""
+        rows = self._query(f"{_SELECT} WHERE doi = ?", (canonical_doi(doi),))
+        return _row_to_work(rows[0]) if rows else None
+
+    def get_by_title(self, title, limit=5):
+        """標題完全相同（忽略標點、空白與大小寫）的 work，走索引不需全文搜尋"""
+        key = title_key(title)
+        if not key:
+            return []
+        rows = self._query(f"{_SELECT} WHERE title_key = ? LIMIT ?", (key, limit))
+        return [_row_to_work(r) for r in rows]
+
+    def search(self, text, limit=5, field=None, prefix_last=False):
+        """全文搜尋，field="title" 只比對標題；依 bm25 排序（見 SEARCH_POOL）"""
+        query = _fts_query(text, column="title" if field == "title" else None,
+                           prefix_last=prefix_last)
+        if not query:
+            return []
+        rows = self._query(
+            "SELECT w.display_doi, w.title, w.authors, w.year, w.journal, w.publisher, w.type"
+            " FROM (SELECT rowid, bm25(works_fts) AS score FROM works_fts"
+            "       WHERE works_fts MATCH ? LIMIT ?) AS m"
+            " JOIN works AS w ON w.rowid = m.rowid ORDER BY m.score LIMIT ?",
+            (query, SEARCH_POOL, limit),
+        )
+        return [_row_to_work(r) for r in rows]
+
+    def doi_prefix(self, prefix, limit=5):
+        """DOI 前綴查詢（自動補全用），利用主鍵索引做範圍掃描"""
+        start = canonical_doi(prefix)
+        if not start:
+            return []
+        rows = self._query(f"{_SELECT} WHERE doi >= ? AND doi < ? ORDER BY doi LIMIT ?",
+                           (start, start + "\uffff", limit))
+        return [_row_to_work(r) for r in rows]
+
+
+# --------------------------------------------------------
+# 匯入 CrossRef dump
+# --------------------------------------------------------
+def _open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _works_from_payload(payload):
+    """從 JSON 內容中取出 work；支援 data file、API 回應與單一 work"""
+    if isinstance(payload, list):
+        for item in payload:
+            yield from _works_from_payload(item)
+        return
+    if not isinstance(payload, dict):
+        return
+    if "message" in payload:
+        yield from _works_from_payload(payload["message"])
+    elif "items" in payload:
+        yield from _works_from_payload(payload["items"])
+    elif payload.get("DOI"):
+        yield payload
+
+
+def iter_dump_works(path):
+    """逐筆讀出 dump 中的 work；目錄會依檔名順序讀取其中所有 .json / .jsonl(.gz) 檔"""
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if re.search(r"\.jsonl?(\.gz)?$", name):
+                yield from iter_dump_works(os.path.join(path, name))
+        return
+    with _open_text(path) as f:
+        if re.search(r"\.jsonl(\.gz)?$", path):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield from _works_from_payload(json.loads(line))
+        else:
+            yield from _works_from_payload(json.load(f))
+
+
+def _work_to_row(work):
+    doi = (work.get("DOI") or "").strip()
+    title = ((work.get("title") or [""])[0] or "").strip()
+    if not doi or not title:
+        return None
+    authors = [{"family": a.get("family", ""), "given": a.get("given", "")}
+               for a in work.get("author", []) if a.get("family") or a.get("given")]
+    names = " ".join(f"{a['given']} {a['family']}".strip() for a in authors)
+    parts = (work.get("issued") or {}).get("date-parts") or [[None]]
+    year = parts[0][0] if parts and parts[0] else None
+    return (
+        canonical_doi(doi), doi, title, title_key(title),
+        json.dumps(authors, ensure_ascii=False), names,
+        year if isinstance(year, int) else None,
+        ((work.get("container-title") or [""])[0] or ""),
+        work.get("publisher", ""),
+        work.get("type", ""),
+    )
+
+
+def import_dump(paths, db_path, batch_size=20000, progress=None):
+    """把一或多個 dump 匯入新的索引檔，回傳匯入筆數
+
+    先寫入暫存檔，完成後再以 os.replace 換上，執行中的服務不會讀到寫到一半的索引。
+    重複的 DOI 以後出現的為準。
+    """
+    tmp_path = db_path + ".building"
+    if os.path.exists(tmp_path):
+        os.unlink(tmp_path)
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    for statement in _SCHEMA:
+        conn.execute(statement)
+
+    count = 0
+    batch = []
+    insert = "INSERT OR REPLACE INTO works VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    for path in paths:
+        for work in iter_dump_works(path):
+            row = _work_to_row(work)
+            if row is None:
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.executemany(insert, batch)
+                count += len(batch)
+                batch = []
+                if progress:
+                    progress(count)
+    if batch:
+        conn.executemany(insert, batch)
+        count += len(batch)
+    conn.commit()
+
+    # 資料寫完再建索引；全文索引一次建立也比逐筆維護快得多
+    for statement in _INDEXES:
+        conn.execute(statement)
+    conn.execute("INSERT INTO works_fts(works_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO works_fts(works_fts) VALUES ('optimize')")
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, db_path)
+    return count
+
+
+# 整個 process 共用的離線索引
+local_index = LocalIndex()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="把 CrossRef metadata dump 匯入離線索引")
+    parser.add_argument('paths', nargs='+', help="JSON / JSONL dump 檔案或目錄（可為 .gz）")
+    parser.add_argument('--output', default=LOCAL_INDEX_PATH or _DEFAULT_INDEX_PATH)
+    parser.add_argument('--batch-size', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    count = import_dump(args.paths, args.output, batch_size=args.batch_size,
+                        progress=lambda n: print(f"  已匯入 {n:,} 筆", end="\r"))
+    elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(args.output) / 1e6
+    print(f"\n完成：{count:,} 筆，{elapsed:.1f} s，索引大小 {size_mb:.1f} MB → {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,205 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# --------------------------------------------------------
+# 快取設定（可用環境變數覆寫）
+# --------------------------------------------------------
+_DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "cache", "crossref_cache.sqlite3")
+# 設為空字串即停用 SQLite 層，只使用 in-process LRU
+CACHE_DB_PATH = os.environ.get("CROSSREF_CACHE_PATH", _DEFAULT_DB_PATH)
+CACHE_MAX_ENTRIES = int(os.environ.get("CROSSREF_CACHE_MAX_ENTRIES", "2048"))
+CACHE_TTL = float(os.environ.get("CROSSREF_CACHE_TTL", str(7 * 24 * 3600)))
+NEGATIVE_CACHE_TTL = float(os.environ.get("CROSSREF_NEGATIVE_CACHE_TTL", "600"))
+# 過期後仍可在 CrossRef 無法連線時當作 stale 資料回傳的時間
+CACHE_STALE_TTL = float(os.environ.get("CROSSREF_CACHE_STALE_TTL", str(30 * 24 * 3600)))
+# 每寫入幾筆就刪除一次超過 stale 期限的資料，避免 SQLite 檔無限成長
+CACHE_PURGE_EVERY = int(os.environ.get("CROSSREF_CACHE_PURGE_EVERY", "500"))
+
+_DOI_PREFIX_RE = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*/*|doi://)", re.I)
+
+
+def strip_doi_prefix(doi):
+    """移除 https://doi.org/、doi: 等前綴與尾端標點，保留原本大小寫"""
+    s = (doi or "").strip()
+    s = _DOI_PREFIX_RE.sub("", s)
+    return s.strip().rstrip(".,;")
+
+
+def canonical_doi(doi):
+    """DOI 的標準化 key：去前綴、去尾端標點、轉小寫（DOI 不分大小寫）"""
+    return strip_doi_prefix(doi).lower()
+
+
+def doi_cache_key(doi):
+    return "doi:" + canonical_doi(doi)
+
+
+def _decode(raw):
+    return json.loads(raw) if raw is not None else None
+
+
+class MetadataCache:
+    """兩層 metadata 快取：in-process LRU + 可跨 worker 共用的 SQLite
+
+    - get() 回傳 (hit, value)。negative entry（查無此 DOI）為 (True, None)
+    - 每筆資料都有到期時間；negative entry 使用較短的 TTL
+    - SQLite 命中時會回填到 LRU 層
+    - 過期的資料不會立即刪除，CrossRef 無法連線時可用 get_stale() 取回；
+      超過 stale_ttl 的資料每寫入 purge_every 筆刪除一次
+    - 兩層都存 JSON 字串，每次 get 都拿到獨立的物件，呼叫端可自由修改
+    """
+
+    def __init__(self, db_path=CACHE_DB_PATH, max_entries=CACHE_MAX_ENTRIES,
+                 ttl=CACHE_TTL, negative_ttl=NEGATIVE_CACHE_TTL, stale_ttl=CACHE_STALE_TTL,
+                 purge_every=CACHE_PURGE_EVERY, clock=time.time):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.purge_every = purge_every
+        self.clock = clock
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._schema_ready = set()  # 已建立資料表的 db_path
+        self._writes = 0
+
+    # ---------- SQLite 層 ----------
+    def _connection(self):
+        """目前執行緒對 db_path 的連線；db_path 改變時重新連線"""
+        if not self.db_path:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.path != self.db_path:
+            if conn is not None:
+                conn.close()
+            path = self.db_path
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if path not in self._schema_ready:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS metadata_cache ("
+                    " key TEXT PRIMARY KEY,"
+                    " value TEXT,"
+                    " expires_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS metadata_cache_expires ON metadata_cache (expires_at)")
+                conn.commit()
+                self._schema_ready.add(path)
+            self._local.conn = conn
+            self._local.path = path
+        return conn
+
+    def _db_get(self, key):
+        conn = self._connection()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute("SELECT value, expires_at FROM metadata_cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"[Cache] SQLite 讀取失敗: {e}")
+            return None
+        return row
+
+    def _db_set(self, key, raw, expires_at):
+        conn = self._connection()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO metadata_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, raw, expires_at),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"[Cache] SQLite 寫入失敗: {e}")
+            return
+        with self._lock:
+            self._writes += 1
+            due = self.purge_every > 0 and self._writes % self.purge_every == 0
+        if due:
+            self.purge()
+
+    def purge(self):
+        """刪除 SQLite 中過期超過 stale_ttl（連 stale 資料都不能用）的項目，回傳刪除筆數"""
+        conn = self._connection()
+        if conn is None:
+            return 0
+        try:
+            deleted = conn.execute("DELETE FROM metadata_cache WHERE expires_at <= ?",
+                                   (self.clock() - self.stale_ttl,)).rowcount
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"[Cache] SQLite 清理失敗: {e}")
+            return 0
+        return deleted
+
+    # ---------- LRU 層 ----------
+    def _lru_put(self, key, raw, expires_at):
+        with self._lock:
+            self._lru[key] = (raw, expires_at)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def get(self, key):
+        now = self.clock()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._lru.move_to_end(key)
+                    return True, _decode(entry[0])
+
+        stored = self._db_get(key)
+        if stored is not None and stored[1] > now:
+            self._lru_put(key, stored[0], stored[1])
+            return True, _decode(stored[0])
+        return False, None
+
+    def get_stale(self, key):
+        """忽略 TTL 取回資料（過期不超過 stale_ttl），回傳 value 或 None
+
+        只回傳正常的 metadata；negative entry 不當作 stale 資料。
+        """
+        oldest = self.clock() - self.stale_ttl
+        with self._lock:
+            entry = self._lru.get(key)
+        if entry is None:
+            entry = self._db_get(key)
+        if entry is None or entry[0] is None or entry[1] <= oldest:
+            return None
+        return _decode(entry[0])
+
+    def set(self, key, value, ttl=None):
+        expires_at = self.clock() + (self.ttl if ttl is None else ttl)
+        raw = json.dumps(value, ensure_ascii=False) if value is not None else None
+        self._lru_put(key, raw, expires_at)
+        self._db_set(key, raw, expires_at)
+
+    def set_negative(self, key, ttl=None):
+        """記錄「查無此資料」，避免短時間內重複查詢不存在的 DOI"""
+        self.set(key, None, self.negative_ttl if ttl is None else ttl)
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+        conn = self._connection()
+        if conn is not None:
+            conn.execute("DELETE FROM metadata_cache")
+            conn.commit()
+
+
+# 整個 process 共用的快取實例
+metadata_cache = MetadataCache()
@@ -0,0 +1,157 @@
+import os
+import queue
+import threading
+import time
+
+from .circuit_breaker import OPEN, crossref_breaker
+from .crossref_service import fetch_metadata_from_doi, fetch_metadata_from_title, title_cache_key
+from .deadline import Deadline
+from .metadata_cache import metadata_cache, doi_cache_key
+from .rate_limiter import crossref_limiter
+from .reference_verifier import extract_doi, extract_title
+
+# --------------------------------------------------------
+# 參考文獻 metadata 背景預先查詢設定（可用環境變數覆寫）
+# --------------------------------------------------------
+# 排隊上限；超過時新的工作直接丟棄，不讓分析請求等待
+PREFETCH_QUEUE_MAX = int(os.environ.get("PREFETCH_QUEUE_MAX", "500"))
+# 保留給前景請求的 token 比例：token 低於此比例時背景查詢暫停
+PREFETCH_RESERVE_FRACTION = float(os.environ.get("PREFETCH_RESERVE_FRACTION", "0.5"))
+# 每筆預先查詢的時間上限（秒）
+PREFETCH_CALL_BUDGET = float(os.environ.get("PREFETCH_CALL_BUDGET", "10"))
+# 速率限制或斷路器不允許時，隔多久再檢查一次（秒）
+PREFETCH_IDLE = 0.2
+# 單筆最多等待多久（秒）才能送出；超過就丟棄，不讓斷路器長時間開啟時卡住整個佇列
+PREFETCH_MAX_WAIT = float(os.environ.get("PREFETCH_MAX_WAIT", "30"))
+
+
+class MetadataPrefetcher:
+    """低優先順序的背景 metadata 預先查詢
+
+    文件分析完成後把參考文獻中的 DOI / 標題放進佇列，由單一 daemon 執行緒
+    逐筆查詢 CrossRef 並寫入 metadata 快取，使用者隨後以 /api/generate_citation
+    查詢時就能直接命中。
+
+    - enqueue 不阻塞：佇列滿時直接丟棄
+    - 只在速率限制還有餘裕（保留 reserve 個 token 給前景請求）且斷路器未開啟時送出請求
+    - 等待超過 max_wait 秒仍無法送出的工作直接丟棄（計入 dropped）
+    - 所有請求仍經過共用的速率限制、快取與 single-flight
+    """
+
+    def __init__(self, max_queue=PREFETCH_QUEUE_MAX, reserve_fraction=PREFETCH_RESERVE_FRACTION,
+                 limiter=crossref_limiter, breaker=crossref_breaker, max_wait=PREFETCH_MAX_WAIT):
+        self.reserve_fraction = reserve_fraction
+        self.max_wait = max_wait
+        self.limiter = limiter
+        self.breaker = breaker
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._thread = None
+        self._stats = {"enqueued": 0, "fetched": 0, "cached": 0, "dropped": 0, "failed": 0,
+                       "by_doi": 0, "by_title": 0}
+
+    # ---------- 加入工作 ----------
+    def enqueue(self, kind, value):
+        """加入一筆 ("doi" | "title", 值)；回傳是否真的放進佇列"""
+        key = (kind, value.strip().lower())
+        with self._lock:
+            if not value.strip() or key in self._pending:
+                return False
+            try:
+                self._queue.put_nowait((kind, value.strip()))
+            except queue.Full:
+                self._stats["dropped"] += 1
+                return False
+            self._pending.add(key)
+            self._stats["enqueued"] += 1
+            self._stats["by_doi" if kind == "doi" else "by_title"] += 1
+        self._ensure_worker()
+        return True
+
+    def enqueue_references(self, references):
+        """從解析後的參考文獻條目取出 DOI（沒有 DOI 時取標題）放進佇列"""
+        count = 0
+        for ref in references:
+            text = ref.get("text", "")
+            doi = ref.get("doi") or extract_doi(text)
+            if doi:
+                count += self.enqueue("doi", doi)
+            else:
+                title = ref.get("title") or extract_title(text)
+                if title:
+                    count += self.enqueue("title", title)
+        return count
+
+    # ---------- 背景執行緒 ----------
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="metadata-prefetch", daemon=True)
+                self._thread.start()
+
+    def _can_send(self):
+        reserve = self.limiter.stats()["limit"] * self.reserve_fraction
+        return self.breaker.state != OPEN and self.limiter.has_headroom(reserve)
+
+    def _run(self):
+        while True:
+            kind, value = self._queue.get()
+            try:
+                self._prefetch(kind, value)
+            finally:
+                with self._lock:
+                    self._pending.discard((kind, value.lower()))
+                self._queue.task_done()
+
+    def _prefetch(self, kind, value):
+        cache_key = doi_cache_key(value) if kind == "doi" else title_cache_key(value)
+        hit, _ = metadata_cache.get(cache_key)
+        if hit:
+            self._count("cached")
+            return
+
+        # 前景請求優先：速率限制沒有餘裕或斷路器開啟時等待，最多 max_wait 秒
+        give_up_at = time.monotonic() + self.max_wait
+        while not self._can_send():
+            if time.monotonic() >= give_up_at:
+                self._count("dropped")
+                return
+            time.sleep(PREFETCH_IDLE)
+        try:
+            deadline = Deadline(PREFETCH_CALL_BUDGET)
+            if kind == "doi":
+                fetch_metadata_from_doi(value, deadline=deadline)
+            else:
+                fetch_metadata_from_title(value, deadline=deadline)
+            self._count("fetched")
+        except Exception as e:
+            print(f"[Prefetch] {kind} {value}: {e}")
+            self._count("failed")
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    # ---------- 監控 / 測試 ----------
+    def join(self, timeout=None):
+        """等待佇列清空（測試用）；逾時回傳 False"""
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if give_up_at is not None and time.monotonic() >= give_up_at:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self):
+        """doi_fast_path：以 DOI 精確查詢（不需標題搜尋）的工作比例"""
+        with self._lock:
+            enqueued = self._stats["enqueued"]
+            fraction = round(self._stats["by_doi"] / enqueued, 3) if enqueued else 0.0
+            return dict(self._stats, queued=self._queue.qsize(), doi_fast_path=fraction)
+
+
+# 整個 process 共用的背景預先查詢
+reference_prefetcher = MetadataPrefetcher()
@@ -0,0 +1,164 @@
+import json
+import os
+import re
+import threading
+from bisect import bisect_left, insort
+
+from .metadata_cache import canonical_doi
+
+# --------------------------------------------------------
+# /api/suggest_doi 的本機前綴索引設定（可用環境變數覆寫）
+# --------------------------------------------------------
+_DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   "cache", "suggest_index.jsonl")
+# 設為空字串即只保留在記憶體，不寫入檔案
+SUGGEST_INDEX_PATH = os.environ.get("SUGGEST_INDEX_PATH", _DEFAULT_INDEX_PATH)
+SUGGEST_INDEX_MAX_ENTRIES = int(os.environ.get("SUGGEST_INDEX_MAX_ENTRIES", "200000"))
+# 標題只索引前幾個詞開頭的後綴，控制記憶體用量
+TITLE_WORDS_INDEXED = 8
+
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_title(title):
+    """標題的前綴比對形式：小寫、非英數字一律轉為單一空白"""
+    return _NON_ALNUM_RE.sub(" ", (title or "").lower()).strip()
+
+
+def _title_suffixes(norm_title):
+    """標題中每個詞開頭的後綴，讓輸入標題中段的詞也能命中"""
+    words = norm_title.split(" ")
+    suffixes = []
+    for i in range(min(len(words), TITLE_WORDS_INDEXED)):
+        suffixes.append(" ".join(words[i:]))
+    return suffixes
+
+
+class PrefixIndex:
+    """已解析過的 work 的前綴索引：DOI 與標準化標題各一個排序陣列，以 bisect 查詢
+
+    - add() 的紀錄會附加寫入 JSONL 檔，重新啟動時載入後一次排序
+    - 查詢只做二分搜尋加上短暫的線性掃描，不連線
+    - 查詢與新增都在 _lock 內存取排序陣列（查詢很短）；寫檔在 _lock 之外，
+      由 _file_lock 保持每行完整，慢速磁碟不會擋住查詢與其他新增
+    """
+
+    def __init__(self, path=SUGGEST_INDEX_PATH, max_entries=SUGGEST_INDEX_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        self._records = {}
+        self._doi_keys = []
+        self._title_keys = []  # (標準化標題後綴, doi key)
+
+    # ---------- 載入 / 寫入 ----------
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if self.path and os.path.exists(self.path):
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        for line in f:
+                            line = line.strip()
+                            if line:
+                                record = json.loads(line)
+                                self._records[canonical_doi(record["doi"])] = record
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"[PrefixIndex] 載入失敗: {e}")
+                self._doi_keys = sorted(self._records)
+                self._title_keys = sorted(
+                    (suffix, key) for key, record in self._records.items()
+                    for suffix in _title_suffixes(normalize_title(record.get("title"))))
+            self._loaded = True
+
+    def _append_to_file(self, records):
+        if not self.path or not records:
+            return
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._file_lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError as e:
+            print(f"[PrefixIndex] 寫入失敗: {e}")
+
+    # ---------- 新增 ----------
+    def add_many(self, records):
+        """加入 {doi, title, year, authors} 紀錄；已存在的 DOI 略過"""
+        self._ensure_loaded()
+        added = []
+        with self._lock:
+            for record in records:
+                doi = (record.get("doi") or "").strip()
+                title = record.get("title") or ""
+                key = canonical_doi(doi)
+                if not key or not title or key in self._records:
+                    continue
+                if len(self._records) >= self.max_entries:
+                    break
+                record = {"doi": doi, "title": title, "year": record.get("year"),
+                          "authors": record.get("authors", "")}
+                self._records[key] = record
+                insort(self._doi_keys, key)
+                for suffix in _title_suffixes(normalize_title(title)):
+                    insort(self._title_keys, (suffix, key))
+                added.append(record)
+        self._append_to_file(added)
+        return len(added)
+
+    def add(self, record):
+        return self.add_many([record])
+
+    # ---------- 查詢 ----------
+    def search(self, prefix, limit=5):
+        """DOI 前綴（以 10. 開頭）或標題前綴查詢，回傳最多 limit 筆紀錄的副本"""
+        self._ensure_loaded()
+        prefix = (prefix or "").strip()
+        is_doi = prefix.startswith("10.")
+        query = canonical_doi(prefix) if is_doi else normalize_title(prefix)
+        if not query:
+            return []
+        # add_many 以 insort 修改排序陣列，查詢期間持有 lock 才不會看到對不齊的陣列
+        with self._lock:
+            found = []
+            if is_doi:
+                keys = self._doi_keys
+                start = bisect_left(keys, query)
+                for key in keys[start:start + limit]:
+                    if not key.startswith(query):
+                        break
+                    found.append(key)
+            else:
+                keys = self._title_keys
+                i = bisect_left(keys, (query, ""))
+                while i < len(keys) and len(found) < limit and keys[i][0].startswith(query):
+                    if keys[i][1] not in found:
+                        found.append(keys[i][1])
+                    i += 1
+            return [dict(self._records[key]) for key in found]
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._records)
+
+    def clear(self):
+        """清空索引並刪除檔案（測試時使用）"""
+        with self._lock:
+            self._reset()
+            self._loaded = True
+            if self.path and os.path.exists(self.path):
+                os.unlink(self.path)
+
+
+# 整個 process 共用的自動補全索引
+suggest_index = PrefixIndex()
@@ -0,0 +1,151 @@
+import os
+import re
+import threading
+import time
+
+# CrossRef 公開 API 目前約為 50 req/s；實際值以回應標頭 X-Rate-Limit-* 為準
+DEFAULT_RATE_LIMIT = int(os.environ.get("CROSSREF_RATE_LIMIT", "50"))
+DEFAULT_RATE_INTERVAL = float(os.environ.get("CROSSREF_RATE_INTERVAL", "1"))
+# 同時排隊等待 token 的上限；超過就直接失敗，不讓執行緒堆積
+MAX_WAITERS = int(os.environ.get("CROSSREF_RATE_MAX_WAITERS", "16"))
+# 單一請求最多等待 token 的秒數
+MAX_WAIT = float(os.environ.get("CROSSREF_RATE_MAX_WAIT", "5"))
+
+_INTERVAL_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*$", re.I)
+_INTERVAL_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class RateLimitExceeded(ConnectionError):
+    """排隊的請求太多或等待時間過長，快速失敗而不是繼續等待"""
+
+
+def parse_interval(value):
+    """解析 X-Rate-Limit-Interval（例如 "1s"、"60s"、"1m"），回傳秒數或 None"""
+    match = _INTERVAL_RE.match(value or "")
+    if not match:
+        return None
+    seconds = float(match.group(1)) * _INTERVAL_UNITS[(match.group(2) or "s").lower()]
+    return seconds if seconds > 0 else None
+
+
+def parse_retry_after(value):
+    """解析 Retry-After 的秒數格式；HTTP-date 格式不處理，回傳 None"""
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return None
+    return seconds if seconds >= 0 else None
+
+
+class AdaptiveRateLimiter:
+    """整個 process 共用的 token bucket
+
+    - 每 interval 秒補充 limit 個 token，bucket 容量為 limit
+    - 依 CrossRef 回應的 X-Rate-Limit-Limit / X-Rate-Limit-Interval 調整速率
+    - 收到 429 時依 Retry-After 暫停發放 token
+    - 等待中的執行緒數量有上限，超過時 acquire() 直接丟出 RateLimitExceeded
+    """
+
+    def __init__(self, limit=DEFAULT_RATE_LIMIT, interval=DEFAULT_RATE_INTERVAL,
+                 max_waiters=MAX_WAITERS, max_wait=MAX_WAIT, clock=time.monotonic):
+        self.clock = clock
+        self.max_waiters = max_waiters
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._limit = max(1, int(limit))
+        self._interval = interval
+        self._tokens = float(self._limit)
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._waiters = 0
+
+    @property
+    def rate(self):
+        """每秒可發出的請求數"""
+        return self._limit / self._interval
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(float(self._limit), self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self, timeout=None):
+        """取得一個 token；必要時等待，但最多等 min(timeout, max_wait) 秒"""
+        max_wait = self.max_wait if timeout is None else min(timeout, self.max_wait)
+        with self._cond:
+            now = self.clock()
+            self._refill(now)
+            if self._tokens >= 1 and now >= self._paused_until:
+                self._tokens -= 1
+                return
+            if self._waiters >= self.max_waiters:
+                raise RateLimitExceeded("CrossRef 請求排隊過多，請稍後再試。")
+
+            give_up_at = now + max_wait
+            self._waiters += 1
+            try:
+                while True:
+                    now = self.clock()
+                    self._refill(now)
+                    if now >= self._paused_until and self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    ready_at = max(self._paused_until, now + (1 - self._tokens) / self.rate)
+                    if ready_at > give_up_at:
+                        raise RateLimitExceeded("CrossRef 速率限制中，請稍後再試。")
+                    self._cond.wait(ready_at - now)
+            finally:
+                self._waiters -= 1
+
+    def has_headroom(self, reserve=0):
+        """背景工作用：未暫停、沒有人排隊，且保留 reserve 個 token 給前景請求後仍有剩"""
+        with self._cond:
+            now = self.clock()
+            self._refill(now)
+            return now >= self._paused_until and self._waiters == 0 and self._tokens >= reserve + 1
+
+    def update_from_headers(self, headers):
+        """依 CrossRef 回應標頭調整速率"""
+        if not headers:
+            return
+        limit = headers.get("X-Rate-Limit-Limit")
+        interval = parse_interval(headers.get("X-Rate-Limit-Interval"))
+        try:
+            limit = int(limit) if limit is not None else None
+        except ValueError:
+            limit = None
+        if not limit and not interval:
+            return
+        with self._cond:
+            self._refill(self.clock())
+            if limit and limit > 0:
+                self._limit = limit
+                self._tokens = min(self._tokens, float(limit))
+            if interval:
+                self._interval = interval
+            self._cond.notify_all()
+
+    def penalize(self, retry_after=None):
+        """收到 429：清空 token，並在 retry_after 秒內暫停發放"""
+        with self._cond:
+            now = self.clock()
+            self._tokens = 0.0
+            self._updated = now
+            pause = retry_after if retry_after is not None else self._interval
+            self._paused_until = max(self._paused_until, now + pause)
+
+    def stats(self):
+        with self._cond:
+            self._refill(self.clock())
+            return {
+                "limit": self._limit,
+                "interval": self._interval,
+                "tokens": round(self._tokens, 2),
+                "waiters": self._waiters,
+                "paused_for": max(0.0, round(self._paused_until - self.clock(), 2)),
+            }
+
+
+# 所有 CrossRef 請求共用的限速器
+crossref_limiter = AdaptiveRateLimiter()
@@ -1,21 +1,153 @@
 import re
 
-def parse_reference(text):
-    """從APA格式的文字中抽取作者與年份"""
-    year_match = re.search(r"\((\d{4})\)", text)
-    year = year_match.group(1) if year_match else "n.d."
+from .surname_index import PARTICLES
+
+# --------------------------------------------------------
+# APA 參考文獻條目解析（/api/generate_citation 與 DocumentAnalyzer 共用）
+# --------------------------------------------------------
+# 年份：(2020)、(2020a)、(2020, May 3)、(n.d.)；沒有括號時接受 ", 1998." / " 1998."
+_YEAR_PAREN_RE = re.compile(r"\((?:(\d{4})([a-z])?(?:,[^()]*)?|(n\.\s?d\.))\)")
+_YEAR_BARE_RE = re.compile(r"[,\s](\d{4})\.")
+
+# 作者："Last, F. M." / "Last, F.-M." / "De Menezes, K. J." / "López, J."；找不到時退回只取姓氏
+# UPPER / LETTER 除了 ASCII 也接受帶重音的拉丁字母（López、Müller、Ødegård）
+UPPER = r"[^\W\d_a-zß-öø-ÿ]"
+LETTER = r"[^\W\d_]"
+# 小寫開頭的姓氏介系詞：van der Berg, de la Cruz
+PARTICLE_PREFIX = r"(?:(?:%s)\s+)*" % "|".join(
+    sorted((p for p in PARTICLES if len(p) > 1), key=len, reverse=True))
+_AUTHOR_RE = re.compile(
+    rf"({PARTICLE_PREFIX}{UPPER}(?:{LETTER}|[\-'’\s])+?),\s*({UPPER}[.\-\s]*{UPPER}*[.\s]*{UPPER}*\.?)")
+_ET_AL_RE = re.compile(r"\bet\s+al\.?", re.I)
+_AUTHOR_SPLIT_RE = re.compile(r"[&,]")
+_SURNAME_ONLY_RE = re.compile(rf"^({UPPER}(?:{LETTER}|[\-'’\s])+?)(?:\s+{UPPER}\.|\s*$)")
+
+# 標題：年份之後到第一個句點 / 問號 / 驚嘆號（後面接空白或結尾）為止
+_TITLE_RE = re.compile(r"[).\s]*(.+?)([.?!])(?=\s|$)")
+# 期刊：Journal Name, 12(3), 45-67[, e123]
+_JOURNAL_RE = re.compile(
+    r"\s*(?P<journal>[^,]+?),\s*(?P<volume>\d+)\s*(?:\((?P<issue>[^)]+)\))?"
+    r"(?:,\s*(?P<pages>[A-Za-z]?\d+(?:\s*[-–—]\s*[A-Za-z]?\d+)?))?")
+_DOI_RE = re.compile(r"(?:https?://(?:dx\.)?doi\.org/|doi:\s*)?(10\.\d{4,9}/[^\s\"<>]+)", re.I)
+_URL_RE = re.compile(r"https?://\S+")
+_TRAILING_PUNCT = ".,;)]"
+
+
+def find_year(text):
+    """回傳 (年份, 年份後綴, 年份前的位置, 年份後的位置)，找不到回傳 None
+
+    括號格式優先（與參考文獻清單的合併判斷一致）；n.d. 的年份為 "n.d."。
+    """
+    match = _YEAR_PAREN_RE.search(text)
+    if match:
+        if match.group(3):
+            return "n.d.", "", match.start(), match.end()
+        return match.group(1), match.group(2) or "", match.start(), match.end()
+    match = _YEAR_BARE_RE.search(text)
+    if match:
+        return match.group(1), "", match.start(), match.end() - 1
+    return None
+
+
+def extract_doi(text):
+    """文字中的 DOI（含 https://doi.org/ 或 doi: 形式），沒有則回傳 None"""
+    match = _DOI_RE.search(text or "")
+    if not match:
+        return None
+    return match.group(1).rstrip(_TRAILING_PUNCT)
+
 
-    authors_part = text.split("(")[0].strip()
-    authors = re.split(r"[,;&]\s*|\sand\s", authors_part)
-    authors = [a.strip() for a in authors if a.strip()]
+def _parse_authors(authors_part):
+    authors = []
+    matches = _AUTHOR_RE.findall(authors_part)
+    if matches:
+        # 找到完整的 "姓, 名" 格式
+        for last_name, initials in matches:
+            clean_initials = initials.strip().rstrip('.')
+            if not clean_initials.endswith('.'):
+                clean_initials += '.'
+            authors.append(f"{last_name.strip()}, {clean_initials}")
+        return authors
 
-    title_match = re.search(r"\)\.\s*(.*?)(?:\.\s*\*|$)", text)
-    title = title_match.group(1).strip() if title_match else ""
+    # 備用方法：只提取姓氏（先移除 "et al." 以避免干擾）
+    for part in _AUTHOR_SPLIT_RE.split(_ET_AL_RE.sub('', authors_part)):
+        match = _SURNAME_ONLY_RE.match(part.strip())
+        if match:
+            last_name = match.group(1).strip().rstrip('.,')
+            if f"{last_name}," not in [a.split(',')[0] + ',' for a in authors]:
+                authors.append(f"{last_name},")
+    return authors
 
-    return {
-        "authors": authors,
+
+def parse_reference_entry(text):
+    """一次由左到右解析一筆 APA 參考文獻，回傳所有欄位
+
+    作者 (年份). 標題. 期刊, 卷(期), 頁碼. https://doi.org/...
+    找不到年份時回傳 None。各欄位缺少時為空字串（authors 為空 list）。
+    """
+    text = (text or "").strip()
+    year = find_year(text)
+    if year is None:
+        return None
+    year, year_suffix, authors_end, year_end = year
+
+    entry = {
+        "authors": _parse_authors(text[:authors_end].strip()),
         "year": year,
-        "title": title,
+        "year_suffix": year_suffix,
+        "title": "",
         "journal": "",
-        "doi": ""
-    }
\ No newline at end of file
+        "volume": "",
+        "issue": "",
+        "pages": "",
+        "publisher": "",
+        "doi": "",
+        "url": "",
+    }
+
+    rest = text[year_end:]
+    pos = 0
+    title = _TITLE_RE.match(rest)
+    if title and not title.group(1).lstrip().lower().startswith(("http", "doi:")):
+        # 問號 / 驚嘆號是標題的一部分，句點不是
+        entry["title"] = title.group(1).strip() + (title.group(2) if title.group(2) != "." else "")
+        pos = title.end()
+
+    source = rest[pos:]
+    doi = _DOI_RE.search(source)
+    if doi:
+        entry["doi"] = doi.group(1).rstrip(_TRAILING_PUNCT)
+        source = source[:doi.start()]
+    else:
+        url = _URL_RE.search(source)
+        if url:
+            entry["url"] = url.group(0).rstrip(_TRAILING_PUNCT)
+            source = source[:url.start()]
+
+    journal = _JOURNAL_RE.match(source)
+    if journal:
+        entry["journal"] = journal.group("journal").strip()
+        entry["volume"] = journal.group("volume")
+        entry["issue"] = (journal.group("issue") or "").strip()
+        pages = journal.group("pages") or ""
+        entry["pages"] = "".join(pages.split()) if " " in pages else pages
+    else:
+        # 書籍等：剩下的第一段視為出版者
+        entry["publisher"] = source.strip().split(". ")[0].strip(" .")
+    return entry
+
+
+def parse_reference(text):
+    """從APA格式的文字中抽取作者、年份、標題、期刊、卷期頁碼與 DOI"""
+    entry = parse_reference_entry(text)
+    if entry is None:
+        # 沒有年份：仍盡量取出作者與 DOI
+        authors_part = (text or "").split("(")[0].strip()
+        return {
+            "authors": _parse_authors(authors_part),
+            "year": "n.d.",
+            "title": "",
+            "journal": "",
+            "doi": extract_doi(text) or "",
+        }
+    return entry
@@ -0,0 +1,185 @@
+import os
+import re
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, wait
+from difflib import SequenceMatcher
+
+from .crossref_service import fetch_metadata_from_doi, fetch_metadata_from_keywords
+from .deadline import Deadline
+from .reference_parser import extract_doi, parse_reference_entry
+
+# --------------------------------------------------------
+# 參考文獻清單 CrossRef 驗證設定（可用環境變數覆寫）
+# --------------------------------------------------------
+# 整份清單的驗證時間上限（秒）；期限到時仍未完成的條目標記為 unverified
+VERIFY_REFERENCES_BUDGET = float(os.environ.get("VERIFY_REFERENCES_BUDGET", "20"))
+# 所有文件共用的驗證 worker 數
+VERIFY_REFERENCES_WORKERS = int(os.environ.get("VERIFY_REFERENCES_WORKERS", "4"))
+# 標題相似度達此值視為相同標題
+TITLE_MATCH_RATIO = 0.9
+# 以標題搜尋時，最相近的候選低於此相似度就視為找不到
+TITLE_FOUND_RATIO = 0.6
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def extract_title(text):
+    """APA 參考文獻中年份之後的標題；以第一個句點 / 問號 / 驚嘆號結束"""
+    entry = parse_reference_entry(text)
+    return entry["title"] if entry else ""
+
+
+def _fold(value):
+    """比對用：去除重音符號並轉小寫"""
+    value = unicodedata.normalize("NFKD", value or "")
+    return "".join(ch for ch in value if not unicodedata.combining(ch)).casefold()
+
+
+def _title_words(title):
+    return " ".join(re.findall(r"[0-9a-z]+", _fold(title)))
+
+
+def title_similarity(a, b):
+    a, b = _title_words(a), _title_words(b)
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _surname(author):
+    """「Smith, J.」/「Smith, John」→ smith（只有姓氏時同樣適用）"""
+    return _fold(author.split(",")[0]).strip()
+
+
+def compare_reference(reference, title, meta):
+    """比較參考文獻與 CrossRef metadata，回傳不一致的欄位清單"""
+    mismatches = []
+
+    found_title = meta.get("title") or ""
+    if title and found_title and title_similarity(title, found_title) < TITLE_MATCH_RATIO:
+        mismatches.append({"field": "title", "reference": title, "crossref": found_title})
+
+    year = str(reference.get("year") or "")
+    found_year = str(meta.get("year") or "")
+    if year and found_year not in ("", "None", "n.d.") and year[:4] != found_year:
+        mismatches.append({"field": "year", "reference": year, "crossref": found_year})
+
+    ref_surnames = [s for s in (_surname(a) for a in reference.get("authors", [])) if s]
+    found_authors = meta.get("authors") or []
+    found_surnames = [s for s in (_surname(a) for a in found_authors) if s]
+    if ref_surnames and found_surnames:
+        missing = [s for s in ref_surnames if s not in found_surnames]
+        if ref_surnames[0] != found_surnames[0] or missing:
+            mismatches.append({
+                "field": "authors",
+                "reference": "; ".join(reference.get("authors", [])),
+                "crossref": "; ".join(found_authors),
+            })
+    return mismatches
+
+
+def _resolve_by_title(reference, title, deadline):
+    """以「標題 + 第一作者姓氏」搜尋，取標題最相近的候選；找不到回傳 None"""
+    first = _surname(reference["authors"][0]) if reference.get("authors") else ""
+    candidates = fetch_metadata_from_keywords(f"{title} {first}".strip(), limit=3, deadline=deadline)
+    best, best_ratio = None, 0.0
+    for candidate in candidates:
+        ratio = title_similarity(title, candidate.get("title"))
+        if ratio > best_ratio:
+            best, best_ratio = candidate, ratio
+    if best is None or best_ratio < TITLE_FOUND_RATIO:
+        return None
+    if best.get("doi"):
+        # 搜尋結果已寫入 DOI 快取，取得完整作者清單不需再連線
+        try:
+            return fetch_metadata_from_doi(best["doi"], deadline=deadline)
+        except (ValueError, ConnectionError):
+            pass
+    return best
+
+
+def verify_reference(reference, deadline=None):
+    """驗證單一參考文獻：有 DOI 依 DOI 查詢，否則依標題與作者搜尋
+
+    回傳 status 為 verified / mismatch / not_found / unverified 的結果 dict。
+    """
+    text = reference.get("text", "")
+    # _parse_reference_section 已解析出 DOI / 標題時直接使用，不再重新解析
+    doi = reference.get("doi") or extract_doi(text)
+    title = reference.get("title") or extract_title(text)
+    result = {"id": reference.get("id"), "text": text, "doi": doi or "", "title": title,
+              "resolved_by": "doi" if doi else "title"}
+
+    try:
+        if doi:
+            meta = fetch_metadata_from_doi(doi, deadline=deadline)
+        elif title:
+            meta = _resolve_by_title(reference, title, deadline)
+        else:
+            return dict(result, status="unverified", message="找不到 DOI 或標題，無法查詢。")
+    except ValueError:
+        return dict(result, status="not_found", message="DOI 不存在於 CrossRef。")
+    except Exception as e:
+        # CrossRef 無法連線、期限用完等：不影響其他條目
+        return dict(result, status="unverified", message=str(e))
+
+    if meta is None:
+        return dict(result, status="not_found", message="CrossRef 找不到標題相符的文獻。")
+
+    mismatches = compare_reference(reference, title, meta)
+    return dict(result,
+                status="mismatch" if mismatches else "verified",
+                mismatches=mismatches,
+                crossref={"title": meta.get("title", ""), "year": str(meta.get("year", "")),
+                          "authors": meta.get("authors", []), "doi": meta.get("doi", "")},
+                stale=bool(meta.get("stale")))
+
+
+def _executor():
+    """所有文件共用的驗證 thread pool，限制對 CrossRef 的總並行數"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=VERIFY_REFERENCES_WORKERS,
+                                           thread_name_prefix="reference-verify")
+    return _pool
+
+
+def verify_reference_list(references, budget=None):
+    """並行驗證整份參考文獻清單，整份清單共用一個 budget 秒的期限
+
+    結果依輸入順序回傳；期限到時仍未完成的條目標記為 unverified。
+    DOI / 搜尋結果都經過 metadata 快取與 single-flight，重複的條目只查一次。
+    """
+    deadline = Deadline(VERIFY_REFERENCES_BUDGET if budget is None else budget)
+    executor = _executor()
+    futures = [executor.submit(verify_reference, ref, deadline) for ref in references]
+    if futures:
+        wait(futures, timeout=deadline.remaining())
+
+    items = []
+    timed_out = False
+    for ref, future in zip(references, futures):
+        if future.done() and not future.cancelled():
+            items.append(future.result())
+        else:
+            timed_out = True
+            # 尚未開始的直接取消，執行中的讓它在背景完成（結果會進快取）
+            future.cancel()
+            items.append({"id": ref.get("id"), "text": ref.get("text", ""),
+                          "doi": ref.get("doi") or extract_doi(ref.get("text", "")) or "",
+                          "title": ref.get("title") or extract_title(ref.get("text", "")),
+                          "status": "unverified", "message": "驗證時間已達上限。"})
+
+    counts = {status: 0 for status in ("verified", "mismatch", "not_found", "unverified")}
+    for item in items:
+        counts[item["status"]] += 1
+    # 有 DOI 的條目直接以 DOI 精確查詢，不需標題模糊搜尋
+    by_doi = sum(1 for item in items if item["doi"])
+    return {"items": items, "summary": dict(counts, total=len(items)),
+            "doi_fast_path": {"count": by_doi,
+                              "fraction": round(by_doi / len(items), 3) if items else 0.0},
+            "timed_out": timed_out}
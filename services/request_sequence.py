@@ -0,0 +1,60 @@
+import os
+import threading
+from collections import OrderedDict
+
+# 記住最新序號的用戶端數量上限（超過時淘汰最久沒有請求的用戶端）
+MAX_TRACKED_CLIENTS = int(os.environ.get("SUGGEST_MAX_TRACKED_CLIENTS", "10000"))
+
+
+class RequestSequencer:
+    """記錄每個用戶端最新的請求序號
+
+    自動補全每次輸入都會送出一個帶遞增序號的請求；begin() 回傳一個 callable，
+    同一個用戶端之後送出較大序號時它會回傳 True，進行中的舊請求以此得知可以放棄。
+    """
+
+    def __init__(self, max_clients=MAX_TRACKED_CLIENTS):
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._latest = OrderedDict()
+        self._started = 0
+        self._superseded = 0
+
+    def begin(self, client_id, seq):
+        """登記 client_id 的第 seq 個請求，回傳「是否已被較新請求取代」的 callable"""
+        with self._lock:
+            self._started += 1
+            current = self._latest.get(client_id)
+            if current is None or seq > current:
+                self._latest[client_id] = seq
+            self._latest.move_to_end(client_id)
+            while len(self._latest) > self.max_clients:
+                self._latest.popitem(last=False)
+
+        def superseded():
+            # 用戶端被淘汰後視為沒有更新的請求
+            return self._latest.get(client_id, seq) > seq
+
+        return superseded
+
+    def record_superseded(self):
+        with self._lock:
+            self._superseded += 1
+
+    def reset(self):
+        with self._lock:
+            self._latest.clear()
+            self._started = 0
+            self._superseded = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clients": len(self._latest),
+                "requests": self._started,
+                "superseded": self._superseded,
+            }
+
+
+# /api/suggest_doi 使用的序號表
+suggest_sequencer = RequestSequencer()
@@ -0,0 +1,60 @@
+import copy
+import threading
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """合併同一時間、相同 key 的重複呼叫（single-flight）
+
+    第一個呼叫者（leader）實際執行函式；執行期間以相同 key 進來的呼叫者
+    會等待並共用 leader 的結果或例外。leader 完成後 key 即釋放，之後的
+    呼叫會重新執行（結果的重複使用交給快取處理）。
+
+    wait_timeout 限制等待者最多等多久，逾時丟出 TimeoutError（leader 不受影響）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, wait_timeout=None, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            if not call.event.wait(wait_timeout):
+                raise TimeoutError("等待相同查詢的結果逾時。")
+            if call.error is not None:
+                raise call.error
+            # 每個等待者拿到獨立的副本，避免彼此修改同一份 dict
+            return copy.deepcopy(call.result)
+
+        try:
+            result = fn(*args, **kwargs)
+            # 等待者從快照複製，leader 的呼叫端之後修改結果也不影響它們
+            call.result = copy.deepcopy(result)
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def in_flight(self):
+        """目前進行中的 key 數量（監控用）"""
+        with self._lock:
+            return len(self._calls)
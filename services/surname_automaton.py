@@ -0,0 +1,113 @@
+import unicodedata
+from collections import deque
+
+from .surname_index import _TRANSLITERATE
+
+# --------------------------------------------------------
+# 多姓氏 Aho–Corasick 自動機（敘述型引用偵測）
+# --------------------------------------------------------
+# 內文與姓氏都逐字元折疊（去重音、轉小寫、統一撇號），長度不變，
+# 比對到的位置可以直接對回原文
+
+
+class _FoldTable(dict):
+    """str.translate 用的逐字元折疊表：第一次遇到的字元才計算並快取"""
+
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        folded = unicodedata.normalize("NFKD", char)[:1].casefold().translate(_TRANSLITERATE)
+        if char in "’‘`´":
+            folded = "'"
+        elif len(folded) != 1 or folded.isspace():
+            # 折疊後長度改變（ß → ss）的字元保留原樣；各種空白統一為一般空格
+            folded = " " if char.isspace() else char
+        self[codepoint] = folded
+        return folded
+
+
+_FOLD_TABLE = _FoldTable()
+
+
+def fold_text(text):
+    """與原文等長的比對形式：López → lopez、Van der Berg → van der berg、O’Brien → o'brien"""
+    return text.translate(_FOLD_TABLE)
+
+
+class SurnameAutomaton:
+    """參考文獻姓氏的 Aho–Corasick 自動機
+
+    一次線性掃描內文就找出所有已知姓氏（含 van der Berg 等多個詞的姓氏）出現的位置，
+    掃描成本只和內文長度有關，與姓氏數量無關。每個姓氏可對應多個值。
+    """
+
+    def __init__(self):
+        self._goto = [{}]      # 狀態 → {字元: 下一個狀態}
+        self._fail = [0]
+        self._own = [None]     # 狀態 → 在此結束的姓氏 (長度, 值 list)
+        self._output = [()]    # 狀態 → 含 failure link 上所有姓氏，較長的在前
+        self._values = {}      # 折疊後姓氏 → 值 list
+        self._built = True
+
+    def __len__(self):
+        return len(self._values)
+
+    def add(self, surname, value):
+        pattern = " ".join(fold_text(surname).split())
+        if not pattern:
+            return
+        if pattern in self._values:
+            self._values[pattern].append(value)
+            return
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append(None)
+                self._output.append(())
+                self._goto[state][char] = next_state
+            state = next_state
+        self._values[pattern] = [value]
+        self._own[state] = (len(pattern), self._values[pattern])
+        self._built = False
+
+    def _build(self):
+        """以 BFS 計算 failure link；failure 狀態較淺，它的輸出已先算好可直接併入"""
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+            self._output[state] = (self._own[state],) if self._own[state] else ()
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                own = (self._own[next_state],) if self._own[next_state] else ()
+                self._output[next_state] = own + self._output[fail]
+                queue.append(next_state)
+        self._built = True
+
+    def find_all(self, text):
+        """回傳 [(start, end, 值 list)]：text[start:end] 是完整的詞（前後不是字母或數字）"""
+        if not self._built:
+            self._build()
+        folded = fold_text(text)
+        goto, fail, output = self._goto, self._fail, self._output
+        length = len(folded)
+        matches = []
+        state = 0
+        for end, char in enumerate(folded, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] and (end == length or not folded[end].isalnum()):
+                for size, values in output[state]:
+                    start = end - size
+                    if start == 0 or not folded[start - 1].isalnum():
+                        matches.append((start, end, values))
+        return matches
@@ -0,0 +1,130 @@
+import re
+import sys
+import unicodedata
+
+# --------------------------------------------------------
+# 姓氏比對鍵與模糊索引（引用 ↔ 參考文獻比對、「您是否指」建議）
+# --------------------------------------------------------
+# 依姓氏長度決定可容許的編輯距離：短姓氏只容許 1 個字差異
+MAX_EDIT_DISTANCE = 2
+SHORT_SURNAME_LENGTH = 5
+
+
+def fold_surname(surname):
+    """比對用的姓氏形式：去除重音符號並轉小寫（López → lopez）"""
+    value = unicodedata.normalize("NFKD", surname or "")
+    return "".join(ch for ch in value if not unicodedata.combining(ch)).casefold().strip()
+
+
+# NFKD 無法拆解的字母
+_TRANSLITERATE = str.maketrans({"ø": "o", "æ": "ae", "œ": "oe", "ł": "l", "đ": "d",
+                                "ð": "d", "þ": "th", "ı": "i"})
+# 德文拼法：Müller 另有 Mueller 這個比對鍵（只用於原文有 ä/ö/ü 的姓氏，Xue ≠ Xu）
+_UMLAUT_DIGRAPHS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue"})
+# 姓氏前的小寫介系詞：De Menezes / van der Berg / d'Alembert
+PARTICLES = frozenset(["d", "da", "dal", "de", "del", "della", "den", "der", "des", "di", "do",
+                       "dos", "du", "l", "la", "le", "st", "ten", "ter", "van", "von", "zu"])
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def surname_key(surname):
+    """姓氏的標準比對鍵（已 intern）：López = Lopez、Müller = Muller、
+    De Menezes = Menezes、O'Brien = O’Brien；只有介系詞時保留介系詞"""
+    words = _WORD_RE.findall(fold_surname(surname).translate(_TRANSLITERATE))
+    while len(words) > 1 and words[0] in PARTICLES:
+        words = words[1:]
+    return sys.intern("".join(words))
+
+
+def umlaut_key(surname):
+    """有 ä/ö/ü 的姓氏的德文拼法比對鍵（Müller → mueller）；沒有變音符號時回傳 None"""
+    spelled = unicodedata.normalize("NFC", surname or "").casefold().translate(_UMLAUT_DIGRAPHS)
+    if spelled == unicodedata.normalize("NFC", surname or "").casefold():
+        return None
+    return surname_key(spelled)
+
+
+def surname_keys(surname):
+    """姓氏的所有比對鍵：標準鍵，原文有 ä/ö/ü 時另加德文拼法（Müller → muller、mueller）"""
+    key = surname_key(surname)
+    spelled = umlaut_key(surname)
+    return (key, spelled) if spelled and spelled != key else (key,)
+
+
+def edit_distance(a, b, limit=None):
+    """Levenshtein 距離；超過 limit 時提早結束並回傳 limit + 1"""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def allowed_distance(surname):
+    return 1 if len(surname) <= SHORT_SURNAME_LENGTH else MAX_EDIT_DISTANCE
+
+
+def _deletes(word, max_distance):
+    """word 刪除最多 max_distance 個字元後的所有字串（含 word 本身）"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - variants
+        variants |= frontier
+    return variants
+
+
+class SurnameIndex:
+    """姓氏模糊索引：查詢編輯距離 max_distance 以內的所有姓氏
+
+    採 symmetric delete：加入時把姓氏刪除最多 MAX_EDIT_DISTANCE 個字元的所有變形
+    登記到 dict；查詢時產生查詢字串的刪除變形並查表，只對共用變形的候選計算編輯距離。
+    兩個字串編輯距離 ≤ k 時，必有各自刪除 ≤ k 個字元後相同的形式，因此不會漏掉；
+    查詢成本只和姓氏長度有關，與參考文獻數量無關。每個姓氏可對應多個值。
+    """
+
+    def __init__(self):
+        self._values = {}   # 姓氏 → 值 list
+        self._deletes = {}  # 刪除變形 → 姓氏 set
+
+    def __len__(self):
+        return sum(len(values) for values in self._values.values())
+
+    def add(self, surname, value):
+        key = surname_key(surname)
+        if not key:
+            return
+        if key not in self._values:
+            self._values[key] = []
+            for variant in _deletes(key, MAX_EDIT_DISTANCE):
+                self._deletes.setdefault(variant, set()).add(key)
+        self._values[key].append(value)
+
+    def search(self, surname, max_distance=None):
+        """回傳 [(距離, 姓氏比對鍵, 值 list)]，依距離排序"""
+        key = surname_key(surname)
+        if not key:
+            return []
+        if max_distance is None:
+            max_distance = allowed_distance(key)
+        max_distance = min(max_distance, MAX_EDIT_DISTANCE)
+        candidates = set()
+        for variant in _deletes(key, max_distance):
+            candidates |= self._deletes.get(variant, set())
+        results = []
+        for word in candidates:
+            distance = edit_distance(key, word, limit=max_distance)
+            if distance <= max_distance:
+                results.append((distance, word, self._values[word]))
+        results.sort(key=lambda item: (item[0], item[1]))
+        return results
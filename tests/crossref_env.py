@@ -0,0 +1,49 @@
+"""
+CrossRef 相關測試共用的環境設定
+
+多數 CrossRef 測試都需要：只用記憶體的 metadata 快取、空的前綴索引、
+把 CROSSREF_API_URL 指向本機 stub server，並在結束時全部還原。
+
+使用方式：
+    with isolated_crossref(), crossref_stub(delay=0.2) as stub:
+        ...
+"""
+import os
+import sys
+from contextlib import contextmanager
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import crossref_service, http_client
+from services.metadata_cache import metadata_cache
+from services.prefix_index import PrefixIndex
+from benchmarks.crossref_stub import CrossrefStub
+
+
+@contextmanager
+def isolated_crossref():
+    """只用記憶體快取與空的前綴索引；結束時清空快取並還原 URL、快取路徑與索引"""
+    original_url = http_client.CROSSREF_API_URL
+    original_db = metadata_cache.db_path
+    original_index = crossref_service.suggest_index
+    metadata_cache.db_path = ''
+    crossref_service.suggest_index = PrefixIndex(path='')
+    metadata_cache.clear()
+    try:
+        yield
+    finally:
+        http_client.CROSSREF_API_URL = original_url
+        metadata_cache.clear()
+        metadata_cache.db_path = original_db
+        crossref_service.suggest_index = original_index
+
+
+@contextmanager
+def crossref_stub(**kwargs):
+    """啟動 CrossrefStub（參數原樣傳入）並把 CROSSREF_API_URL 指向它，結束時還原"""
+    original_url = http_client.CROSSREF_API_URL
+    with CrossrefStub(**kwargs) as stub:
+        http_client.CROSSREF_API_URL = stub.url
+        try:
+            yield stub
+        finally:
+            http_client.CROSSREF_API_URL = original_url
@@ -0,0 +1,91 @@
+"""
+測試批次 citation 端點：並行查詢 CrossRef、相同輸入只查一次、依輸入順序串流回傳
+"""
+import sys
+import os
+import json
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+from routes import citation
+from services.metadata_cache import metadata_cache
+from tests.crossref_env import crossref_stub, isolated_crossref
+
+
+def test_batch_citation():
+    print("=" * 80)
+    print("測試批次 citation 端點")
+    print("=" * 80)
+
+    app = Flask(__name__)
+    app.register_blueprint(citation.bp)
+    client = app.test_client()
+
+    with isolated_crossref():
+        # 1. 輸入檢查
+        assert client.post('/api/generate_citations', json={}).status_code == 400
+        assert client.post('/api/generate_citations', json={"inputs": "10.1/x"}).status_code == 400
+        too_many = {"inputs": [f"10.5555/many.{i}" for i in range(citation.BATCH_MAX_INPUTS + 1)]}
+        assert client.post('/api/generate_citations', json=too_many).status_code == 413
+        print("\n✅ 空白、格式錯誤與超過上限的批次被拒絕")
+
+        # 2. 8 個 DOI（含重複）、1 筆 reference、1 組關鍵字、1 個不存在的 DOI
+        dois = [f"10.5555/batch.{i}" for i in range(8)]
+        inputs = dois[:4] + [
+            "Smith, J. (2020). A study of exercise. Journal of Tests, 1(2), 3-4.",
+            dois[0],
+            "exercise cognition",
+        ] + dois[4:] + ["https://doi.org/10.0000/missing"]
+
+        with crossref_stub(delay=0.2) as stub:
+            start = time.perf_counter()
+            resp = client.post('/api/generate_citations', json={"text": "\n".join(inputs) + "\n\n"})
+            lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+            elapsed = time.perf_counter() - start
+
+            print(f"【批次】{len(inputs)} 筆輸入，耗時 {elapsed * 1000:.0f} ms，upstream 請求 {stub.request_count} 次")
+            assert resp.mimetype == "application/x-ndjson"
+            assert [line["index"] for line in lines] == list(range(len(inputs)))
+            assert [line["input"] for line in lines] == inputs
+            # 相同 DOI 只查一次：9 個 DOI 加上 1 次關鍵字搜尋
+            assert stub.request_count == 10, stub.paths
+            # 10 個 0.2 秒的請求以 4 個 worker 並行，不需逐一等待
+            assert elapsed < 10 * 0.2 * 0.6
+
+            by_mode = {line["input"]: line for line in lines}
+            assert by_mode[dois[0]]["status"] == "success"
+            assert by_mode[dois[0]]["citations"]["parenthetical"]
+            assert lines[5]["reference"] == lines[0]["reference"]
+            assert by_mode[inputs[4]]["mode"] == "reference"
+            assert by_mode["exercise cognition"]["mode"] == "keyword"
+            assert by_mode["exercise cognition"]["results"]
+            assert by_mode[inputs[-1]]["status"] == "error" and by_mode[inputs[-1]]["http_status"] == 500
+            print("✅ 結果依輸入順序回傳，各筆的錯誤不影響其他輸入")
+
+            # 3. 與單筆端點產生相同的結果
+            single = client.post('/api/generate_citation', json={"input": dois[3]}).get_json()
+            assert single["reference"] == lines[3]["reference"]
+            assert single["citations"] == lines[3]["citations"]
+
+            # 4. 每個請求最多同時排入 BATCH_WINDOW 筆；用戶端中途斷線時其餘輸入不再查詢
+            metadata_cache.clear()
+            stub.reset_stats()
+            many = [f"10.5555/window.{i}" for i in range(20)]
+            resp = client.post('/api/generate_citations', json={"inputs": many}, buffered=False)
+            first = json.loads(next(iter(resp.response)))
+            assert first["input"] == many[0]
+            resp.close()
+            time.sleep(0.5)
+            print(f"【中途斷線】20 筆輸入只查詢了 {stub.request_count} 筆")
+            assert stub.request_count <= citation.BATCH_WINDOW + 1
+            assert citation._batch_executor()._work_queue.qsize() == 0
+
+    print("\n✅ 所有批次 citation 測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_batch_citation()
+    exit(0 if success else 1)
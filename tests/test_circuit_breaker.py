@@ -0,0 +1,121 @@
+"""
+測試 CrossRef 斷路器與 stale-while-revalidate：
+連續失敗後快速失敗、回傳過期快取資料、恢復後在背景更新快取
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError, crossref_breaker
+from services.crossref_service import fetch_metadata_from_doi, pending_stale_refreshes
+from services.metadata_cache import metadata_cache, doi_cache_key
+from tests.crossref_env import crossref_stub, isolated_crossref
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_circuit_breaker():
+    print("=" * 80)
+    print("測試 CrossRef 斷路器")
+    print("=" * 80)
+
+    # 1. 狀態轉換：closed → open → half_open → closed
+    clock = FakeClock()
+    recovered = []
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=clock)
+    breaker.add_recovery_listener(lambda: recovered.append(True))
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "open"
+    try:
+        breaker.before_call()
+        assert False, "應該丟出 CircuitOpenError"
+    except CircuitOpenError:
+        print("\n✅ 連續失敗 3 次後斷路器開啟並快速失敗")
+
+    clock.now += 10
+    assert breaker.state == "half_open"
+    breaker.before_call()  # 試探請求
+    try:
+        breaker.before_call()
+        assert False, "half_open 只放行一個請求"
+    except CircuitOpenError:
+        pass
+    breaker.record_failure()
+    assert breaker.state == "open"
+    print("✅ half_open 試探失敗後重新開啟")
+
+    clock.now += 10
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed" and recovered == [True]
+    snapshot = breaker.snapshot()
+    print(f"✅ 試探成功後關閉：{snapshot}")
+    assert snapshot["open_count"] == 2 and snapshot["rejected"] == 2
+
+    # 2. 整合：CrossRef 故障時回傳 stale 資料，恢復後背景更新
+    original_settings = (crossref_breaker.failure_threshold, crossref_breaker.reset_timeout)
+    crossref_breaker.failure_threshold = 2
+    crossref_breaker.reset_timeout = 0.2
+    crossref_breaker.reset()
+    outage = {"down": False}
+    try:
+        with isolated_crossref(), crossref_stub(status=lambda path: 503 if outage["down"] else None) as stub:
+            doi = "10.5555/stale.1"
+            cached = fetch_metadata_from_doi(doi)
+            # 讓快取過期
+            metadata_cache.set(doi_cache_key(doi), dict(cached, title="Old title"), ttl=-1)
+
+            outage["down"] = True
+            stub.reset_stats()
+            meta = fetch_metadata_from_doi(doi)
+            print(f"\n【故障】回傳 stale={meta.get('stale')} title={meta['title']!r}")
+            assert meta.get("stale") is True and meta["title"] == "Old title"
+
+            try:
+                fetch_metadata_from_doi("10.5555/never-cached")
+                assert False, "沒有快取時應該丟出 ConnectionError"
+            except ConnectionError:
+                pass
+            assert crossref_breaker.state == "open"
+
+            before = stub.request_count
+            start = time.monotonic()
+            for _ in range(20):
+                assert fetch_metadata_from_doi(doi).get("stale") is True
+            elapsed = time.monotonic() - start
+            print(f"【斷路器開啟】20 次查詢耗時 {elapsed * 1000:.1f} ms，upstream 請求 {stub.request_count - before} 次")
+            assert stub.request_count == before
+            assert pending_stale_refreshes() == 1
+
+            # 恢復：reset_timeout 後的試探請求成功即關閉，並在背景更新 stale 的 DOI
+            outage["down"] = False
+            time.sleep(0.25)
+            fresh = fetch_metadata_from_doi("10.5555/probe")
+            assert "stale" not in fresh and crossref_breaker.state == "closed"
+            for _ in range(50):
+                if not pending_stale_refreshes():
+                    break
+                time.sleep(0.02)
+            hit, value = metadata_cache.get(doi_cache_key(doi))
+            print(f"【恢復】背景更新後 hit={hit} title={value and value['title']!r}")
+            assert hit and value["title"] != "Old title"
+    finally:
+        crossref_breaker.failure_threshold, crossref_breaker.reset_timeout = original_settings
+        crossref_breaker.reset()
+
+    print("\n✅ 所有斷路器測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_circuit_breaker()
+    exit(0 if success else 1)
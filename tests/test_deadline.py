@@ -0,0 +1,95 @@
+"""
+測試 generate_citation 的時間預算：每個 CrossRef 呼叫的 timeout 不超過剩餘時間，
+預算用完時回傳目前最好的結果並標記 degraded
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+from routes import citation
+from services.crossref_service import safe_request
+from services.deadline import Deadline, DeadlineExceeded
+from services.metadata_cache import metadata_cache, doi_cache_key
+from tests.crossref_env import crossref_stub, isolated_crossref
+
+
+def test_deadline():
+    print("=" * 80)
+    print("測試 CrossRef 呼叫鏈的時間預算")
+    print("=" * 80)
+
+    # 1. Deadline 基本行為
+    deadline = Deadline(0.2)
+    assert deadline.cap(10) <= 0.2
+    assert deadline.cap(0.1) == 0.1
+    time.sleep(0.2)
+    assert deadline.expired()
+    try:
+        deadline.cap(10)
+        assert False, "應該丟出 DeadlineExceeded"
+    except DeadlineExceeded:
+        print("\n✅ 期限用完後 cap() 丟出 DeadlineExceeded")
+
+    app = Flask(__name__)
+    app.register_blueprint(citation.bp)
+    client = app.test_client()
+
+    original_budget = citation.GENERATE_CITATION_BUDGET
+    try:
+        # 單篇 DOI 查詢與含 slow 的搜尋都很慢（模擬 CrossRef 卡住）
+        def delay(path):
+            return 3.0 if path.startswith('/works/') or 'slow' in path else 0.05
+
+        with isolated_crossref(), crossref_stub(delay=delay) as stub:
+            # 2. safe_request 在期限內放棄，不等完整 timeout 與重試
+            start = time.monotonic()
+            res = safe_request(f"{stub.url}/works/10.5555/slow", retries=2, delay=2,
+                               deadline=Deadline(0.3))
+            elapsed = time.monotonic() - start
+            print(f"【safe_request】期限 0.3 s，實際 {elapsed * 1000:.0f} ms")
+            assert res is None and elapsed < 0.6
+
+            # 3. DOI 模式：快取已過期、CrossRef 在預算內沒回應 → 回傳舊資料並標記 degraded
+            citation.GENERATE_CITATION_BUDGET = 0.5
+            doi = "10.5555/expired.1"
+            metadata_cache.set(doi_cache_key(doi), {"title": "Cached title", "authors": ["Smith, J."],
+                                                    "year": "2020", "journal": "J", "doi": doi}, ttl=-1)
+            start = time.monotonic()
+            resp = client.post('/api/generate_citation', json={"input": doi})
+            elapsed = time.monotonic() - start
+            body = resp.get_json()
+            print(f"【DOI 模式】{resp.status_code} degraded={body.get('degraded')} "
+                  f"耗時 {elapsed * 1000:.0f} ms")
+            assert resp.status_code == 200 and body["degraded"] is True
+            assert body["meta"]["title"] == "Cached title"
+            assert elapsed < 1.0
+
+            # 4. 沒有可用資料時回傳 504 與 degraded
+            start = time.monotonic()
+            resp = client.post('/api/generate_citation', json={"input": "slow exercise keywords"})
+            elapsed = time.monotonic() - start
+            body = resp.get_json()
+            print(f"【關鍵字模式】{resp.status_code} degraded={body.get('degraded')} "
+                  f"耗時 {elapsed * 1000:.0f} ms")
+            assert resp.status_code == 504 and body["degraded"] is True
+            assert elapsed < 1.0
+
+            # 5. 預算充足時 degraded 為 False
+            citation.GENERATE_CITATION_BUDGET = 10
+            resp = client.post('/api/generate_citation', json={"input": "exercise cognition"})
+            body = resp.get_json()
+            assert resp.status_code == 200 and body["degraded"] is False
+            print("✅ 預算充足時 degraded=False")
+    finally:
+        citation.GENERATE_CITATION_BUDGET = original_budget
+
+    print("\n✅ 所有時間預算測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_deadline()
+    exit(0 if success else 1)
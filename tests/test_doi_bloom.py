@@ -0,0 +1,79 @@
+"""
+測試 DOI Bloom filter：不在清單中的 DOI 不連線即判定不存在，誤判率接近設定值
+"""
+import sys
+import os
+import shutil
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import crossref_service
+from services.doi_bloom import DoiBloomFilter, build_bloom, doi_bloom, main as build_main
+from tests.crossref_env import crossref_stub, isolated_crossref
+
+
+def test_doi_bloom():
+    print("=" * 80)
+    print("測試 DOI Bloom filter")
+    print("=" * 80)
+
+    tmp_dir = tempfile.mkdtemp()
+    original_path = doi_bloom.path
+    try:
+        # 1. 建立 filter：清單中的 DOI 一定命中（大小寫、前綴不影響）
+        known = [f"10.5555/Known.{i}" for i in range(20000)]
+        path = os.path.join(tmp_dir, "bloom.bin")
+        assert build_bloom(known, path, len(known), fp_rate=0.01) == len(known)
+        bloom = DoiBloomFilter(path)
+        assert all(doi in bloom for doi in known)
+        assert "https://doi.org/10.5555/KNOWN.7" in bloom
+        false_positives = sum(f"10.9999/unknown.{i}" in bloom for i in range(20000))
+        rate = false_positives / 20000
+        print(f"\n【誤判率】目標 1%，實測 {rate:.2%}，檔案 {bloom.size_bytes / 1024:.1f} KB，k={bloom.k}")
+        assert rate < 0.02
+        bloom.close()
+
+        # 2. 命令列工具
+        list_path = os.path.join(tmp_dir, "dois.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(known[:100]) + "\n\n")
+        cli_path = os.path.join(tmp_dir, "cli.bin")
+        assert build_main([list_path, "--fp-rate", "0.001", "--output", cli_path]) == 0
+        cli_bloom = DoiBloomFilter(cli_path)
+        assert cli_bloom.n == 100 and known[0] in cli_bloom
+        cli_bloom.close()
+
+        # 3. 整合：不存在的 DOI 不連線，精準查詢步驟直接跳過
+        doi_bloom.path = path
+        with isolated_crossref(), crossref_stub() as stub:
+            try:
+                crossref_service.fetch_metadata_from_doi("10.5555/typo.1")
+                assert False, "應該丟出 ValueError"
+            except ValueError:
+                pass
+            assert stub.request_count == 0
+            print("✅ 不在 filter 中的 DOI 直接判定不存在，沒有連線")
+
+            crossref_service.fetch_metadata_from_doi("10.5555/known.3")
+            assert stub.request_count == 1
+
+            stub.reset_stats()
+            crossref_service.suggest_doi_candidates("10.5555/typo.2")
+            assert not any(p.startswith("/works/10.5555/typo") for p in stub.paths), stub.paths
+            print(f"✅ 自動補全跳過精準查詢，直接模糊搜尋：{stub.paths[0]}")
+
+        # 4. 檔案不存在時不過濾
+        doi_bloom.path = os.path.join(tmp_dir, "missing.bin")
+        assert doi_bloom.might_exist("10.5555/anything")
+    finally:
+        doi_bloom.path = original_path
+        doi_bloom.get()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print("\n✅ 所有 Bloom filter 測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_doi_bloom()
+    exit(0 if success else 1)
@@ -0,0 +1,81 @@
+"""
+測試參考文獻中已附 DOI 時的快速路徑：以 DOI 作為精確識別，
+驗證與單筆查詢都不做標題搜尋，並回報走快速路徑的比例
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+from routes import citation
+from services.document_analyzer import DocumentAnalyzer
+from services.prefetcher import MetadataPrefetcher
+from services.reference_verifier import verify_reference_list
+from tests.crossref_env import crossref_stub, isolated_crossref
+
+REFERENCES = """References
+Smith, J., & Lee, K. (2000). Stub work about exercise and cognition 10.5555/fast.1. Stub Journal, 1, 1-2. https://doi.org/10.5555/fast.1
+Brown, A. (2019). Stub work about exercise and cognition 10.5555/fast.2. Stub Journal, 1, 3-4. doi:10.5555/fast.2
+Browne, A. (2018). The same work listed twice with a typo. Stub Journal, 1, 3-4. https://doi.org/10.5555/FAST.2
+Nobody, Z. (2005). Completely unrelated title about gardening. Garden Letters, 4, 9-10.
+"""
+
+
+def test_doi_fast_path():
+    print("=" * 80)
+    print("測試參考文獻 DOI 快速路徑")
+    print("=" * 80)
+
+    # 1. 單筆查詢：reference 格式但帶 DOI 時直接走 DOI 模式
+    mode, doi = citation.classify_input(
+        "Smith, J. (2000). A title. Journal, 1, 1-2. (https://doi.org/10.5555/fast.1).")
+    assert (mode, doi) == ("doi", "10.5555/fast.1")
+    print("\n✅ reference 中的 DOI 直接以 DOI 模式查詢")
+
+    # 2. 文件分析：同一 DOI 重複列出視為同一篇，引用狀態一致
+    analyzer = DocumentAnalyzer()
+    references = analyzer._parse_reference_section(REFERENCES)
+    assert [ref["doi"] for ref in references] == ["10.5555/fast.1", "10.5555/fast.2", "10.5555/FAST.2", ""]
+    reference_dict = analyzer._generate_citation_formats(references)
+    citations = analyzer._find_citations_in_text("Prior work (Smith & Lee, 2000; Brown, 2019).")
+    status = analyzer._mark_cited_references(citations, reference_dict)
+    assert [s["cited"] for s in status] == [True, True, True, False], status
+    print("✅ 同一 DOI 的重複條目一起標記為已引用")
+
+    with isolated_crossref():
+        with crossref_stub(delay=0.05) as stub:
+            # 3. 驗證：有 DOI 的條目不做標題搜尋，並回報比例
+            report = verify_reference_list(references, budget=5)
+            searches = [p for p in stub.paths if p.startswith("/works?")]
+            print(f"【驗證】upstream {stub.paths}")
+            assert [item["resolved_by"] for item in report["items"]] == ["doi", "doi", "doi", "title"]
+            assert len(searches) == 1 and "gardening" in searches[0]
+            assert report["doi_fast_path"] == {"count": 3, "fraction": 0.75}
+            print(f"✅ 只有沒有 DOI 的條目做標題搜尋：{report['doi_fast_path']}")
+
+            # 4. 背景預先查詢同樣優先使用 DOI
+            prefetcher = MetadataPrefetcher()
+            prefetcher.enqueue_references(references)
+            assert prefetcher.join(timeout=5)
+            stats = prefetcher.stats()
+            assert (stats["by_doi"], stats["by_title"]) == (2, 1), stats
+            assert stats["doi_fast_path"] == 0.667
+
+            # 5. 查詢 API 回傳快取中的 DOI 結果
+            app = Flask(__name__)
+            app.register_blueprint(citation.bp)
+            stub.reset_stats()
+            resp = app.test_client().post('/api/generate_citation',
+                                          json={"input": references[0]["text"]})
+            assert resp.status_code == 200 and resp.get_json()["mode"] == "doi"
+            assert stub.request_count == 0
+            print("✅ 預先查詢與 generate_citation 都以 DOI 命中快取")
+
+    print("\n✅ 所有 DOI 快速路徑測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_doi_fast_path()
+    exit(0 if success else 1)
@@ -0,0 +1,98 @@
+"""
+測試離線 CrossRef 索引：匯入 dump 後，DOI / 標題 / 關鍵字 / 自動補全都先查本機，查不到才連線
+"""
+import sys
+import os
+import gzip
+import json
+import shutil
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import crossref_service
+from services.local_index import import_dump, local_index
+from tests.crossref_env import crossref_stub, isolated_crossref
+
+
+def work(doi, title, family, year, journal="Journal of Sport Science"):
+    return {
+        "DOI": doi,
+        "title": [title],
+        "author": [{"family": family, "given": "A."}, {"family": "Kojima", "given": "H."}],
+        "issued": {"date-parts": [[year]]},
+        "container-title": [journal],
+        "publisher": "Test Publisher",
+        "type": "journal-article",
+    }
+
+
+def test_local_index():
+    print("=" * 80)
+    print("測試離線 CrossRef 索引")
+    print("=" * 80)
+
+    tmp_dir = tempfile.mkdtemp()
+    original_path = local_index.db_path
+    try:
+        # 1. 三種 dump 格式：JSONL、gzip 的 data file、API 回應
+        dump_dir = os.path.join(tmp_dir, "dump")
+        os.makedirs(dump_dir)
+        with open(os.path.join(dump_dir, "a.jsonl"), "w", encoding="utf-8") as f:
+            f.write(json.dumps(work("10.1000/Aly.2019", "Acute exercise and executive function", "Aly", 2019)) + "\n")
+            f.write(json.dumps(work("10.1000/fig-1", "Figure 1: Study design", "Aly", 2019)) + "\n")
+        with gzip.open(os.path.join(dump_dir, "b.json.gz"), "wt", encoding="utf-8") as f:
+            json.dump({"items": [work("10.1000/hillman.2008", "Be smart, exercise your heart", "Hillman", 2008)]}, f)
+        with open(os.path.join(dump_dir, "c.json"), "w", encoding="utf-8") as f:
+            json.dump({"status": "ok", "message": work("10.1000/menezes.2016", "Café culture and memory", "De Menezes", 2016)}, f)
+
+        index_path = os.path.join(tmp_dir, "local.sqlite3")
+        count = import_dump([dump_dir], index_path)
+        print(f"\n【匯入】{count} 筆")
+        assert count == 4
+        local_index.db_path = index_path
+
+        assert local_index.get_work("10.1000/ALY.2019")["DOI"] == "10.1000/Aly.2019"
+        assert local_index.search("cafe", limit=5)[0]["DOI"] == "10.1000/menezes.2016"
+        assert [w["DOI"] for w in local_index.doi_prefix("10.1000/h")] == ["10.1000/hillman.2008"]
+        print("✅ DOI（不分大小寫）、去除重音的全文搜尋、DOI 前綴查詢")
+
+        with isolated_crossref(), crossref_stub() as stub:
+            # 2. 命中離線索引時完全不連線
+            meta = crossref_service.fetch_metadata_from_doi("https://doi.org/10.1000/aly.2019")
+            assert meta["title"] == "Acute exercise and executive function" and meta["year"] == "2019"
+            meta = crossref_service.fetch_metadata_from_title("Be smart, exercise your heart")
+            assert meta["doi"] == "10.1000/hillman.2008"
+            metas = crossref_service.fetch_metadata_from_keywords("executive function exercise")
+            assert [m["doi"] for m in metas] == ["10.1000/Aly.2019"]
+            suggestions = crossref_service.suggest_doi_candidates("acute exer")
+            assert [s["doi"] for s in suggestions] == ["10.1000/Aly.2019"]
+            assert suggestions[0]["verified"] is True
+            print(f"【命中】upstream 請求 {stub.request_count} 次")
+            assert stub.request_count == 0
+
+            # 3. 查不到才連線 CrossRef
+            crossref_service.fetch_metadata_from_doi("10.5555/not-in-dump")
+            assert stub.request_count == 1
+            crossref_service.fetch_metadata_from_title("A title that is not in the dump")
+            assert stub.request_count >= 2
+            # 只是較長標題的一部分不算命中離線索引
+            before = stub.request_count
+            meta = crossref_service.fetch_metadata_from_title("Acute exercise")
+            assert stub.request_count > before and meta["doi"] != "10.1000/Aly.2019"
+            print(f"【未命中】upstream 請求 {stub.request_count} 次")
+
+        # 4. 索引檔不存在時自動停用
+        local_index.db_path = os.path.join(tmp_dir, "missing.sqlite3")
+        assert not local_index.available() and local_index.search("exercise") == []
+        print("✅ 索引檔不存在時停用")
+    finally:
+        local_index.db_path = original_path
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print("\n✅ 所有離線索引測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_local_index()
+    exit(0 if success else 1)
@@ -0,0 +1,131 @@
+"""
+測試 DOI metadata 兩層快取：canonical key、LRU、TTL、negative caching、SQLite 持久化
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.metadata_cache import MetadataCache, canonical_doi, doi_cache_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_metadata_cache():
+    print("=" * 80)
+    print("測試 DOI metadata 快取")
+    print("=" * 80)
+
+    # 1. canonical key：大小寫與前綴不應拆成不同項目
+    variants = [
+        "10.1016/J.MHPA.2020.100363",
+        "https://doi.org/10.1016/j.mhpa.2020.100363",
+        "http://dx.doi.org/10.1016/j.mhpa.2020.100363",
+        "doi:10.1016/j.mhpa.2020.100363",
+        " 10.1016/j.mhpa.2020.100363. ",
+    ]
+    keys = {doi_cache_key(v) for v in variants}
+    print(f"\n【canonical key】{keys}")
+    assert keys == {"doi:10.1016/j.mhpa.2020.100363"}, keys
+    assert canonical_doi("doi://10.1000/ABC") == "10.1000/abc"
+
+    fd, db_path = tempfile.mkstemp(suffix='.sqlite3')
+    os.close(fd)
+    os.unlink(db_path)
+    try:
+        clock = FakeClock()
+        cache = MetadataCache(db_path=db_path, max_entries=2, ttl=100, negative_ttl=10, clock=clock)
+        meta = {"title": "Acute exercise", "authors": ["Aly, M."], "year": "2020"}
+
+        # 2. 基本讀寫
+        cache.set(doi_cache_key(variants[0]), meta)
+        hit, value = cache.get(doi_cache_key(variants[1]))
+        print(f"\n【基本讀寫】hit={hit}, value={value}")
+        assert hit and value == meta
+
+        # 3. negative entry 與較短的 TTL
+        missing_key = doi_cache_key("10.9999/does-not-exist")
+        cache.set_negative(missing_key)
+        hit, value = cache.get(missing_key)
+        assert hit and value is None
+        clock.now += 11
+        hit, _ = cache.get(missing_key)
+        print(f"【negative TTL】過期後 hit={hit}")
+        assert not hit
+
+        # 4. 一般 TTL 過期
+        clock.now += 100
+        hit, _ = cache.get(doi_cache_key(variants[0]))
+        print(f"【TTL】過期後 hit={hit}")
+        assert not hit
+
+        # 5. LRU 淘汰後仍可從 SQLite 取回，並可跨實例共用
+        cache.set("doi:a", {"n": 1})
+        cache.set("doi:b", {"n": 2})
+        cache.set("doi:c", {"n": 3})
+        assert "doi:a" not in cache._lru
+        hit, value = cache.get("doi:a")
+        print(f"【LRU + SQLite】被淘汰的項目 hit={hit}, value={value}")
+        assert hit and value == {"n": 1}
+
+        other = MetadataCache(db_path=db_path, max_entries=2, ttl=100, clock=clock)
+        hit, value = other.get("doi:c")
+        print(f"【跨實例】hit={hit}, value={value}")
+        assert hit and value == {"n": 3}
+
+        # 6. 超過 stale 期限的資料定期從 SQLite 刪除
+        purging = MetadataCache(db_path=db_path, ttl=100, stale_ttl=50, purge_every=3, clock=clock)
+        purging.clear()
+        purging.set("doi:old", {"n": 1})
+        clock.now += 151
+        assert purging.get_stale("doi:old") is None
+        purging.set("doi:new1", {"n": 2})
+        purging.set("doi:new2", {"n": 3})  # 第 3 次寫入時清理
+        rows = purging._connection().execute("SELECT key FROM metadata_cache ORDER BY key").fetchall()
+        print(f"【清理】剩下 {[row[0] for row in rows]}")
+        assert [row[0] for row in rows] == ["doi:new1", "doi:new2"]
+
+        # 7. 改變 db_path 時改用新檔案的連線與資料表
+        fd, other_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        os.unlink(other_path)
+        try:
+            purging.db_path = other_path
+            purging._lru.clear()
+            assert purging.get("doi:new1") == (False, None)
+            purging.set("doi:moved", {"n": 4})
+            purging.db_path = db_path
+            purging._lru.clear()
+            assert purging.get("doi:moved") == (False, None)
+            assert purging.get("doi:new1") == (True, {"n": 2})
+            print("【切換 db_path】各自使用自己的 SQLite 檔")
+        finally:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(other_path + suffix):
+                    os.unlink(other_path + suffix)
+
+        # 8. 只用記憶體層
+        memory_only = MetadataCache(db_path="", max_entries=2)
+        memory_only.set("doi:x", {"n": 9})
+        assert memory_only.get("doi:x") == (True, {"n": 9})
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                try:
+                    os.unlink(db_path + suffix)
+                except OSError:
+                    pass
+
+    print("\n✅ 所有快取測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_metadata_cache()
+    exit(0 if success else 1)
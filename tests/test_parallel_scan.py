@@ -0,0 +1,76 @@
+"""
+測試分段並行引用掃描：切段後以多個 process 掃描，結果（位置、章節、去重）與單一 process 完全相同
+"""
+import sys
+import os
+import random
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.document_analyzer import DocumentAnalyzer
+
+REFERENCES = """References
+van der Berg, A., & Lee, K. (2012). Running and attention. Sports, 4, 1-9.
+Smith, J. (2020). Walking and memory. Journal of Aging, 3, 7-8.
+López, J. (2019a). Cycling. Sports, 5, 2-3.
+"""
+
+# 隨機組合的片段：跨段落的括號、缺左括號、多重引用、章節標題等邊界情況
+TOKENS = ["(", ")", "\n", "\n\n", "Smith", "Lee", "Van der Berg", "López", "et al.", ",", ";", " ;",
+          "&", "and", "2020", "2019a", " ", " ", "the", "Results", "Discussion\n", "\nMethods\n",
+          "Wang et al., 2015, 2016)", "(Kim, 2001; Park, 2002)", "Lee, 2019)"]
+
+
+def _parallel_analyzer(chunk_size, workers=2):
+    analyzer = DocumentAnalyzer()
+    analyzer.parallel_threshold = 0
+    analyzer.parallel_workers = workers
+    analyzer.parallel_chunk_size = chunk_size
+    return analyzer
+
+
+def test_parallel_scan():
+    print("=" * 80)
+    print("測試分段並行引用掃描")
+    print("=" * 80)
+
+    serial = DocumentAnalyzer()
+    serial.parallel_workers = 1
+    reference_dict = serial._generate_citation_formats(serial._parse_reference_section(REFERENCES))
+
+    # 1. 一般內文：多個章節、每段都有引用，切成很多小段
+    paragraphs = ["Introduction"]
+    for i in range(300):
+        if i % 100 == 99:
+            paragraphs.append(["Methods", "Results", "Discussion"][i // 100])
+        paragraphs.append(f"Prior work (Smith, 2020; Lee, {1990 + i % 30}) and Van der Berg and Lee (2012) "
+                          f"agree, as does López (2019a). Wang et al., 2015) also found (Kim et al.,{2000 + i}).")
+    text = "\n" + "\n".join(paragraphs)
+    expected = serial._find_citations_in_text(text, reference_dict)
+    for chunk_size in (100, 1000, 5000):
+        assert _parallel_analyzer(chunk_size)._find_citations_in_text(text, reference_dict) == expected
+    sections = {citation['section'] for citation in expected}
+    assert sections == {"Introduction", "Methods", "Results", "Discussion"}, sections
+    print(f"\n✅ {len(text)} 字元、{len(expected)} 筆引用，切段結果與單一 process 相同")
+
+    # 2. 隨機片段：括號跨越段落邊界時也不會重複或遺漏
+    for seed in range(30):
+        rng = random.Random(seed)
+        text = "".join(rng.choice(TOKENS) + rng.choice(["", " "]) for _ in range(rng.randint(50, 400)))
+        analyzer = _parallel_analyzer(rng.randint(1, 60))
+        for refs in (reference_dict, None):
+            assert analyzer._find_citations_in_text(text, refs) == serial._find_citations_in_text(text, refs), seed
+    print("✅ 30 份隨機內文，切段結果與單一 process 相同")
+
+    # 3. 只有超過門檻時才分段；單一 worker 時不分段
+    analyzer = _parallel_analyzer(100)
+    analyzer.parallel_threshold = 10 ** 9
+    assert analyzer._find_citations_in_text("Smith (2020).", reference_dict)[0]['text'] == "Smith (2020)"
+    print("✅ 門檻以下使用單一 process")
+
+    print("\n✅ 所有分段並行掃描測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_parallel_scan()
+    exit(0 if success else 1)
@@ -0,0 +1,126 @@
+"""
+測試參考文獻 metadata 背景預先查詢：不拖慢文件分析、只在速率限制有餘裕時送出、
+之後的 /api/generate_citation 直接命中快取
+"""
+import sys
+import os
+import shutil
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from docx import Document
+from flask import Flask
+
+from routes import citation
+from services.document_analyzer import DocumentAnalyzer
+from services.prefetcher import MetadataPrefetcher, reference_prefetcher
+from services.rate_limiter import AdaptiveRateLimiter
+from benchmarks.crossref_stub import stub_work
+from tests.crossref_env import crossref_stub, isolated_crossref
+
+REFERENCES = [
+    "Smith, J., & Lee, K. (2000). Stub work about exercise and cognition 10.5555/pre.1. Stub Journal, 1, 1-2. https://doi.org/10.5555/pre.1",
+    "Smith, J., & Lee, K. (2001). Stub work about exercise and cognition 10.5555/pre.2. Stub Journal, 1, 3-4. https://doi.org/10.5555/pre.2",
+    "Smith, J., & Lee, K. (2000). Walking improves memory in older adults. Journal of Aging, 3, 7-8.",
+]
+
+
+class GatedLimiter(AdaptiveRateLimiter):
+    """測試用：open 為 False 時模擬前景請求用光了 token"""
+
+    def __init__(self):
+        super().__init__(limit=50)
+        self.open = False
+
+    def has_headroom(self, reserve=0):
+        return self.open and super().has_headroom(reserve)
+
+
+def search(params):
+    if "Walking" in params.get("query.title", "") + params.get("query.bibliographic", ""):
+        work = stub_work("10.5555/walk")
+        work["title"] = ["Walking improves memory in older adults"]
+        return [work]
+    return None
+
+
+def test_prefetcher():
+    print("=" * 80)
+    print("測試參考文獻 metadata 背景預先查詢")
+    print("=" * 80)
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        with isolated_crossref(), crossref_stub(delay=0.2, search=search) as stub:
+            # 1. 速率限制沒有餘裕時不送出；佇列滿時丟棄，不阻塞
+            limiter = GatedLimiter()
+            prefetcher = MetadataPrefetcher(max_queue=2, limiter=limiter)
+            assert prefetcher.enqueue("doi", "10.5555/gate.1")
+            assert not prefetcher.enqueue("doi", "10.5555/GATE.1")
+            for i in range(2, 6):
+                prefetcher.enqueue("doi", f"10.5555/gate.{i}")
+            time.sleep(0.3)
+            stats = prefetcher.stats()
+            print(f"\n【沒有餘裕】upstream {stub.request_count} 次，{stats}")
+            assert stub.request_count == 0 and stats["dropped"] >= 2
+
+            limiter.open = True
+            assert prefetcher.join(timeout=5)
+            assert stub.request_count == prefetcher.stats()["fetched"] >= 2
+            print(f"✅ 有餘裕後才送出：{prefetcher.stats()}")
+
+            # 2. 分析文件時不等待預先查詢
+            path = os.path.join(tmp_dir, "paper.docx")
+            doc = Document()
+            doc.add_paragraph("Exercise helps memory (Smith & Lee, 2000; Smith & Lee, 2001).")
+            doc.add_paragraph("References")
+            for line in REFERENCES:
+                doc.add_paragraph(line)
+            doc.save(path)
+
+            stub.reset_stats()
+            start = time.perf_counter()
+            result = DocumentAnalyzer().analyze_document(path, prefetch=True)
+            elapsed = time.perf_counter() - start
+            print(f"【分析】耗時 {elapsed * 1000:.0f} ms（每個 CrossRef 請求 200 ms）")
+            assert result["total_references"] == 3
+            assert elapsed < 0.2
+            assert reference_prefetcher.join(timeout=5)
+            # 2 個 DOI 各 1 次；標題搜尋的兩個階段同時送出
+            assert stub.request_count >= 3, stub.paths
+
+            # 3. 之後的查詢直接命中快取
+            app = Flask(__name__)
+            app.register_blueprint(citation.bp)
+            client = app.test_client()
+            stub.reset_stats()
+            for text in ("10.5555/pre.1", "https://doi.org/10.5555/pre.2",
+                         '"Walking improves memory in older adults"'):
+                resp = client.post('/api/generate_citation', json={"input": text})
+                assert resp.status_code == 200, resp.get_json()
+            print(f"【查詢】3 筆 generate_citation，upstream {stub.request_count} 次")
+            assert stub.request_count == 0
+            assert client.get('/api/crossref/status').get_json()["prefetch"]["fetched"] >= 3
+
+            # 4. 一直沒有餘裕（例如斷路器長時間開啟）時，等待 max_wait 秒後丟棄，不會卡住佇列
+            stub.reset_stats()
+            stuck = MetadataPrefetcher(limiter=GatedLimiter(), max_wait=0.3)
+            for i in range(3):
+                stuck.enqueue("doi", f"10.5555/stuck.{i}")
+            start = time.perf_counter()
+            assert stuck.join(timeout=5)
+            elapsed = time.perf_counter() - start
+            stats = stuck.stats()
+            print(f"【一直沒有餘裕】{elapsed:.1f} 秒清空佇列，{stats}")
+            assert stats["dropped"] == 3 and stats["fetched"] == 0 and stub.request_count == 0
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print("\n✅ 所有背景預先查詢測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_prefetcher()
+    exit(0 if success else 1)
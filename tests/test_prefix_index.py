@@ -0,0 +1,137 @@
+"""
+測試 /api/suggest_doi 的本機前綴索引：DOI 與標題前綴查詢、重新啟動後保留、
+結果足夠時不連線 CrossRef
+"""
+import sys
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import crossref_service
+from services.prefix_index import PrefixIndex, normalize_title
+from tests.crossref_env import crossref_stub, isolated_crossref
+
+
+def record(i, title):
+    return {"doi": f"10.5555/Index.{i}", "title": title, "year": 2020, "authors": "Smith, Lee"}
+
+
+class SlowDiskIndex(PrefixIndex):
+    """寫檔很慢的索引：用來確認寫檔期間查詢不會被擋住"""
+
+    def _append_to_file(self, records):
+        time.sleep(0.5)
+        super()._append_to_file(records)
+
+
+def test_prefix_index():
+    print("=" * 80)
+    print("測試自動補全前綴索引")
+    print("=" * 80)
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        # 1. DOI 前綴（不分大小寫）與標題前綴（開頭或中間的詞）
+        path = os.path.join(tmp_dir, "suggest_index.jsonl")
+        index = PrefixIndex(path=path)
+        added = index.add_many([
+            record(1, "Acute exercise and executive function"),
+            record(2, "Aerobic fitness and hippocampal volume"),
+            record(3, "Be smart, exercise your heart: Exercise effects on brain"),
+            record(1, "Duplicate DOI is ignored"),
+        ])
+        assert added == 3
+        assert [r["doi"] for r in index.search("10.5555/index.")] == [
+            "10.5555/Index.1", "10.5555/Index.2", "10.5555/Index.3"]
+        assert [r["doi"] for r in index.search("10.5555/INDEX.2")] == ["10.5555/Index.2"]
+        assert [r["doi"] for r in index.search("acute exer")] == ["10.5555/Index.1"]
+        assert [r["doi"] for r in index.search("Executive-Function")] == ["10.5555/Index.1"]
+        assert sorted(r["doi"] for r in index.search("exercise")) == ["10.5555/Index.1", "10.5555/Index.3"]
+        print("\n✅ DOI 前綴、標題開頭與中間詞的前綴查詢")
+
+        # 2. 重新啟動（新的實例）後從檔案載入
+        reloaded = PrefixIndex(path=path)
+        assert len(reloaded) == 3
+        assert [r["doi"] for r in reloaded.search("aerobic")] == ["10.5555/Index.2"]
+        print("✅ 重新載入後保留 3 筆")
+
+        # 3. 10 萬筆時的查詢延遲
+        big = PrefixIndex(path='')
+        words = "exercise cognition memory aerobic training attention brain fitness sleep stress".split()
+        big.add_many({"doi": f"10.{1000 + i % 50}/big.{i}",
+                      "title": f"{words[i % 10]} {words[(i // 10) % 10]} study number {i}",
+                      "year": 2000, "authors": "A"} for i in range(100000))
+        queries = [f"{words[i % 10]} {words[(i * 7) % 10][:3]}" for i in range(500)]
+        queries += [f"10.{1000 + i % 50}/big.{i}" for i in range(500)]
+        samples = []
+        for q in queries:
+            start = time.perf_counter()
+            assert big.search(q, limit=5)
+            samples.append(time.perf_counter() - start)
+        median = statistics.median(samples) * 1000
+        print(f"【10 萬筆】查詢 median {median:.3f} ms，max {max(samples) * 1000:.3f} ms")
+        assert median < 1
+
+        # 4. 查詢與新增同時進行：結果都符合前綴；寫檔很慢時查詢不需等待
+        concurrent = PrefixIndex(path='')
+        errors = []
+
+        def writer(start):
+            for i in range(start, start + 2000, 50):
+                concurrent.add_many(record(j, f"{words[j % 10]} concurrent {j}") for j in range(i, i + 50))
+
+        def reader():
+            for i in range(2000):
+                query = f"{words[i % 10]} con"
+                for r in concurrent.search(query, limit=5):
+                    if not normalize_title(r["title"]).startswith(query):
+                        errors.append((query, r))
+
+        threads = [threading.Thread(target=writer, args=(k * 2000,)) for k in range(2)]
+        threads += [threading.Thread(target=reader) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors and len(concurrent) == 4000, errors[:3]
+
+        slow = SlowDiskIndex(path=os.path.join(tmp_dir, "slow.jsonl"))
+        slow.add(record(1, "Acute exercise and executive function"))
+        adding = threading.Thread(target=slow.add, args=(record(2, "Aerobic fitness"),))
+        adding.start()
+        time.sleep(0.1)
+        start = time.perf_counter()
+        assert [r["doi"] for r in slow.search("aerobic")] == ["10.5555/Index.2"]
+        blocked = time.perf_counter() - start
+        adding.join()
+        print(f"✅ 同時新增與查詢結果一致；寫檔期間查詢 {blocked * 1000:.1f} ms")
+        assert blocked < 0.1
+        assert len(PrefixIndex(path=slow.path)) == 2
+
+        # 5. 整合：CrossRef 解析過的 work 進入索引，之後的前綴查詢不連線
+        with isolated_crossref(), crossref_stub() as stub:
+            crossref_service.suggest_doi_candidates("exercise and cognition")
+            first = stub.request_count
+            stub.reset_stats()
+            results = crossref_service.suggest_doi_candidates("Stub work about exer")
+            print(f"【整合】第一次 upstream {first} 次，之後 {stub.request_count} 次，結果 {len(results)} 筆")
+            assert stub.request_count == 0 and len(results) >= 3
+            assert all(r["verified"] for r in results)
+
+            # 結果太少時仍查 CrossRef
+            crossref_service.suggest_doi_candidates("something never seen")
+            assert stub.request_count > 0
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print("\n✅ 所有前綴索引測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_prefix_index()
+    exit(0 if success else 1)
@@ -0,0 +1,104 @@
+"""
+測試 CrossRef 自適應限速器與 safe_request 的 backoff 行為
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.rate_limiter import AdaptiveRateLimiter, RateLimitExceeded, parse_interval
+from services.crossref_service import safe_request, backoff_delay
+from tests.crossref_env import crossref_stub
+
+
+def test_rate_limiter():
+    print("=" * 80)
+    print("測試 CrossRef 限速器")
+    print("=" * 80)
+
+    # 1. 解析 X-Rate-Limit-Interval
+    assert parse_interval("1s") == 1
+    assert parse_interval("60s") == 60
+    assert parse_interval("1m") == 60
+    assert parse_interval("500ms") == 0.5
+    assert parse_interval("abc") is None
+    print("\n✅ X-Rate-Limit-Interval 解析正確")
+
+    # 2. bucket 用完後需要等待約 1/rate 秒
+    limiter = AdaptiveRateLimiter(limit=5, interval=0.25, max_waiters=4, max_wait=1)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    burst = time.monotonic() - start
+    limiter.acquire()
+    waited = time.monotonic() - start - burst
+    print(f"【token bucket】burst 5 個耗時 {burst * 1000:.1f} ms，第 6 個等待 {waited * 1000:.1f} ms")
+    assert burst < 0.02
+    assert 0.03 < waited < 0.2
+
+    # 3. 等待者上限為 0 時直接失敗
+    strict = AdaptiveRateLimiter(limit=1, interval=10, max_waiters=0)
+    strict.acquire()
+    try:
+        strict.acquire()
+        assert False, "應該丟出 RateLimitExceeded"
+    except RateLimitExceeded:
+        print("✅ 排隊已滿時快速失敗")
+
+    # 4. 需要等太久時也直接失敗，而不是睡著
+    slow = AdaptiveRateLimiter(limit=1, interval=10, max_waiters=4, max_wait=0.1)
+    slow.acquire()
+    start = time.monotonic()
+    try:
+        slow.acquire()
+        assert False, "應該丟出 RateLimitExceeded"
+    except RateLimitExceeded:
+        assert time.monotonic() - start < 0.05
+        print("✅ 等待時間超過 max_wait 時快速失敗")
+
+    # 5. 依回應標頭調整速率
+    slow.update_from_headers({"X-Rate-Limit-Limit": "100", "X-Rate-Limit-Interval": "1s"})
+    assert slow.rate == 100
+    print(f"✅ 依標頭調整後速率 = {slow.rate} req/s")
+
+    # 6. 429 之後暫停發放 token
+    limiter.penalize(retry_after=0.1)
+    start = time.monotonic()
+    limiter.acquire()
+    paused = time.monotonic() - start
+    print(f"【429 暫停】等待 {paused * 1000:.1f} ms")
+    assert paused >= 0.09
+
+    # 7. backoff：有 Retry-After 時以它為準，否則在指數上限內隨機
+    assert backoff_delay(0, 2, retry_after=3) == 3
+    assert all(0 <= backoff_delay(3, 0.5) <= 4 for _ in range(50))
+    assert backoff_delay(10, 2, cap=8) <= 8
+    print("✅ backoff 延遲範圍正確")
+
+    # 8. safe_request：429 會重試，404 不重試
+    calls = {"n": 0}
+
+    def status(path):
+        if "retry-me" in path:
+            calls["n"] += 1
+            return 429 if calls["n"] == 1 else 200
+        return None
+
+    with crossref_stub(status=status, headers={"Retry-After": "0"}) as stub:
+        res = safe_request(f"{stub.url}/works/10.5555/retry-me", retries=2, delay=0.01)
+        assert res is not None and res.status_code == 200
+        assert stub.request_count == 2
+        print(f"✅ 429 後重試成功（共 {stub.request_count} 次請求）")
+
+        stub.reset_stats()
+        assert safe_request(f"{stub.url}/works/10.0000/missing", retries=3, delay=0.01) is None
+        assert stub.request_count == 1
+        print("✅ 404 不重試")
+
+    print("\n✅ 所有限速器測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_rate_limiter()
+    exit(0 if success else 1)
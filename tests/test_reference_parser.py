@@ -0,0 +1,98 @@
+"""
+測試共用的參考文獻條目解析：作者、年份、標題、期刊、卷期頁碼與 DOI 一次取出，
+/api/generate_citation 與 DocumentAnalyzer 得到相同結果
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.document_analyzer import DocumentAnalyzer
+from services.reference_parser import parse_reference, parse_reference_entry
+
+# 取自既有測試的參考文獻：(文字, 預期欄位)
+CORPUS = [
+    ("Lopez-Calderon, J., & Luck, S. J. (2014). ERPLAB: an open-source toolbox for the analysis "
+     "of event-related potentials. Frontiers in Human Neuroscience, 8, 213.",
+     {"authors": ["Lopez-Calderon, J.", "Luck, S. J."], "year": "2014",
+      "title": "ERPLAB: an open-source toolbox for the analysis of event-related potentials",
+      "journal": "Frontiers in Human Neuroscience", "volume": "8", "issue": "", "pages": "213"}),
+    ("Klimesch, W., Sauseng, P., & Hanslmayr, S. (2007). EEG alpha oscillations: The "
+     "inhibition-timing hypothesis. Brain Research Reviews, 53(1), 63-88.",
+     {"authors": ["Klimesch, W.", "Sauseng, P.", "Hanslmayr, S."], "year": "2007",
+      "title": "EEG alpha oscillations: The inhibition-timing hypothesis",
+      "journal": "Brain Research Reviews", "volume": "53", "issue": "1", "pages": "63-88"}),
+    ("Hillman, C. H. (2007). Be smart, exercise your heart: exercise effects on brain and "
+     "cognition. Nature Reviews Neuroscience, 9(1), 58-65.",
+     {"authors": ["Hillman, C. H."], "year": "2007",
+      "title": "Be smart, exercise your heart: exercise effects on brain and cognition",
+      "journal": "Nature Reviews Neuroscience", "volume": "9", "issue": "1", "pages": "58-65"}),
+    ("Aly, M., & Kojima, H. (2020). Acute moderate-intensity exercise generally enhances neural "
+     "resources related to perceptual and cognitive processes: A randomized controlled ERP study. "
+     "Mental Health and Physical Activity, 19, 100363.",
+     {"authors": ["Aly, M.", "Kojima, H."], "year": "2020",
+      "journal": "Mental Health and Physical Activity", "volume": "19", "pages": "100363"}),
+    ("Smith, J., & Lee, K. (2000). Stub work about exercise and cognition. Stub Journal, 1, 1-2. "
+     "https://doi.org/10.5555/ref.1",
+     {"journal": "Stub Journal", "volume": "1", "pages": "1-2", "doi": "10.5555/ref.1"}),
+    ("Smith, J. (2001). A work that does not exist. Stub Journal, 2, 5-6. doi:10.0000/missing",
+     {"doi": "10.0000/missing", "pages": "5-6"}),
+    ("Lee, K. (2020a, May 3). Does it work? Journal of Tests, 1.",
+     {"year": "2020", "year_suffix": "a", "title": "Does it work?", "journal": "Journal of Tests", "volume": "1"}),
+    ("Lee, K. (n.d.). Plain title. Retrieved from https://example.org/page",
+     {"year": "n.d.", "title": "Plain title", "url": "https://example.org/page", "journal": ""}),
+    ("Luck, S. J. (2014). An introduction to the event-related potential technique. MIT Press.",
+     {"authors": ["Luck, S. J."], "publisher": "MIT Press", "journal": "", "volume": ""}),
+    ("Cooke, M., 2015. Test article. Journal, 10, 1-10.",
+     {"authors": ["Cooke, M."], "year": "2015", "title": "Test article", "pages": "1-10"}),
+]
+
+MULTI_LINE = """References
+De Menezes, K. J., Peixoto, C., Nardi, A. E., Carta, M. G., Machado, S., & Veras, A. B.
+(2016). Dehydroepiandrosterone, Its Sulfate and Cognitive Functions. Clinical Practice and
+Epidemiology in Mental Health: CP and EMH, 12, 24–37.
+Delorme, A., & Makeig, S. (2004). EEGLAB: An open source toolbox for analysis of single-trial
+EEG dynamics. Neuroscience Methods, 134(1), 9-21.
+"""
+
+
+def test_reference_parser():
+    print("=" * 80)
+    print("測試共用的參考文獻條目解析")
+    print("=" * 80)
+
+    # 1. 各欄位擷取
+    for text, expected in CORPUS:
+        entry = parse_reference_entry(text)
+        for field, value in expected.items():
+            assert entry[field] == value, (text, field, entry[field])
+    print(f"\n✅ {len(CORPUS)} 筆參考文獻的欄位擷取正確")
+
+    assert parse_reference_entry("No year in this line.") is None
+    meta = parse_reference("Smith, J. (in press). Untitled manuscript.")
+    assert meta["year"] == "n.d." and meta["authors"] == ["Smith, J."]
+    print("✅ 沒有年份的條目")
+
+    # 2. 跨行的條目合併後解析
+    analyzer = DocumentAnalyzer()
+    items = analyzer._parse_reference_section(MULTI_LINE)
+    assert len(items) == 2
+    assert items[0]["authors"][0] == "De Menezes, K. J." and len(items[0]["authors"]) == 6
+    assert items[0]["journal"] == "Clinical Practice and Epidemiology in Mental Health: CP and EMH"
+    assert (items[0]["volume"], items[0]["pages"]) == ("12", "24–37")
+    assert (items[1]["volume"], items[1]["issue"], items[1]["pages"]) == ("134", "1", "9-21")
+    print("✅ 跨行的參考文獻")
+
+    # 3. 兩個呼叫端結果一致
+    section = "References\n" + "\n".join(text for text, _ in CORPUS)
+    for item in analyzer._parse_reference_section(section):
+        meta = parse_reference(item["text"])
+        assert {k: item[k] for k in meta} == meta, item["text"]
+    print("✅ parse_reference 與 _parse_reference_section 結果一致")
+
+    print("\n✅ 所有參考文獻解析測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_reference_parser()
+    exit(0 if success else 1)
@@ -0,0 +1,102 @@
+"""
+測試參考文獻清單的 CrossRef 驗證：依 DOI 或標題查詢、回報標題 / 年份 / 作者不一致、
+整份清單在時間上限內完成
+"""
+import sys
+import os
+import shutil
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from docx import Document
+
+from services.document_analyzer import DocumentAnalyzer
+from services.reference_verifier import extract_doi, extract_title, verify_reference_list
+from benchmarks.crossref_stub import stub_work
+from tests.crossref_env import crossref_stub, isolated_crossref
+
+REFERENCES = """References
+Smith, J., & Lee, K. (2000). Stub work about exercise and cognition 10.5555/ref.1. Stub Journal, 1, 1-2. https://doi.org/10.5555/ref.1
+Brown, A. (2019). Stub work about exercise and cognition 10.5555/ref.2. Stub Journal, 1, 3-4. https://doi.org/10.5555/ref.2
+Smith, J. (2001). A work that does not exist. Stub Journal, 2, 5-6. doi:10.0000/missing
+Smith, J., & Lee, K. (2000). Walking improves memory in older adults. Journal of Aging, 3, 7-8.
+Nobody, Z. (2005). Completely unrelated title about gardening. Garden Letters, 4, 9-10.
+Smith, J. (2000). Stub work about exercise and cognition 10.5555/slow. Stub Journal, 1, 1-2. https://doi.org/10.5555/slow
+"""
+
+
+def search(params):
+    query = params.get("query.bibliographic", "")
+    if "Walking" in query:
+        work = stub_work("10.5555/walk")
+        work["title"] = ["Walking Improves Memory in Older Adults"]
+        return [work]
+    return None
+
+
+def test_reference_verifier():
+    print("=" * 80)
+    print("測試參考文獻清單的 CrossRef 驗證")
+    print("=" * 80)
+
+    # 1. 從參考文獻文字取出 DOI 與標題
+    assert extract_doi("... https://doi.org/10.1037/abc.123.") == "10.1037/abc.123"
+    assert extract_doi("No DOI here (2020).") is None
+    assert extract_title("Lee, K. (2020, May). Does it work? A test. Journal, 1.") == "Does it work?"
+    assert extract_title("Lee, K. (n.d.). Plain title. Journal.") == "Plain title"
+    print("\n✅ DOI 與標題擷取")
+
+    analyzer = DocumentAnalyzer()
+    references = analyzer._parse_reference_section(REFERENCES)
+    assert len(references) == 6
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        def delay(path):
+            return 3.0 if "slow" in path else 0.1
+
+        with isolated_crossref(), crossref_stub(delay=delay, search=search) as stub:
+            # 2. 整份清單並行驗證，慢的條目在時間上限到時標記為 unverified
+            start = time.perf_counter()
+            report = verify_reference_list(references, budget=1.0)
+            elapsed = time.perf_counter() - start
+            statuses = [item["status"] for item in report["items"]]
+            print(f"【驗證】{statuses}，耗時 {elapsed * 1000:.0f} ms，upstream 請求 {stub.request_count} 次")
+            assert statuses == ["verified", "mismatch", "not_found", "verified", "not_found", "unverified"]
+            assert elapsed < 1.5 and report["timed_out"]
+            assert report["summary"] == {"verified": 2, "mismatch": 1, "not_found": 2,
+                                         "unverified": 1, "total": 6}
+
+            fields = {m["field"] for m in report["items"][1]["mismatches"]}
+            assert fields == {"year", "authors"}, fields
+            assert report["items"][3]["resolved_by"] == "title"
+            assert report["items"][3]["crossref"]["doi"] == "10.5555/walk"
+            print("✅ 年份與作者不一致、DOI 不存在、標題搜尋找不到皆正確回報")
+
+            # 3. 分析文件時預設不驗證，勾選後才連線
+            path = os.path.join(tmp_dir, "paper.docx")
+            doc = Document()
+            doc.add_paragraph("Exercise helps memory (Smith & Lee, 2000).")
+            for line in REFERENCES.strip().splitlines()[:3]:
+                doc.add_paragraph(line)
+            doc.save(path)
+
+            stub.reset_stats()
+            assert "reference_verification" not in analyzer.analyze_document(path)
+            assert stub.request_count == 0
+            result = analyzer.analyze_document(path, verify_references=True)
+            assert result["reference_verification"]["summary"]["total"] == 2
+            # DOI 已在快取中，不需再連線
+            assert stub.request_count == 0
+            print("✅ analyze_document 只在 verify_references=True 時驗證")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print("\n✅ 所有參考文獻驗證測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_reference_verifier()
+    exit(0 if success else 1)
@@ -0,0 +1,107 @@
+"""
+測試 single-flight 合併：N 個同時進行的相同 CrossRef 查詢只產生一次 upstream 請求
+"""
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.crossref_service import fetch_metadata_from_doi, fetch_metadata_from_title
+from services.deadline import Deadline
+from tests.crossref_env import crossref_stub, isolated_crossref
+
+N_CALLERS = 20
+
+
+def run_concurrently(fn, args_list):
+    """讓所有執行緒在同一時間呼叫 fn，回傳 (results, errors)"""
+    barrier = threading.Barrier(len(args_list))
+    results = [None] * len(args_list)
+    errors = [None] * len(args_list)
+
+    def worker(idx, args):
+        barrier.wait()
+        try:
+            results[idx] = fn(*args)
+        except Exception as e:
+            errors[idx] = e
+
+    threads = [threading.Thread(target=worker, args=(i, a)) for i, a in enumerate(args_list)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_singleflight():
+    print("=" * 80)
+    print("測試 CrossRef 查詢合併（single-flight）")
+    print("=" * 80)
+
+    with isolated_crossref():
+        # 延遲回應，確保所有呼叫者都在第一個請求完成前抵達
+        with crossref_stub(delay=0.3) as stub:
+            # 1. 相同 DOI（大小寫、前綴不同）只打一次
+            variants = ["10.5555/Shared.1", "https://doi.org/10.5555/shared.1", "doi:10.5555/SHARED.1"]
+            args_list = [(variants[i % len(variants)],) for i in range(N_CALLERS)]
+            results, errors = run_concurrently(fetch_metadata_from_doi, args_list)
+            print(f"\n【DOI】{N_CALLERS} 個呼叫者 → upstream 請求 {stub.request_count} 次")
+            assert not any(errors), errors
+            assert stub.request_count == 1, stub.paths
+            assert all(r['title'] == results[0]['title'] for r in results)
+            # 每個呼叫者拿到自己輸入的 DOI 字串與獨立的 dict
+            assert all(r['doi'] == a[0].replace('https://doi.org/', '').replace('doi:', '')
+                       for r, a in zip(results, args_list))
+            assert len({id(r) for r in results}) == N_CALLERS
+
+            # 2. 錯誤也會共用：不存在的 DOI 所有人都收到 ValueError
+            stub.reset_stats()
+            results, errors = run_concurrently(fetch_metadata_from_doi, [("10.0000/missing",)] * N_CALLERS)
+            print(f"【不存在的 DOI】upstream 請求 {stub.request_count} 次")
+            assert stub.request_count == 1, stub.paths
+            assert all(isinstance(e, ValueError) for e in errors)
+
+            # 3. 相同標題（大小寫、空白不同）只搜尋一次
+            #    （一次標題查詢 = filtered 與 hedged unfiltered 各一個請求）
+            stub.reset_stats()
+            titles = ["Stub work about exercise", "  stub WORK about   exercise "]
+            results, errors = run_concurrently(fetch_metadata_from_title,
+                                               [(titles[i % 2],) for i in range(N_CALLERS)])
+            print(f"【標題】upstream 請求 {stub.request_count} 次")
+            assert not any(errors), errors
+            assert stub.request_count == 2, stub.paths
+            assert sum('filter=' in p for p in stub.paths) == 1, stub.paths
+
+        # 4. leader 的期限很短、等待者的期限很長：leader 逾時，等待者自己重新查詢並成功
+        with crossref_stub(delay=0.6) as stub:
+            outcome = {}
+
+            def call(name, budget):
+                try:
+                    outcome[name] = fetch_metadata_from_doi("10.5555/shared.deadline", deadline=Deadline(budget))
+                except Exception as e:
+                    outcome[name] = e
+
+            leader = threading.Thread(target=call, args=("leader", 0.3))
+            follower = threading.Thread(target=call, args=("follower", 8))
+            leader.start()
+            time.sleep(0.05)
+            follower.start()
+            leader.join()
+            follower.join()
+            assert isinstance(outcome["leader"], ConnectionError)
+            assert isinstance(outcome["follower"], dict), outcome["follower"]
+            print(f"【期限不同】leader：{outcome['leader']!r}；follower：{outcome['follower'].get('title')}，"
+                  f"upstream 請求 {stub.request_count} 次")
+            assert outcome["follower"]["doi"] == "10.5555/shared.deadline"
+            assert stub.request_count == 2, stub.paths
+
+    print("\n✅ 同時進行的相同查詢只產生一次 upstream 請求")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_singleflight()
+    exit(0 if success else 1)
@@ -0,0 +1,114 @@
+"""
+測試串流分析模式：逐段讀入內文的結果與整份分析完全相同，問題可一找到就交給 callback
+"""
+import sys
+import os
+import tempfile
+import tracemalloc
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from docx import Document
+from services.document_analyzer import DocumentAnalyzer
+
+REFERENCES = [
+    "van der Berg, A., & Lee, K. (2012). Running and attention. Sports, 4, 1-9.",
+    "Smith, J. (2020). Walking and memory. Journal of Aging, 3, 7-8.",
+    "López, J. (2019a). Cycling. Sports, 5, 2-3.",
+    "Unused, U. (2001). Never cited. Journal D, 1, 1-2.",
+]
+
+
+def _write_docx(paragraphs, table_text=None):
+    doc = Document()
+    for paragraph in paragraphs:
+        doc.add_paragraph(paragraph)
+    if table_text:
+        doc.add_table(rows=1, cols=1).cell(0, 0).text = table_text
+    fd, path = tempfile.mkstemp(suffix='.docx')
+    os.close(fd)
+    doc.save(path)
+    return path
+
+
+def test_streaming_analysis():
+    print("=" * 80)
+    print("測試串流分析模式")
+    print("=" * 80)
+
+    paragraphs = ["Walking and memory", "Introduction"]
+    for i in range(300):
+        if i % 100 == 99:
+            paragraphs.append(["Methods", "Results", "Discussion"][i // 100])
+        paragraphs.append(f"Prior work (Smith, 2020; Lee, {1990 + i % 30}) and Van der Berg and Lee (2012) "
+                          f"agree, as does López (2019a). Wang et al., 2015) also found (Smith,2020).")
+    path = _write_docx(paragraphs + ["", "References", ""] + REFERENCES, table_text="References")
+    no_heading = _write_docx(paragraphs[:50] + REFERENCES)
+    # 目錄中較早出現的參考文獻標題：第一次讀取不應把之後的整份內文暫存起來
+    toc = ["Walking and memory", "Contents", "Introduction", "References", "", "Introduction"]
+    toc += [f"Paragraph {i} cites (Smith, 2020) and Van der Berg and Lee (2012) at length. " * 3
+            for i in range(3000)]
+    toc_path = _write_docx(toc + ["References"] + REFERENCES)
+    try:
+        analyzer = DocumentAnalyzer()
+
+        # 1. 逐段讀取的文字與 python-docx 相同（不含表格內的段落）
+        assert list(analyzer._iter_docx_paragraphs(path)) == analyzer._extract_paragraphs_from_docx(path)
+
+        # 2. 不同分段大小的結果都與整份分析相同（含沒有參考文獻標題、以 80% 切分的文件）
+        for file_path in (path, no_heading):
+            expected = analyzer.analyze_document(file_path, streaming=False)
+            for chunk_size in (200, 1000, 65536):
+                analyzer.streaming_chunk_size = chunk_size
+                assert analyzer.analyze_document_streaming(file_path) == expected, (file_path, chunk_size)
+        expected = analyzer.analyze_document(path, streaming=False)
+        print(f"\n✅ {expected['total_citations']} 筆引用、"
+              f"{expected['summary']['total_errors']} 個格式問題，結果與整份分析相同")
+        sections = {error['section'] for error in expected['format_errors']}
+        assert {"Introduction", "Methods", "Results", "Discussion"} <= sections, sections
+        assert [item['cited'] for item in expected['citation_status']] == [True, True, True, False]
+
+        # 3. on_finding：問題依出現順序交給 callback，結果只保留數量
+        analyzer.streaming_chunk_size = 500
+        findings = []
+        result = analyzer.analyze_document_streaming(
+            path, on_finding=lambda kind, finding: findings.append((kind, finding)))
+        assert [f for kind, f in findings if kind == 'format_error'] == expected['format_errors']
+        assert [f for kind, f in findings if kind == 'missing_reference'] == expected['missing_references']
+        assert result['format_errors'] == [] and result['missing_references'] == []
+        assert result['summary'] == expected['summary']
+        print(f"✅ on_finding 收到 {len(findings)} 個問題，摘要與整份分析相同")
+
+        # 4. 檔案超過 streaming_file_size 時 analyze_document 自動改用串流模式
+        analyzer.streaming_file_size = 0
+        assert analyzer.analyze_document(path) == expected
+        print("✅ 大檔案自動使用串流模式")
+
+        # 5. 目錄中的參考文獻標題：只暫存 streaming_reference_buffer 字元，超過時再讀一次
+        analyzer.streaming_file_size = 1 << 40
+        expected = analyzer.analyze_document(toc_path, streaming=False)
+        for buffer_size in (10 ** 7, 10000):
+            analyzer.streaming_reference_buffer = buffer_size
+            tracemalloc.start()
+            try:
+                _, references_text = analyzer._stream_sections(toc_path)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            print(f"【目錄標題】暫存上限 {buffer_size} 字元：峰值 {peak / 1024:.0f} KB")
+            assert references_text == '\n'.join(REFERENCES)
+            assert analyzer.analyze_document_streaming(toc_path) == expected
+        main_chars = sum(len(paragraph) for paragraph in toc)
+        assert peak < main_chars / 3, (peak, main_chars)
+        print(f"✅ 內文 {main_chars / 1024:.0f} KB 不會因目錄標題而暫存在記憶體中")
+    finally:
+        os.remove(path)
+        os.remove(no_heading)
+        os.remove(toc_path)
+
+    print("\n✅ 所有串流分析測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_streaming_analysis()
+    exit(0 if success else 1)
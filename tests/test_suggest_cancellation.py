@@ -0,0 +1,97 @@
+"""
+測試自動補全請求的序號取消：同一個用戶端送出較新的請求後，
+進行中的舊請求不再送出 CrossRef 驗證請求
+"""
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+
+from routes import citation
+from services.deadline import Deadline, RequestCancelled
+from services.metadata_cache import metadata_cache
+from services.request_sequence import RequestSequencer, suggest_sequencer
+from tests.crossref_env import crossref_stub, isolated_crossref
+
+
+def test_suggest_cancellation():
+    print("=" * 80)
+    print("測試自動補全請求的序號取消")
+    print("=" * 80)
+
+    # 1. 序號表：較新的 seq 取代舊的，不同用戶端互不影響，晚到的舊 seq 立即視為已取代
+    sequencer = RequestSequencer(max_clients=2)
+    first = sequencer.begin("a", 1)
+    assert not first()
+    second = sequencer.begin("a", 2)
+    other = sequencer.begin("b", 1)
+    assert first() and not second() and not other()
+    assert sequencer.begin("a", 1)()
+    sequencer.begin("c", 1)  # 淘汰最久沒有請求的用戶端 "b"
+    assert sequencer.stats()["clients"] == 2 and not other()
+    print("\n✅ 序號表依用戶端記錄最新請求")
+
+    # 2. 被取消的 Deadline：剩餘時間為 0，cap() 丟出 RequestCancelled
+    flag = {"cancelled": False}
+    deadline = Deadline(10, cancelled=lambda: flag["cancelled"])
+    assert deadline.cap(1) == 1
+    flag["cancelled"] = True
+    assert deadline.remaining() == 0 and deadline.expired()
+    try:
+        deadline.cap(1)
+        assert False, "應該丟出 RequestCancelled"
+    except RequestCancelled:
+        print("✅ 取消後 cap() 丟出 RequestCancelled")
+
+    # 3. 整合：第一個請求還在搜尋時送出第二個，第一個不做驗證並回傳 409
+    app = Flask(__name__)
+    app.register_blueprint(citation.bp)
+
+    suggest_sequencer.reset()
+    try:
+        def delay(path):
+            return 0.05 if path.startswith('/works/') else 0.4
+
+        with isolated_crossref(), crossref_stub(delay=delay) as stub:
+            responses = {}
+
+            def send(seq, prefix):
+                resp = app.test_client().get(
+                    f"/api/suggest_doi?prefix={prefix}&client=tab-1&seq={seq}")
+                responses[seq] = (resp.status_code, resp.get_json())
+
+            old = threading.Thread(target=send, args=(1, "exercise"))
+            old.start()
+            time.sleep(0.15)
+            send(2, "exercise%20and")
+            old.join()
+
+            verify_paths = [p for p in stub.paths if p.startswith('/works/')]
+            print(f"【取消】seq=1 → {responses[1][0]}，seq=2 → {responses[2][0]}，"
+                  f"驗證請求 {len(verify_paths)} 次")
+            assert responses[1][0] == 409 and responses[1][1]["status"] == "superseded"
+            assert responses[2][0] == 200 and len(responses[2][1]) == 5
+            # 只有 seq=2 的 5 個候選送出驗證
+            assert len(verify_paths) == 5
+            assert suggest_sequencer.stats()["superseded"] == 1
+
+            # 沒有帶序號的請求照常處理
+            metadata_cache.clear()
+            resp = app.test_client().get("/api/suggest_doi?prefix=exercise")
+            assert resp.status_code == 200 and resp.get_json()
+
+            status = app.test_client().get("/api/crossref/status").get_json()
+            assert status["suggest_requests"]["superseded"] == 1
+    finally:
+        suggest_sequencer.reset()
+
+    print("\n✅ 所有序號取消測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_suggest_cancellation()
+    exit(0 if success else 1)
@@ -0,0 +1,91 @@
+"""
+測試參考文獻姓氏自動機：一次掃描找出多詞姓氏（Van der Berg）與非 ASCII 姓氏的敘述型引用
+"""
+import sys
+import os
+import random
+import re
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.document_analyzer import DocumentAnalyzer
+from services.surname_automaton import SurnameAutomaton, fold_text
+
+REFERENCES = """References
+van der Berg, A., & Lee, K. (2012). Running and attention. Sports, 4, 1-9.
+De Menezes, K. J., Peixoto, C., & Nardi, A. E. (2016). Dehydroepiandrosterone. Clinical Practice, 12, 24-37.
+Ødegård, T. (2019). Skiing and memory. Sports, 5, 2-3.
+Lee, K. (2020a). Solo study. Journal C, 1, 1-2.
+"""
+# 大寫介系詞開頭、且不在第一行的條目
+CAPITALIZED_REFERENCES = """References
+Lee, K. (2020). Another study. Journal C, 1, 1-2.
+Van der Berg, A. (2018). Walking and attention. Sports, 4, 1-9.
+De la Cruz, M. (2017). Cycling and memory. Sports, 5, 2-3.
+"""
+
+
+def test_surname_automaton():
+    print("=" * 80)
+    print("測試姓氏自動機")
+    print("=" * 80)
+
+    # 1. 折疊後長度不變，位置可直接對回原文
+    for text in ["López O’Brien", "Van der Berg", "Straße Ødegård", "MÜLLER et al."]:
+        assert len(fold_text(text)) == len(text)
+    assert fold_text("Ødegård O’Brien") == "odegard o'brien"
+
+    # 2. 結果與逐一以 regex 搜尋每個姓氏相同（含重疊的較短姓氏）
+    rng = random.Random(5)
+    surnames = sorted({"".join(rng.choice("abeklnorsu") for _ in range(rng.randint(2, 6))).capitalize()
+                       for _ in range(300)} | {"Van der Berg", "Berg", "Der"})
+    automaton = SurnameAutomaton()
+    for surname in surnames:
+        automaton.add(surname, surname)
+    words = [rng.choice(surnames + ["and", "the", "(2020)"]) for _ in range(3000)]
+    text = " ".join(word.upper() if rng.random() < 0.2 else word for word in words)
+    got = sorted((start, end, values[0]) for start, end, values in automaton.find_all(text))
+    expected = sorted((m.start(), m.end(), surname) for surname in surnames
+                      for m in re.finditer(rf"(?<!\w){re.escape(surname)}(?!\w)", text, re.IGNORECASE))
+    assert got == expected
+    print(f"\n✅ {len(surnames)} 個姓氏、{len(got)} 個比對與逐一搜尋結果一致")
+
+    # 3. 敘述型引用：多詞姓氏、非 ASCII 姓氏都完整找出並對應到參考文獻
+    analyzer = DocumentAnalyzer()
+    reference_dict = analyzer._generate_citation_formats(analyzer._parse_reference_section(REFERENCES))
+    text = ("Van der Berg and Lee (2012) found this. De Menezes et al. (2016) agree, "
+            "as do Odegard (2019) and Lee (2020a). Lee (2012) did not.")
+    citations = analyzer._find_citations_in_text(text, reference_dict)
+    found = [citation['text'] for citation in citations]
+    print(f"  {found}")
+    assert found == ["Van der Berg and Lee (2012)", "De Menezes et al. (2016)",
+                     "Odegard (2019)", "Lee (2020a)", "Lee (2012)"]
+    assert all(citation['type'] == 'narrative' for citation in citations)
+    # 沒有 reference_dict 時只能找到姓氏的最後一個詞
+    assert [c['text'] for c in analyzer._find_citations_in_text(text)][:2] == \
+        ["Berg and Lee (2012)", "Menezes et al. (2016)"]
+
+    missing = analyzer._check_missing_references(citations, reference_dict)
+    assert [m['citation'] for m in missing] == ["Lee (2012)"]
+    assert missing[0]['suggestion'] == "可能應該是: (van der Berg & Lee, 2012)"
+    assert analyzer._check_citation_formats(citations, reference_dict) == []
+    status = analyzer._mark_cited_references(citations, reference_dict)
+    assert all(item['cited'] for item in status)
+    print("✅ Van der Berg and Lee (2012)、De Menezes et al. (2016)、Odegard (2019)")
+
+    # 4. 大寫介系詞開頭的條目（Van der Berg、De la Cruz）不會被併入上一筆
+    references = analyzer._parse_reference_section(CAPITALIZED_REFERENCES)
+    assert [ref['authors'][0] for ref in references] == ["Lee, K.", "Van der Berg, A.", "De la Cruz, M."]
+    reference_dict = analyzer._generate_citation_formats(references)
+    text = "Van der Berg (2018) and De la Cruz (2017) agree with Lee (2020)."
+    citations = analyzer._find_citations_in_text(text, reference_dict)
+    assert [c['text'] for c in citations] == ["Van der Berg (2018)", "De la Cruz (2017)", "Lee (2020)"]
+    assert analyzer._check_missing_references(citations, reference_dict) == []
+    print("✅ 大寫介系詞開頭的參考文獻：Van der Berg (2018)、De la Cruz (2017)")
+
+    print("\n✅ 所有姓氏自動機測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_surname_automaton()
+    exit(0 if success else 1)
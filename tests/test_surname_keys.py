@@ -0,0 +1,97 @@
+"""
+測試姓氏標準比對鍵：重音符號、大小寫、德文拼法與介系詞不影響引用和參考文獻的比對，
+但 Xue / Xu 等非德文姓氏不會被當成德文拼法
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.document_analyzer import DocumentAnalyzer
+from services.surname_index import surname_key, surname_keys
+
+REFERENCES = """References
+López, J., & Luck, S. J. (2014). ERPLAB: an open-source toolbox. Frontiers in Human Neuroscience, 8, 213.
+Müller, K., Schmidt, R., & Weber, T. (2019). Exercise and memory. Journal of Aging, 3, 7-8.
+De Menezes, K. J., Peixoto, C., & Nardi, A. E. (2016). Dehydroepiandrosterone. Clinical Practice, 12, 24-37.
+van der Berg, A. (2012). Running and attention. Sports, 4, 1-9.
+O’Brien, P. (2018). Cycling. Sports, 5, 2-3.
+"""
+
+DIGRAPH_REFERENCES = """References
+Xu, L. (2020). Sleep and memory. Journal of Aging, 3, 7-8.
+Yu, K., & Wang, H. (2019). Running. Sports, 4, 1-9.
+Schroeder, M. (2017). Rowing. Sports, 2, 3-4.
+"""
+
+
+def test_surname_keys():
+    print("=" * 80)
+    print("測試姓氏標準比對鍵")
+    print("=" * 80)
+
+    # 1. 同一姓氏的各種寫法得到同一個（interned）鍵
+    groups = [
+        ["López", "Lopez", "LOPEZ", " lopez "],
+        ["Müller", "Muller", "MÜLLER"],
+        ["De Menezes", "de Menezes", "Menezes"],
+        ["van der Berg", "Van der Berg", "Berg"],
+        ["O'Brien", "O’Brien", "OBrien"],
+        ["Ødegård", "Odegard"],
+    ]
+    for names in groups:
+        keys = [surname_key(name) for name in names]
+        assert len(set(keys)) == 1, (names, keys)
+        assert all(key is keys[0] for key in keys)
+    assert surname_key("De") == "de"
+    assert surname_key("Lopez-Calderon") != surname_key("Lopez")
+    # 德文拼法只是有 ä/ö/ü 的姓氏的第二個鍵
+    assert surname_keys("Müller") == ("muller", "mueller")
+    assert surname_keys("Mueller") == ("mueller",)
+    for name, other in [("Xue", "Xu"), ("Yue", "Yu"), ("Hoe", "Ho"), ("Boer", "Bor")]:
+        assert surname_keys(name) == (name.lower(),) and surname_key(name) != surname_key(other)
+    print("\n✅ 重音、大小寫、德文拼法、介系詞與撇號")
+
+    # 2. 各比對階段都使用預先計算的鍵
+    analyzer = DocumentAnalyzer()
+    reference_dict = analyzer._generate_citation_formats(analyzer._parse_reference_section(REFERENCES))
+    assert [ref['first_author_key'] for ref in reference_dict.values()] == \
+        ["lopez", "muller", "menezes", "berg", "obrien"]
+
+    text = ("Prior work (Lopez & Luck, 2014; Mueller et al., 2019; De Menezes et al., 2016). "
+            "Van der Berg (2012) and O'Brien (2018) agree.")
+    citations = analyzer._find_citations_in_text(text)
+    missing = analyzer._check_missing_references(citations, reference_dict)
+    assert missing == [], missing
+    status = analyzer._mark_cited_references(citations, reference_dict)
+    assert all(item['cited'] for item in status), status
+    assert all('match_key' in citation for citation in citations)
+    print("✅ 不同寫法的引用都對應到參考文獻並標記為已引用")
+
+    # 作者數量檢查也使用同一個鍵：3 位作者卻只寫 2 位
+    citations = analyzer._find_citations_in_text("As shown (Mueller & Schmidt, 2019).")
+    errors = analyzer._check_citation_formats(citations, reference_dict)
+    assert len(errors) == 1 and '(Müller et al., 2019)' in errors[0]['error'], errors
+    print("✅ 作者數量檢查")
+
+    # 3. 德文拼法雙向比對：Schröder 引用對應 Schroeder 參考文獻
+    other_dict = analyzer._generate_citation_formats(analyzer._parse_reference_section(DIGRAPH_REFERENCES))
+    citations = analyzer._find_citations_in_text("Shown by Schröder (2017).")
+    assert analyzer._check_missing_references(citations, other_dict) == []
+
+    # 4. Xue / Yue 不是 Xu / Yu：應回報缺少參考文獻，Xu、Yu 也不算被引用
+    citations = analyzer._find_citations_in_text("Prior work (Xue, 2020; Yue & Wang, 2019).")
+    missing = analyzer._check_missing_references(citations, other_dict)
+    assert [m['citation'] for m in missing] == ["(Xue, 2020)", "(Yue & Wang, 2019)"], missing
+    status = analyzer._mark_cited_references(citations, other_dict)
+    assert [item['cited'] for item in status] == [False, False, False], status
+    citations = analyzer._find_citations_in_text("Prior work (Xu, 2020; Yu & Wang, 2019).")
+    assert analyzer._check_missing_references(citations, other_dict) == []
+    print("✅ Xue ≠ Xu、Yue ≠ Yu；Schröder = Schroeder")
+
+    print("\n✅ 所有姓氏比對鍵測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_surname_keys()
+    exit(0 if success else 1)
@@ -0,0 +1,123 @@
+"""
+測試 fetch_metadata_from_title 的 hedged 搜尋：
+filtered 與 unfiltered 同時送出，選擇結果與逐段搜尋完全相同，fallback 只花一個 round trip
+"""
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import crossref_service
+from services.deadline import Deadline, DeadlineExceeded
+from services.metadata_cache import metadata_cache
+from benchmarks.crossref_stub import stub_work
+from tests.crossref_env import crossref_stub, isolated_crossref
+
+
+def work(doi, title, journal="Journal of Tests"):
+    w = stub_work(doi)
+    w["title"] = [title]
+    w["container-title"] = [journal]
+    return w
+
+
+# 每個情境：filtered 搜尋結果、unfiltered 搜尋結果、預期選中的 DOI
+SCENARIOS = {
+    "filtered 命中": (
+        [work("10.1/filtered", "Exercise and memory")],
+        [work("10.1/unfiltered", "Exercise and memory")],
+        "10.1/filtered",
+    ),
+    "filtered 無結果": (
+        [],
+        [work("10.1/fig-1", "Exercise and memory", journal=""),
+         work("10.1/book", "Exercise and memory", journal="")],
+        "10.1/book",
+    ),
+    "filtered 只有 fragment": (
+        [work("10.1/x/fig-1", "Exercise and memory")],
+        [work("10.1/other", "Something else"), work("10.1/exact", "Exercise and memory")],
+        "10.1/exact",
+    ),
+    "兩者都只有 fragment": (
+        [work("10.1/x/table-1", "Exercise and memory")],
+        [work("10.1/y/fig-2", "Exercise and memory")],
+        "10.1/y/fig-2",
+    ),
+}
+
+
+def test_title_search():
+    print("=" * 80)
+    print("測試 hedged 標題搜尋")
+    print("=" * 80)
+
+    current = {}
+
+    def search(params):
+        return current["filtered"] if "filter" in params else current["unfiltered"]
+
+    original_hedge = crossref_service.HEDGE_TITLE_SEARCH
+    try:
+        with isolated_crossref(), crossref_stub(delay=0.2, search=search) as stub:
+            # 1. hedged 與逐段搜尋選出相同結果
+            for name, (filtered, unfiltered, expected) in SCENARIOS.items():
+                current.update(filtered=filtered, unfiltered=unfiltered)
+                picked = {}
+                for hedge in (False, True):
+                    crossref_service.HEDGE_TITLE_SEARCH = hedge
+                    metadata_cache.clear()
+                    picked[hedge] = crossref_service.fetch_metadata_from_title("Exercise and memory")["doi"]
+                print(f"【{name}】逐段={picked[False]}  hedged={picked[True]}")
+                assert picked[False] == picked[True] == expected
+
+            # 2. 兩者都沒有結果時仍丟出 ValueError
+            current.update(filtered=[], unfiltered=[])
+            try:
+                crossref_service.fetch_metadata_from_title("Nothing at all")
+                assert False, "應該丟出 ValueError"
+            except ValueError:
+                print("✅ 查無結果時丟出 ValueError")
+
+            # 3. fallback 情境只花一個 round trip
+            current.update(filtered=[], unfiltered=[work("10.1/late", "Exercise and memory")])
+            timings = {}
+            for hedge in (False, True):
+                crossref_service.HEDGE_TITLE_SEARCH = hedge
+                metadata_cache.clear()
+                start = time.monotonic()
+                crossref_service.fetch_metadata_from_title("Exercise and memory")
+                timings[hedge] = time.monotonic() - start
+            print(f"【fallback 延遲】逐段 {timings[False] * 1000:.0f} ms → hedged {timings[True] * 1000:.0f} ms")
+            assert timings[False] >= 0.4
+            assert timings[True] < 0.35
+
+            # 4. 共用 thread pool 滿載時，fallback 最多等到請求期限就丟出 DeadlineExceeded
+            crossref_service.HEDGE_TITLE_SEARCH = True
+            metadata_cache.clear()
+            release = threading.Event()
+            executor = crossref_service._search_executor()
+            blockers = [executor.submit(release.wait) for _ in range(crossref_service.SEARCH_MAX_WORKERS)]
+            try:
+                start = time.monotonic()
+                crossref_service.fetch_metadata_from_title("Exercise and memory", deadline=Deadline(0.5))
+                assert False, "應該丟出 DeadlineExceeded"
+            except DeadlineExceeded:
+                elapsed = time.monotonic() - start
+                print(f"【pool 滿載】{elapsed * 1000:.0f} ms 後放棄")
+                assert elapsed < 1.0
+            finally:
+                release.set()
+                for blocker in blockers:
+                    blocker.result()
+    finally:
+        crossref_service.HEDGE_TITLE_SEARCH = original_hedge
+
+    print("\n✅ 所有 hedged 標題搜尋測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_title_search()
+    exit(0 if success else 1)
@@ -0,0 +1,75 @@
+"""
+測試 suggest_doi 候選 DOI 的並行驗證：共用 thread pool 同時驗證，
+期限（VERIFY_DEADLINE 與 deadline 剩餘時間的較小者）到時仍未完成的標記 verified=False
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import crossref_service
+from services.crossref_service import _verify_candidates
+from services.deadline import Deadline
+from tests.crossref_env import crossref_stub, isolated_crossref
+
+
+def candidates(dois):
+    return [{"doi": doi, "title": f"Candidate {doi}", "year": 2020, "authors": "Smith"} for doi in dois]
+
+
+def delay(path):
+    # 單篇 DOI 查詢：含 slow 的 3 秒，其餘 0.3 秒
+    return 3.0 if "slow" in path else 0.3
+
+
+def test_verify_candidates():
+    print("=" * 80)
+    print("測試候選 DOI 並行驗證")
+    print("=" * 80)
+
+    original_deadline = crossref_service.VERIFY_DEADLINE
+    try:
+        with isolated_crossref(), crossref_stub(delay=delay) as stub:
+            # 1. 5 個候選同時驗證：總時間約一個請求，而不是逐一等待；不存在的 DOI 剔除
+            dois = [f"10.5555/verify.{i}" for i in range(4)] + ["10.0000/missing"]
+            start = time.perf_counter()
+            verified = _verify_candidates(candidates(dois))
+            elapsed = time.perf_counter() - start
+            print(f"\n【並行】{len(dois)} 個候選（每個 0.3 秒）耗時 {elapsed * 1000:.0f} ms，"
+                  f"upstream {stub.request_count} 次")
+            assert [r["doi"] for r in verified] == dois[:4]
+            assert all(r["verified"] for r in verified)
+            assert stub.request_count == 5
+            assert elapsed < 5 * 0.3 * 0.6
+
+            # 2. deadline 剩餘時間較短：期限到時還在驗證的候選以 verified=False 回傳，順序不變
+            dois = ["10.5555/fast.1", "10.5555/slow.1", "10.5555/fast.2", "10.5555/slow.2"]
+            start = time.perf_counter()
+            verified = _verify_candidates(candidates(dois), deadline=Deadline(0.8))
+            elapsed = time.perf_counter() - start
+            print(f"【deadline 0.8 秒】耗時 {elapsed * 1000:.0f} ms："
+                  f"{[(r['doi'], r['verified']) for r in verified]}")
+            assert [r["doi"] for r in verified] == dois
+            assert [r["verified"] for r in verified] == [True, False, True, False]
+            assert elapsed < 1.5
+            time.sleep(0.3)
+
+            # 3. VERIFY_DEADLINE 比 deadline 短時以 VERIFY_DEADLINE 為準
+            crossref_service.VERIFY_DEADLINE = 0.5
+            dois = ["10.5555/fast.3", "10.5555/slow.3"]
+            start = time.perf_counter()
+            verified = _verify_candidates(candidates(dois), deadline=Deadline(5))
+            elapsed = time.perf_counter() - start
+            print(f"【VERIFY_DEADLINE 0.5 秒】耗時 {elapsed * 1000:.0f} ms")
+            assert [(r["doi"], r["verified"]) for r in verified] == [(dois[0], True), (dois[1], False)]
+            assert elapsed < 1.0
+    finally:
+        crossref_service.VERIFY_DEADLINE = original_deadline
+
+    print("\n✅ 所有候選 DOI 並行驗證測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_verify_candidates()
+    exit(0 if success else 1)
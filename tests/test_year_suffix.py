@@ -0,0 +1,91 @@
+"""
+測試年份後綴 (2020a / 2020b)：後綴是參考文獻比對鍵的一部分，
+同一作者同一年的多篇自動依標題補上後綴，沒寫後綴的引用會得到提示
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.document_analyzer import DocumentAnalyzer
+
+REFERENCES = """References
+Smith, J. (2020). Walking and memory. Journal of Aging, 3, 7-8.
+Smith, J. (2020). Attention after cycling. Journal of Aging, 3, 9-10.
+Lee, K., & Wang, L. (2019b). Second study. Journal B, 15, 20-30.
+Lee, K., & Wang, L. (2019a). First study. Journal A, 10, 1-10.
+Lee, K. (2019). Solo study. Journal C, 1, 1-2.
+Brown, A. (2018). Only one. Journal D, 2, 3-4.
+"""
+
+
+def test_year_suffix():
+    print("=" * 80)
+    print("測試年份後綴")
+    print("=" * 80)
+
+    analyzer = DocumentAnalyzer()
+    references = analyzer._parse_reference_section(REFERENCES)
+
+    # 1. 同一作者清單、同一年份依標題補上 a、b；已寫後綴或只有一篇的不變
+    suffixes = [(ref['authors'][0], ref['year'], ref['year_suffix'], ref.get('year_suffix_inferred', False))
+                for ref in references]
+    assert suffixes == [
+        ("Smith, J.", "2020", "b", True),   # Walking... 排在 Attention... 之後
+        ("Smith, J.", "2020", "a", True),
+        ("Lee, K.", "2019", "b", False),
+        ("Lee, K.", "2019", "a", False),
+        ("Lee, K.", "2019", "", False),     # 作者清單不同，不需後綴
+        ("Brown, A.", "2018", "", False),
+    ], suffixes
+    reference_dict = analyzer._generate_citation_formats(references)
+    assert [ref['parenthetical'] for ref in reference_dict.values()] == [
+        "(Smith, 2020b)", "(Smith, 2020a)", "(Lee & Wang, 2019b)", "(Lee & Wang, 2019a)",
+        "(Lee, 2019)", "(Brown, 2018)"]
+    print("\n✅ 自動補上年份後綴")
+
+    # 2. 含後綴的引用直接對應到正確的參考文獻
+    text = ("Walking helps (Smith, 2020b), and so does cycling (Smith, 2020a). "
+            "Lee and Wang (2019a) agree (Lee & Wang, 2019b; Lee, 2019; Brown, 2018).")
+    citations = analyzer._find_citations_in_text(text)
+    assert analyzer._check_missing_references(citations, reference_dict) == []
+    assert analyzer._check_citation_formats(citations, reference_dict) == []
+    status = analyzer._mark_cited_references(citations, reference_dict)
+    assert all(item['cited'] for item in status)
+    print("✅ (Smith, 2020a) 與 (Smith, 2020b) 分別對應")
+
+    # 3. 沒寫後綴時無法判斷是哪一篇：另外列出可能的引用，不算缺少參考文獻
+    citations = analyzer._find_citations_in_text("Walking helps (Smith, 2020). Brown (2018b) too.")
+    missing = analyzer._check_missing_references(citations, reference_dict)
+    ambiguous = analyzer._check_ambiguous_citations(citations, reference_dict)
+    print(f"  {[(m['citation'], m['suggestion']) for m in missing]}")
+    print(f"  {[(a['citation'], a['error']) for a in ambiguous]}")
+    assert [m['citation'] for m in missing] == ["Brown (2018b)"]
+    assert [a['citation'] for a in ambiguous] == ["(Smith, 2020)"]
+    assert ambiguous[0]['did_you_mean'] == ["(Smith, 2020b)", "(Smith, 2020a)"]
+    assert "年份後綴" in ambiguous[0]['error']
+    # 兩篇都算被引用，報告中不會同時出現「缺少」與「已引用」
+    status = analyzer._mark_cited_references(citations, reference_dict)
+    assert [item['cited'] for item in status][:2] == [True, True]
+    result = analyzer._build_result([], missing, status, references, len(citations), ambiguous_citations=ambiguous)
+    assert result['summary']['total_missing'] == 1 and result['summary']['total_ambiguous'] == 1
+    print("✅ 沒寫後綴時提示加上後綴；後綴不存在時回報缺少")
+
+    # 4. 大量條目時仍只排序一次
+    names = [a + b for a in ("Lee", "Kim", "Chen", "Wang", "Park") for b in ("", "son", "berg", "man", "ford")]
+    many = "References\n" + "\n".join(
+        f"{names[i % 25]}, A. ({2000 + i % 7}). Title number {i}. Journal, 1, 1-2." for i in range(3000))
+    items = analyzer._parse_reference_section(many)
+    groups = {}
+    for item in items:
+        groups.setdefault((item['authors'][0], item['year']), []).append(item['year_suffix'])
+    assert len(items) == 3000 and len(groups) == 175
+    assert all(sorted(s) == [chr(ord('a') + i) for i in range(len(s))] for s in groups.values())
+    print(f"✅ {len(items)} 筆參考文獻、{len(groups)} 組同作者同年份")
+
+    print("\n✅ 所有年份後綴測試通過")
+    return True
+
+
+if __name__ == "__main__":
+    success = test_year_suffix()
+    exit(0 if success else 1)